@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from distance_estimator import DistanceEstimator
+from face_mesh_detector import FaceMeshDetector
+from frame_pipeline import FramePacket, FrameProcessor
+from gaze_predictor import GazePredictor
+from head_controller import HeadController
+from user_interface import UserInterface
+
+STAGES = ["detection_ms", "validation_ms", "prediction_ms", "ui_ms", "latency_ms"]
+PERCENTILES = [50, 95, 99]
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def iter_frames(source, max_frames=None):
+    count = 0
+    if os.path.isdir(source):
+        file_list = sorted(f for f in os.listdir(source) if f.lower().endswith(IMAGE_EXTENSIONS))
+        for filename in file_list:
+            if max_frames is not None and count >= max_frames:
+                return
+            image = cv2.imread(os.path.join(source, filename))
+            if image is not None:
+                count += 1
+                yield image
+        return
+
+    cap = cv2.VideoCapture(source)
+    try:
+        while cap.isOpened() and (max_frames is None or count < max_frames):
+            success, image = cap.read()
+            if not success:
+                break
+            count += 1
+            yield image
+    finally:
+        cap.release()
+
+
+def parse_resolution(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def reset_peak_rss():
+    # Linux only: restarts the peak (VmHWM) at the current RSS, so the next
+    # reading covers a single case instead of the whole process
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def rss_mb():
+    # (current, peak since the last reset_peak_rss) or None where /proc is missing
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if line.startswith(("VmRSS", "VmHWM")))
+    except OSError:
+        return None
+    return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+
+
+def summarize(values):
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    summary = {"count": int(len(values)), "mean": float(values.mean())}
+    for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{p}"] = float(v)
+    return summary
+
+
+def run_case(processor, ui, source, resolution, max_frames, warmup):
+    width, height = resolution
+    samples = {stage: [] for stage in STAGES}
+    rss_reset = reset_peak_rss()
+    rss_start = rss_mb()
+
+    frame_id = 0
+    t_start = time.perf_counter() if warmup == 0 else None
+    for image in iter_frames(source, max_frames + warmup):
+        if image.shape[1] != width or image.shape[0] != height:
+            image = cv2.resize(image, (width, height))
+
+        packet = FramePacket(frame_id, image, time.time(), time.perf_counter())
+        processor.detect(packet)
+        processor.analyze(packet)
+
+        # Without the frame cache, so ui_ms is the cost of a frame whose columns changed
+        ui.clear_frame_cache()
+        t0 = time.perf_counter()
+        ui.create_frame(image, highlight_column=packet.predicted_column, target_column=1)
+        t_ui = (time.perf_counter() - t0) * 1000
+        latency = (time.perf_counter() - packet.capture_time) * 1000
+
+        frame_id += 1
+        if frame_id == warmup:
+            t_start = time.perf_counter()
+        if frame_id <= warmup:
+            continue
+
+        samples["detection_ms"].append(packet.timings["detection_ms"])
+        # Validation and prediction only run when a (stable) face was found
+        samples["validation_ms"].append(packet.timings["validation_ms"] if packet.face_landmarks is not None else np.nan)
+        samples["prediction_ms"].append(packet.timings["prediction_ms"] if packet.is_stable else np.nan)
+        samples["ui_ms"].append(t_ui)
+        samples["latency_ms"].append(latency)
+
+    frames = frame_id - warmup
+    if frames <= 0:
+        return None
+    elapsed = time.perf_counter() - t_start
+
+    case = {
+        "source": source,
+        "resolution": f"{width}x{height}",
+        "frames": frames,
+        "throughput_fps": frames / elapsed if elapsed > 0 else None,
+        "stages": {stage: summarize(np.array(values, dtype=np.float64)) for stage, values in samples.items()},
+    }
+    rss_end = rss_mb()
+    if rss_reset and rss_start and rss_end:
+        case["rss_mb"] = {"start": rss_start[0], "peak": rss_end[1], "peak_delta": rss_end[1] - rss_start[0]}
+    return case
+
+
+def compare(report, baseline, tolerance, metric):
+    baseline_cases = {(c["source"], c["resolution"]): c for c in baseline.get("cases", [])}
+    regressions = []
+
+    print(f"\n{'case':<48}{'stage':<16}{'baseline':>10}{'current':>10}{'change':>9}")
+    for case in report["cases"]:
+        key = (case["source"], case["resolution"])
+        reference = baseline_cases.get(key)
+        if reference is None:
+            continue
+
+        name = f"{os.path.basename(key[0])} @ {key[1]}"
+        for stage in STAGES:
+            current, previous = case["stages"].get(stage), reference["stages"].get(stage)
+            if not current or not previous or not previous.get(metric):
+                continue
+            change = current[metric] / previous[metric] - 1
+            flag = " !" if change > tolerance else ""
+            print(f"{name:<48}{stage:<16}{previous[metric]:>10.2f}{current[metric]:>10.2f}{change:>+8.1%}{flag}")
+            if flag:
+                regressions.append({"case": name, "stage": stage, "metric": metric, "change": change})
+
+        if reference.get("throughput_fps") and case.get("throughput_fps"):
+            change = case["throughput_fps"] / reference["throughput_fps"] - 1
+            if change < -tolerance:
+                regressions.append({"case": name, "stage": "throughput_fps", "change": change})
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the detection pipeline on recorded video")
+    parser.add_argument("sources", nargs="+", help="Video files or directories of frames")
+    parser.add_argument("--resolutions", default="640x480,1280x720,1920x1080")
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--model", default="src/models/gc_1x3_loso.pth")
+    parser.add_argument("--scaler", default="src/scalers/scaler_1x3_loso.pkl")
+    parser.add_argument("--backend", choices=GazePredictor.BACKENDS, default="torch")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous report")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown")
+    parser.add_argument("--metric", default="p95", choices=["mean"] + [f"p{p}" for p in PERCENTILES])
+    args = parser.parse_args()
+
+    estimator = DistanceEstimator()
+    head_controller = HeadController(estimator)
+    predictor = GazePredictor(model_path=args.model, scaler_path=args.scaler, backend=args.backend)
+    ui = UserInterface()
+
+    report = {
+        "created": datetime.now().isoformat(),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+        },
+        "backend": args.backend,
+        "cases": [],
+    }
+
+    # Every case resets the peak RSS, so the process peak is the largest one seen
+    process_peak = peak_rss_mb()
+    for source in args.sources:
+        for resolution in [parse_resolution(r) for r in args.resolutions.split(",")]:
+            # A fresh detector per case, so no case starts from the previous one's tracked face
+            processor = FrameProcessor(FaceMeshDetector(), estimator, head_controller, predictor)
+            process_peak = max(process_peak, peak_rss_mb())
+            case = run_case(processor, ui, source, resolution, args.max_frames, args.warmup)
+            process_peak = max(process_peak, peak_rss_mb())
+            if case is None:
+                print(f"No frames read from {source}")
+                continue
+            report["cases"].append(case)
+
+            detection = case["stages"]["detection_ms"]
+            rss = case.get("rss_mb")
+            rss_str = f", peak RSS +{rss['peak_delta']:.1f} MB" if rss else ""
+            print(
+                f"{os.path.basename(source)} @ {case['resolution']}: {case['frames']} frames, "
+                f"{case['throughput_fps']:.1f} fps, detection p95 {detection['p95']:.2f} ms{rss_str}"
+            )
+
+    report["peak_rss_mb"] = max(process_peak, peak_rss_mb())
+    print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.metric)
+        if baseline.get("peak_rss_mb") and report["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + args.tolerance):
+            regressions.append({"stage": "peak_rss_mb", "change": report["peak_rss_mb"] / baseline["peak_rss_mb"] - 1})
+        report["regressions"] = regressions
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            exit_code = 1
+        else:
+            print("\nNo regressions.")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Report saved to {args.output}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from distance_estimator import DistanceEstimator
+from gaze_predictor import GazePredictor
+from head_controller import HeadController
+from landmarks import NUM_LANDMARKS, landmarks_to_array
+
+
+def make_face_landmarks(seed=0):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0.2, 0.8, size=(NUM_LANDMARKS, 3)).astype(np.float32)
+    return landmark_pb2.NormalizedLandmarkList(
+        landmark=[landmark_pb2.NormalizedLandmark(x=x, y=y, z=z) for x, y, z in points]
+    )
+
+
+def extract_landmarks_loop(face_landmarks):
+    # The original per-landmark extraction, kept as the reference for extract_features
+    coords = []
+    for idx in GazePredictor.KEY_LANDMARK_INDICES:
+        lm = face_landmarks.landmark[idx]
+        coords.append(lm.x)
+        coords.append(lm.y)
+    return np.array(coords)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Landmark feature extraction microbenchmark")
+    parser.add_argument("--model", default="src/models/gc_1x3_loso.pth")
+    parser.add_argument("--scaler", default="src/scalers/scaler_1x3_loso.pkl")
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    predictor = GazePredictor(model_path=args.model, scaler_path=args.scaler)
+    estimator = DistanceEstimator()
+    head_controller = HeadController(estimator)
+    face_landmarks = make_face_landmarks()
+    landmark_buffer = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+    width, height = 1920, 1080
+
+    def loop_extraction():
+        return extract_landmarks_loop(face_landmarks)
+
+    def vectorized_extraction():
+        return predictor.extract_features(landmarks_to_array(face_landmarks, landmark_buffer))
+
+    def loop_frame():
+        landmarks = face_landmarks.landmark
+        estimator.calculate_pixel_distance(landmarks[33], landmarks[263], width, height)
+        head_controller.is_head_position_valid(landmarks, width, height)
+        return extract_landmarks_loop(face_landmarks)
+
+    def vectorized_frame():
+        landmark_array = landmarks_to_array(face_landmarks, landmark_buffer)
+        estimator.calculate_pixel_distance(landmark_array[33], landmark_array[263], width, height)
+        head_controller.is_head_position_valid(landmark_array, width, height)
+        return predictor.extract_features(landmark_array)
+
+    if not np.array_equal(loop_extraction().astype(np.float32), vectorized_extraction()):
+        print("Vectorized features differ from the reference loop!")
+        return 1
+    if (
+        head_controller.is_head_position_valid(face_landmarks.landmark, width, height)
+        != head_controller.is_head_position_valid(landmarks_to_array(face_landmarks), width, height)
+    ):
+        print("Head position checks differ between landmark objects and arrays!")
+        return 1
+
+    cases = [
+        ("features (loop)", loop_extraction),
+        ("features (vectorized)", vectorized_extraction),
+        ("frame (loop)", loop_frame),
+        ("frame (vectorized)", vectorized_frame),
+    ]
+    print(f"{'case':<24}{'us/call':>10}")
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, number=args.number, repeat=args.repeat)) / args.number
+        print(f"{name:<24}{best * 1e6:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from gaze_predictor import GazePredictor
+from gaze_server import GazeClient
+from latency_stats import LatencyHistogram
+
+
+def run_clients(address, num_clients, duration, rows, seed=0):
+    # Every client is a thread with its own connection sending back-to-back requests
+    rng = np.random.default_rng(seed)
+    features = rng.random((num_clients, rows, len(GazePredictor.FEATURE_INDEX)), dtype=np.float32)
+    clients = [GazeClient(address) for _ in range(num_clients)]
+    histograms = [LatencyHistogram() for _ in range(num_clients)]
+    errors = []
+    start_barrier = threading.Barrier(num_clients + 1)
+
+    def client_loop(i):
+        start_barrier.wait()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                clients[i].forward(features[i])
+            except Exception as e:
+                errors.append(str(e))
+                return
+            histograms[i].add((time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=client_loop, args=(i,), daemon=True) for i in range(num_clients)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    t_start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - t_start
+
+    for client in clients:
+        client.close()
+
+    merged = histograms[0]
+    for histogram in histograms[1:]:
+        merged.merge(histogram)
+
+    summary = merged.summary() or {}
+    return {
+        "clients": num_clients,
+        "requests": merged.count,
+        "requests_per_s": merged.count / elapsed if elapsed > 0 else None,
+        "rows_per_s": merged.count * rows / elapsed if elapsed > 0 else None,
+        "latency_ms": {key: summary.get(key) for key in ("p50", "p95", "p99", "max")},
+        "errors": len(errors),
+    }
+
+
+def wait_for_server(address, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            GazeClient(address).close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the gaze inference server")
+    parser.add_argument("--address", help="Server to benchmark; by default one is started on a temporary socket")
+    parser.add_argument("--clients", default="1,2,4,8,16", help="Comma separated client counts")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per client count")
+    parser.add_argument("--rows", type=int, default=1, help="Faces per request")
+    parser.add_argument("--backend", choices=GazePredictor.BACKENDS, default="torch")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    server = None
+    address = args.address
+    if address is None:
+        address = "unix:" + os.path.join(tempfile.mkdtemp(), "gaze.sock")
+        server = subprocess.Popen([
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "gaze_server.py"),
+            "--address", address, "--backend", args.backend,
+            "--max-batch", str(args.max_batch), "--max-wait-ms", str(args.max_wait_ms),
+        ])
+
+    try:
+        if not wait_for_server(address):
+            print(f"No gaze inference server at {address}")
+            return 1
+
+        report = {"address": address, "rows_per_request": args.rows, "runs": []}
+        for num_clients in [int(c) for c in args.clients.split(",")]:
+            run = run_clients(address, num_clients, args.duration, args.rows)
+            latency = run["latency_ms"]
+            print(f"{num_clients:>3} clients: {run['requests_per_s']:8.0f} req/s  "
+                  f"p50 {latency['p50']:6.2f}  p95 {latency['p95']:6.2f}  p99 {latency['p99']:6.2f} ms")
+            report["runs"].append(run)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Report saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,54 @@
 import math
 
+import numpy as np
+from landmarks import landmark_xy, truncate
+
+# Outer eye corners, their pixel distance is the face width
+FACE_WIDTH_LANDMARKS = (33, 263)
+
+
 class DistanceEstimator:
     def __init__(self, focal_length=1300, real_face_width=14.0):
         self.focal_length = focal_length
         self.real_face_width = real_face_width
 
+    def pixel_distances(self, points1, points2, image_width, image_height):
+        # points: (N, 2+) normalized coordinates; image sizes scalars or (N,) arrays
+        points1 = np.asarray(points1, dtype=np.float64)
+        points2 = np.asarray(points2, dtype=np.float64)
+        return self._pixel_distance(
+            points1[..., 0], points1[..., 1], points2[..., 0], points2[..., 1], image_width, image_height,
+        )
+
+    @staticmethod
+    def _pixel_distance(x1, y1, x2, y2, image_width, image_height):
+        # Python floats for one pair or arrays for a batch; pixel positions are
+        # truncated before measuring
+        dx = truncate(x2 * image_width) - truncate(x1 * image_width)
+        dy = truncate(y2 * image_height) - truncate(y1 * image_height)
+        squared = dx * dx + dy * dy
+        return np.sqrt(squared) if isinstance(squared, np.ndarray) else math.sqrt(squared)
+
+    def pixel_face_widths(self, landmarks, image_width, image_height):
+        # landmarks: (N, 478, 3)
+        first, second = FACE_WIDTH_LANDMARKS
+        return self.pixel_distances(landmarks[:, first], landmarks[:, second], image_width, image_height)
+
+    def _distance(self, pixel_face_width):
+        return self.real_face_width * self.focal_length / pixel_face_width
+
+    def estimate_distances(self, pixel_face_widths):
+        # NaN where the width is 0
+        pixel_face_widths = np.asarray(pixel_face_widths, dtype=np.float64)
+        with np.errstate(divide="ignore"):
+            distances = self._distance(pixel_face_widths)
+        distances[pixel_face_widths == 0] = np.nan
+        return distances
+
+    # Single faces skip the array setup but share the formulas above
     def calculate_pixel_distance(self, landmark1, landmark2, image_width, image_height):
-        x1, y1 = int(landmark1.x * image_width), int(landmark1.y * image_height)
-        x2, y2 = int(landmark2.x * image_width), int(landmark2.y * image_height)
-        return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+        (x1, y1), (x2, y2) = landmark_xy(landmark1), landmark_xy(landmark2)
+        return self._pixel_distance(x1, y1, x2, y2, image_width, image_height)
 
     def estimate_distance(self, pixel_face_width):
-        return (
-            (self.real_face_width * self.focal_length) / pixel_face_width
-            if pixel_face_width
-            else None
-        )
+        return self._distance(pixel_face_width) if pixel_face_width else None
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+from face_mesh_detector import draw_face_landmarks
+from landmarks import FaceMeshResults, array_to_landmarks
+
+DEFAULT_MODEL_PATH = "src/models/face_landmarker.task"
+
+
+class FaceLandmarkerDetector:
+    # MediaPipe Tasks FaceLandmarker in LIVE_STREAM mode. process() hands the frame
+    # to detect_async and returns the latest finished result straight away, so the
+    # caller keeps running at camera rate; MediaPipe drops frames it cannot keep up with.
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, max_num_faces=1, min_detection_confidence=0.5,
+                 min_presence_confidence=0.5, min_tracking_confidence=0.5):
+        self._lock = threading.Lock()
+        self._latest = FaceMeshResults()
+        self._latest_timestamp_ms = None
+        self._last_submitted_ms = -1
+
+        self.frames_submitted = 0
+        self.results_received = 0
+
+        self.landmarker = None
+        if not os.path.exists(model_path):
+            print(f"Error: FaceLandmarker model not found at {model_path}")
+            return
+
+        vision = mp.tasks.vision
+        options = vision.FaceLandmarkerOptions(
+            base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.LIVE_STREAM,
+            num_faces=max_num_faces,
+            min_face_detection_confidence=min_detection_confidence,
+            min_face_presence_confidence=min_presence_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            result_callback=self._on_result,
+        )
+        try:
+            self.landmarker = vision.FaceLandmarker.create_from_options(options)
+        except Exception as e:
+            print(f"Error loading FaceLandmarker: {e}")
+
+    @property
+    def ready(self):
+        return self.landmarker is not None
+
+    @property
+    def result_age_ms(self):
+        # How far the returned landmarks lag behind the last submitted frame
+        with self._lock:
+            if self._latest_timestamp_ms is None:
+                return None
+            return self._last_submitted_ms - self._latest_timestamp_ms
+
+    def process(self, image):
+        if self.landmarker is None:
+            return FaceMeshResults()
+
+        # LIVE_STREAM needs strictly increasing timestamps
+        timestamp_ms = max(int(time.monotonic() * 1000), self._last_submitted_ms + 1)
+        self._last_submitted_ms = timestamp_ms
+
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        self.landmarker.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb), timestamp_ms)
+        self.frames_submitted += 1
+
+        with self._lock:
+            return self._latest
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        # Runs on MediaPipe's thread; convert here so process() only swaps a reference
+        faces = []
+        for face in result.face_landmarks:
+            points = np.array([(lm.x, lm.y, lm.z) for lm in face], dtype=np.float32)
+            faces.append(array_to_landmarks(points, landmark_pb2.NormalizedLandmarkList()))
+
+        results = FaceMeshResults(faces)
+        with self._lock:
+            self._latest = results
+            self._latest_timestamp_ms = timestamp_ms
+            self.results_received += 1
+
+    def close(self):
+        if self.landmarker is not None:
+            self.landmarker.close()
+            self.landmarker = None
+
+    def draw_landmarks(self, image, results):
+        return draw_face_landmarks(image, results)
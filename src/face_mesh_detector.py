@@ -1,8 +1,68 @@
 import mediapipe as mp
 import cv2
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+from landmarks import array_to_landmarks, landmarks_to_array, remap_landmarks
+
+
+def create_detector(detector="solutions", landmarker_model=None, max_num_faces=1, roi_tracking=False,
+                    keyframe_interval=0):
+    # Shared by main.py and the face mesh worker process
+    mesh_detector = None
+    if detector == "tasks":
+        from face_landmarker_detector import FaceLandmarkerDetector, DEFAULT_MODEL_PATH
+        mesh_detector = FaceLandmarkerDetector(landmarker_model or DEFAULT_MODEL_PATH, max_num_faces=max_num_faces)
+        if not mesh_detector.ready:
+            print("Falling back to the legacy face mesh")
+            mesh_detector = None
+    if mesh_detector is None:
+        mesh_detector = FaceMeshDetector(max_num_faces=max_num_faces, roi_tracking=roi_tracking)
+
+    if keyframe_interval > 1:
+        from keyframe_detector import KeyframeFaceMeshDetector
+        return KeyframeFaceMeshDetector(mesh_detector, keyframe_interval=keyframe_interval)
+    return mesh_detector
+
+
+def draw_face_landmarks(image, results):
+    # Works for MediaPipe landmark lists and for (478, 3) arrays coming back from the worker
+    if results.multi_face_landmarks:
+        for face_landmarks in results.multi_face_landmarks:
+            if isinstance(face_landmarks, np.ndarray):
+                face_landmarks = array_to_landmarks(face_landmarks, landmark_pb2.NormalizedLandmarkList())
+
+            # Face mesh
+            mp.solutions.drawing_utils.draw_landmarks(
+                image=image,
+                landmark_list=face_landmarks,
+                connections=mp.solutions.face_mesh.FACEMESH_TESSELATION,
+                landmark_drawing_spec=None,
+                connection_drawing_spec=mp.solutions.drawing_styles
+                .get_default_face_mesh_tesselation_style())
+
+            # Contours
+            mp.solutions.drawing_utils.draw_landmarks(
+                image=image,
+                landmark_list=face_landmarks,
+                connections=mp.solutions.face_mesh.FACEMESH_CONTOURS,
+                landmark_drawing_spec=None,
+                connection_drawing_spec=mp.solutions.drawing_styles
+                .get_default_face_mesh_contours_style())
+
+            # Irises
+            mp.solutions.drawing_utils.draw_landmarks(
+                image=image,
+                landmark_list=face_landmarks,
+                connections=mp.solutions.face_mesh.FACEMESH_IRISES,
+                landmark_drawing_spec=None,
+                connection_drawing_spec=mp.solutions.drawing_styles
+                .get_default_face_mesh_iris_connections_style())
+    return image
+
 
 class FaceMeshDetector:
-    def __init__(self, max_num_faces=1, min_detection_confidence=0.5, min_tracking_confidence=0.5):
+    def __init__(self, max_num_faces=1, min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 roi_tracking=False, roi_padding=0.35, roi_size=320):
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         self.mp_face_mesh = mp.solutions.face_mesh
@@ -14,43 +74,88 @@ class FaceMeshDetector:
             min_tracking_confidence=min_tracking_confidence
         )
 
+        # ROI mode: crop and downscale a padded box around the previous landmarks.
+        # Crops get their own FaceMesh so its internal tracking sees a stable view.
+        self.roi_tracking = roi_tracking
+        self.roi_padding = roi_padding
+        self.roi_size = roi_size
+        self.roi = None
+        self.roi_face_mesh = None
+        if roi_tracking:
+            self.roi_face_mesh = self.mp_face_mesh.FaceMesh(
+                max_num_faces=max_num_faces,
+                refine_landmarks=True,
+                min_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=min_tracking_confidence
+            )
+
     def process(self, image):
 
+        if self.roi_tracking and self.roi is not None:
+            results = self._process_roi(image, self.roi)
+            if results.multi_face_landmarks:
+                self.roi = self._landmark_roi(results, image.shape[1], image.shape[0])
+                return results
+            # Tracking lost, fall back to the full frame
+            self.roi = None
+
         image.flags.writeable = False
         image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         results = self.face_mesh.process(image_rgb)
 
         image.flags.writeable = True
+
+        if self.roi_tracking and results.multi_face_landmarks:
+            self.roi = self._landmark_roi(results, image.shape[1], image.shape[0])
         return results
 
-    def draw_landmarks(self, image, results):
+    def _process_roi(self, image, roi):
+        image_height, image_width = image.shape[:2]
+        x0, y0, x1, y1 = roi
+        crop = image[y0:y1, x0:x1]
+
+        crop_width, crop_height = x1 - x0, y1 - y0
+        scale = self.roi_size / max(crop_width, crop_height)
+        if scale < 1.0:
+            crop = cv2.resize(crop, (round(crop_width * scale), round(crop_height * scale)),
+                              interpolation=cv2.INTER_AREA)
 
+        crop_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        crop_rgb.flags.writeable = False
+        results = self.roi_face_mesh.process(crop_rgb)
+
+        # Normalized crop coordinates -> normalized full-frame coordinates
         if results.multi_face_landmarks:
             for face_landmarks in results.multi_face_landmarks:
-                # Face mesh
-                self.mp_drawing.draw_landmarks(
-                    image=image,
-                    landmark_list=face_landmarks,
-                    connections=self.mp_face_mesh.FACEMESH_TESSELATION,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=self.mp_drawing_styles
-                    .get_default_face_mesh_tesselation_style())
-                
-                # Contours
-                self.mp_drawing.draw_landmarks(
-                    image=image,
-                    landmark_list=face_landmarks,
-                    connections=self.mp_face_mesh.FACEMESH_CONTOURS,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=self.mp_drawing_styles
-                    .get_default_face_mesh_contours_style())
-                
-                # Irises
-                self.mp_drawing.draw_landmarks(
-                    image=image,
-                    landmark_list=face_landmarks,
-                    connections=self.mp_face_mesh.FACEMESH_IRISES,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=self.mp_drawing_styles
-                    .get_default_face_mesh_iris_connections_style())
-        return image
+                remap_landmarks(
+                    face_landmarks,
+                    crop_width / image_width, x0 / image_width,
+                    crop_height / image_height, y0 / image_height,
+                    crop_width / image_width,
+                )
+        return results
+
+    def _landmark_roi(self, results, image_width, image_height):
+        x_min = y_min = float("inf")
+        x_max = y_max = float("-inf")
+        for face_landmarks in results.multi_face_landmarks:
+            points = landmarks_to_array(face_landmarks)
+            x_min = min(x_min, points[:, 0].min() * image_width)
+            x_max = max(x_max, points[:, 0].max() * image_width)
+            y_min = min(y_min, points[:, 1].min() * image_height)
+            y_max = max(y_max, points[:, 1].max() * image_height)
+
+        # Padded square around the face(s), clamped to the frame
+        side = max(x_max - x_min, y_max - y_min) * (1 + 2 * self.roi_padding)
+        center_x, center_y = (x_min + x_max) / 2, (y_min + y_max) / 2
+        x0 = int(max(center_x - side / 2, 0))
+        y0 = int(max(center_y - side / 2, 0))
+        x1 = int(min(center_x + side / 2, image_width))
+        y1 = int(min(center_y + side / 2, image_height))
+
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return x0, y0, x1, y1
+
+    def draw_landmarks(self, image, results):
+        return draw_face_landmarks(image, results)
@@ -0,0 +1,290 @@
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import tracing
+from frame_pipeline import FramePacket
+from landmarks import FaceMeshResults
+
+
+class FrameRing:
+    # Preallocated frame slots in shared memory; frames are copied in once by the
+    # capture thread and read in place by the worker, never pickled.
+    def __init__(self, shape, slots, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        size = int(np.prod(self.shape)) * slots
+
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _worker_main(ring_name, shape, slots, requests, replies, detector_options, predictor_options):
+    from distance_estimator import DistanceEstimator
+    from face_mesh_detector import create_detector
+    from frame_pipeline import FrameProcessor
+    from head_controller import HeadController
+
+    ring = FrameRing(shape, slots, name=ring_name)
+
+    predictor = None
+    if predictor_options is not None:
+        from gaze_predictor import GazePredictor
+        predictor = GazePredictor(**predictor_options)
+
+    estimator = DistanceEstimator()
+    processor = FrameProcessor(
+        create_detector(**detector_options), estimator, HeadController(estimator), predictor,
+        max_faces=detector_options.get("max_num_faces", 1),
+    )
+
+    while True:
+        try:
+            request = requests.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+
+        slot, frame_id = request
+        packet = FramePacket(frame_id, ring.frames[slot], 0.0, 0.0)
+        processor.detect(packet)
+        if predictor is not None:
+            processor.analyze(packet)
+        replies.send(_compact_reply(slot, packet, predictor is not None))
+
+    ring.close()
+
+
+def _compact_reply(slot, packet, analyzed):
+    # Only landmark arrays, flags and timings go back over the pipe
+    from landmarks import landmarks_to_array
+
+    faces = None
+    if packet.results and packet.results.multi_face_landmarks:
+        faces = np.stack([landmarks_to_array(face) for face in packet.results.multi_face_landmarks])
+
+    reply = {"slot": slot, "frame_id": packet.frame_id, "faces": faces, "timings": packet.timings}
+    if analyzed:
+        reply.update(
+            landmark_array=packet.landmark_array,
+            horizontal_ok=packet.horizontal_ok,
+            vertical_ok=packet.vertical_ok,
+            distance_ok=packet.distance_ok,
+            distance=packet.distance,
+            is_stable=packet.is_stable,
+            predicted_column=packet.predicted_column,
+            predictions=packet.predictions,
+            probabilities=packet.probabilities,
+            features=packet.features,
+        )
+    return reply
+
+
+class WorkerPipeline:
+    # Face mesh (and optionally prediction) in a separate process fed through a
+    # shared-memory frame ring. A crashed worker is restarted; frames in flight are lost.
+    def __init__(self, cap, processor, detector_options=None, predictor_options=None, slots=3,
+                 read_timeout=0.5, restart_delay=1.0, stop_on_empty=False):
+        self.cap = cap
+        self.processor = processor
+        self.detector_options = detector_options or {}
+        self.predictor_options = predictor_options
+        self.slots = slots
+        self.read_timeout = read_timeout
+        self.restart_delay = restart_delay
+        self.stop_on_empty = stop_on_empty
+        self._capture_done = False
+
+        self._context = mp.get_context("spawn")
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.ring = None
+        self._process = None
+        self._requests = None
+        self._replies = None
+        self._free_slots = []
+        self._pending = {}
+        self._last_start = 0.0
+        # Set while a crashed worker waits out restart_delay; read() restarts it
+        self._restart_at = None
+
+        self.dropped_frames = 0
+        self.restarts = 0
+
+    @property
+    def running(self):
+        if self._capture_done:
+            # Keep going until the frames already handed to the worker are back
+            with self._lock:
+                if not self._pending:
+                    return False
+        return not self._stop_event.is_set() and self.cap.isOpened()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._capture_loop, name="pipeline-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _capture_loop(self):
+        frame_id = 0
+        while not self._stop_event.is_set() and self.cap.isOpened():
+            with tracing.span("capture.read"):
+                success, image = self.cap.read()
+            if not success:
+                if self.stop_on_empty:
+                    break
+                time.sleep(0.005)
+                continue
+
+            packet = FramePacket(frame_id, image, time.time(), time.perf_counter())
+            frame_id += 1
+
+            # Video files wait for a free slot, live cameras drop frames instead
+            while self.stop_on_empty and not self._stop_event.is_set():
+                with self._lock:
+                    if self.ring is None or self._free_slots:
+                        break
+                time.sleep(0.001)
+
+            with self._lock:
+                if self.ring is None:
+                    self.ring = FrameRing(image.shape, self.slots)
+                    self._start_worker()
+                if self._process is None or image.shape != self.ring.shape or not self._free_slots:
+                    # Worker is behind, restarting, or the camera changed resolution: drop the frame
+                    self.dropped_frames += 1
+                    continue
+                slot = self._free_slots.pop()
+                self.ring.frames[slot] = image
+                self._pending[slot] = packet
+                requests = self._requests
+
+            try:
+                requests.send((slot, packet.frame_id))
+            except (BrokenPipeError, OSError):
+                pass
+        self._capture_done = True
+
+    def _start_worker(self):
+        # Called with the lock held
+        requests_reader, requests_writer = self._context.Pipe(duplex=False)
+        replies_reader, replies_writer = self._context.Pipe(duplex=False)
+        self._process = self._context.Process(
+            target=_worker_main,
+            args=(self.ring.name, self.ring.shape, self.slots, requests_reader, replies_writer,
+                  self.detector_options, self.predictor_options),
+            name="face-mesh-worker",
+            daemon=True,
+        )
+        self._process.start()
+        requests_reader.close()
+        replies_writer.close()
+
+        self._requests = requests_writer
+        self._replies = replies_reader
+        self._free_slots = list(range(self.slots))
+        self._pending = {}
+        self._last_start = time.monotonic()
+
+    def _restart_worker(self, process):
+        # Tears the dead worker down and schedules the restart; the lock is never
+        # held while waiting, so read() and stop() stay responsive
+        if process.is_alive():
+            process.terminate()
+            process.join(timeout=1.0)
+        with self._lock:
+            if self._process is not process:
+                return
+            print(f"Face mesh worker exited (code {process.exitcode}), restarting")
+            self._requests.close()
+            self._replies.close()
+            self.dropped_frames += len(self._pending)
+            self._pending = {}
+            self._free_slots = []
+            self._process = None
+            self._restart_at = max(time.monotonic(), self._last_start + self.restart_delay)
+
+    def read(self):
+        with self._lock:
+            if (self._restart_at is not None and time.monotonic() >= self._restart_at
+                    and not self._stop_event.is_set()):
+                self._restart_at = None
+                self._start_worker()
+                self.restarts += 1
+            process, replies = self._process, self._replies
+        if process is None:
+            time.sleep(0.01)
+            return None
+
+        try:
+            if not replies.poll(self.read_timeout):
+                if not process.is_alive() and not self._stop_event.is_set():
+                    self._restart_worker(process)
+                return None
+            reply = replies.recv()
+        except (EOFError, OSError):
+            if not self._stop_event.is_set():
+                process.join(timeout=1.0)
+                self._restart_worker(process)
+            return None
+
+        with self._lock:
+            packet = self._pending.pop(reply["slot"], None)
+            self._free_slots.append(reply["slot"])
+        if packet is None or packet.frame_id != reply["frame_id"]:
+            return None
+
+        faces = reply["faces"]
+        packet.results = FaceMeshResults(list(faces) if faces is not None else None)
+        packet.timings.update(reply["timings"])
+
+        if "is_stable" in reply:
+            for key in ("landmark_array", "horizontal_ok", "vertical_ok", "distance_ok", "distance",
+                        "is_stable", "predicted_column", "predictions", "probabilities", "features"):
+                setattr(packet, key, reply[key])
+            packet.face_landmarks = packet.landmark_array
+            return packet
+
+        return self.processor.analyze(packet)
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+        with self._lock:
+            self._restart_at = None
+            if self._process is not None:
+                try:
+                    self._requests.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                self._process.join(timeout=2.0)
+                if self._process.is_alive():
+                    self._process.terminate()
+                self._requests.close()
+                self._replies.close()
+                self._process = None
+            if self.ring is not None:
+                self.ring.close()
+                self.ring = None
@@ -0,0 +1,286 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import tracing
+from landmarks import NUM_LANDMARKS, landmarks_to_array
+
+
+class DropOldestQueue:
+    def __init__(self, maxsize=1):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                tracing.instant("frame.dropped")
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class FramePacket:
+    def __init__(self, frame_id, image, timestamp, capture_time):
+        self.frame_id = frame_id
+        self.image = image
+        # Wall clock and perf_counter time taken right after cap.read() returned
+        self.timestamp = timestamp
+        self.capture_time = capture_time
+
+        self.results = None
+        self.face_landmarks = None
+        self.landmark_array = None
+        self.horizontal_ok = False
+        self.vertical_ok = False
+        self.distance_ok = False
+        self.distance = 0
+        self.is_stable = False
+        self.predicted_column = None
+        # Per stable face, in the order MediaPipe reported them
+        self.predictions = None
+        self.probabilities = None
+        # Model input rows of the stable faces, shared with shadow models
+        self.features = None
+
+        self.timings = {
+            "detection_ms": 0.0,
+            "validation_ms": 0.0,
+            "prediction_ms": 0.0,
+        }
+
+
+class FrameProcessor:
+    def __init__(self, detector, estimator, head_controller, predictor, max_faces=1):
+        self.detector = detector
+        self.estimator = estimator
+        self.head_controller = head_controller
+        self.predictor = predictor
+        # Landmarks of the faces on the current frame, reused for every frame
+        self._landmarks = np.empty((max_faces, NUM_LANDMARKS, 3), dtype=np.float32)
+
+    def detect(self, packet):
+        t0 = time.perf_counter()
+        with tracing.span("face_mesh.process"):
+            packet.results = self.detector.process(packet.image)
+        packet.timings["detection_ms"] = (time.perf_counter() - t0) * 1000
+        return packet
+
+    def analyze(self, packet):
+        results = packet.results
+        if not results or not results.multi_face_landmarks:
+            return packet
+
+        image_height, image_width = packet.image.shape[:2]
+        stable_faces = []
+
+        t0 = time.perf_counter()
+        faces = results.multi_face_landmarks
+        with tracing.span("head_controller.checks", {"faces": len(faces)}):
+            if len(faces) > len(self._landmarks):
+                self._landmarks = np.empty((len(faces), NUM_LANDMARKS, 3), dtype=np.float32)
+            landmark_arrays = [landmarks_to_array(face, self._landmarks[i]) for i, face in enumerate(faces)]
+            checks = self._check_faces(landmark_arrays, image_width, image_height)
+
+        for face_landmarks, landmark_array, (horizontal_ok, vertical_ok, distance_ok, distance) in zip(
+            results.multi_face_landmarks, landmark_arrays, checks
+        ):
+            is_stable = horizontal_ok and vertical_ok and distance_ok
+
+            # The first stable face (or the first face if none is stable) drives the UI
+            if packet.face_landmarks is None or (is_stable and not stable_faces):
+                packet.face_landmarks = face_landmarks
+                packet.landmark_array = landmark_array
+                packet.horizontal_ok = horizontal_ok
+                packet.vertical_ok = vertical_ok
+                packet.distance_ok = distance_ok
+                packet.distance = distance
+
+            if is_stable:
+                stable_faces.append(landmark_array)
+        # The packet outlives this frame (render, recorder), the buffer does not
+        packet.landmark_array = packet.landmark_array.copy()
+        packet.timings["validation_ms"] = (time.perf_counter() - t0) * 1000
+
+        if stable_faces:
+            packet.is_stable = True
+
+            # All stable faces go through a single forward pass
+            t0 = time.perf_counter()
+            with tracing.span("gaze.predict", {"faces": len(stable_faces)}):
+                packet.features = self.predictor.extract_batch_features(np.stack(stable_faces))
+                predictions, probabilities = self.predictor.predict_batch(packet.features)
+            packet.timings["prediction_ms"] = (time.perf_counter() - t0) * 1000
+
+            if predictions is not None:
+                packet.predictions = predictions
+                packet.probabilities = probabilities
+                packet.predicted_column = int(predictions[0])
+
+        return packet
+
+    def _check_faces(self, landmark_arrays, image_width, image_height):
+        # (horizontal_ok, vertical_ok, distance_ok, distance) per face. A single face
+        # takes the scalar path, several faces are checked in one batch.
+        if len(landmark_arrays) == 1:
+            landmark_array = landmark_arrays[0]
+            pixel_face_width = self.estimator.calculate_pixel_distance(
+                landmark_array[33],
+                landmark_array[263],
+                image_width,
+                image_height,
+            )
+            horizontal_ok, vertical_ok = self.head_controller.is_head_position_valid(
+                landmark_array,
+                image_width,
+                image_height,
+            )
+            distance_ok, distance = self.head_controller.is_distance_valid(pixel_face_width)
+            return [(horizontal_ok, vertical_ok, distance_ok, distance)]
+
+        horizontal_ok, vertical_ok, distance_ok, distances = self.head_controller.validate_batch(
+            np.stack(landmark_arrays), image_width, image_height,
+        )
+        return [
+            (bool(horizontal_ok[i]), bool(vertical_ok[i]), bool(distance_ok[i]),
+             None if np.isnan(distances[i]) else float(distances[i]))
+            for i in range(len(landmark_arrays))
+        ]
+
+
+class SyncPipeline:
+    def __init__(self, cap, processor, stop_on_empty=False):
+        self.cap = cap
+        self.processor = processor
+        # For video files an empty read is the end of the stream, not a glitch
+        self.stop_on_empty = stop_on_empty
+        self._frame_id = 0
+        self._ended = False
+
+    @property
+    def running(self):
+        return not self._ended and self.cap.isOpened()
+
+    def start(self):
+        return self
+
+    def read(self):
+        with tracing.span("capture.read"):
+            success, image = self.cap.read()
+        if not success:
+            if self.stop_on_empty:
+                self._ended = True
+            else:
+                print("Ignoring empty camera frame.")
+            return None
+
+        packet = FramePacket(self._frame_id, image, time.time(), time.perf_counter())
+        self._frame_id += 1
+
+        self.processor.detect(packet)
+        return self.processor.analyze(packet)
+
+    def stop(self):
+        pass
+
+
+class ThreadedPipeline:
+    # capture -> face mesh -> validation/prediction, each on its own thread.
+    # The caller's thread is the render stage and always gets the newest packet.
+    def __init__(self, cap, processor, queue_size=1, read_timeout=0.5, stop_on_empty=False):
+        self.cap = cap
+        self.processor = processor
+        self.read_timeout = read_timeout
+        self.stop_on_empty = stop_on_empty
+
+        self.detect_queue = DropOldestQueue(queue_size)
+        self.predict_queue = DropOldestQueue(queue_size)
+        self.output_queue = DropOldestQueue(queue_size)
+
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    @property
+    def running(self):
+        return not self._stop_event.is_set() and not self.output_queue.closed
+
+    @property
+    def dropped_frames(self):
+        return (
+            self.detect_queue.dropped
+            + self.predict_queue.dropped
+            + self.output_queue.dropped
+        )
+
+    def start(self):
+        workers = [
+            ("capture", self._capture_loop),
+            ("detection", self._stage_loop(self.detect_queue, self.predict_queue, self.processor.detect)),
+            ("prediction", self._stage_loop(self.predict_queue, self.output_queue, self.processor.analyze)),
+        ]
+        for name, target in workers:
+            thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _capture_loop(self):
+        frame_id = 0
+        while not self._stop_event.is_set() and self.cap.isOpened():
+            with tracing.span("capture.read"):
+                success, image = self.cap.read()
+            if not success:
+                if self.stop_on_empty:
+                    break
+                time.sleep(0.005)
+                continue
+
+            self.detect_queue.put(FramePacket(frame_id, image, time.time(), time.perf_counter()))
+            frame_id += 1
+
+        self.detect_queue.close()
+
+    def _stage_loop(self, input_queue, output_queue, stage):
+        def loop():
+            while not self._stop_event.is_set():
+                packet = input_queue.get(timeout=self.read_timeout)
+                if packet is None:
+                    if input_queue.closed:
+                        break
+                    continue
+                try:
+                    output_queue.put(stage(packet))
+                except Exception as e:
+                    print(f"Pipeline stage error: {e}")
+            output_queue.close()
+        return loop
+
+    def read(self):
+        return self.output_queue.get(timeout=self.read_timeout)
+
+    def stop(self):
+        self._stop_event.set()
+        for queue in (self.detect_queue, self.predict_queue, self.output_queue):
+            queue.close()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
@@ -0,0 +1,123 @@
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+VALID_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def default_gallery_dir():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "gallery")
+
+
+class GalleryStore:
+    # Decodes gallery images on demand into a bounded LRU of screen-sized frames
+    # and prefetches the neighbours of the current image on a background thread.
+    def __init__(self, gallery_dir, width, height, capacity=8, prefetch_radius=1):
+        self.width = width
+        self.height = height
+        self.capacity = max(capacity, 2 * prefetch_radius + 1)
+        self.prefetch_radius = prefetch_radius
+
+        self.files = []
+        if os.path.exists(gallery_dir):
+            self.files = [
+                os.path.join(gallery_dir, f)
+                for f in sorted(os.listdir(gallery_dir))
+                if f.lower().endswith(VALID_EXTENSIONS)
+            ]
+        if not self.files:
+            print("Warning: No images found in 'gallery' folder.")
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = []
+        self._wakeup = threading.Condition(self._lock)
+        self._stopped = False
+        self._placeholder = None
+
+        self._thread = threading.Thread(target=self._prefetch_loop, name="gallery-prefetch", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self.files)
+
+    def get(self, idx):
+        if not self.files:
+            return self._empty_frame()
+
+        idx %= len(self.files)
+        with self._lock:
+            image = self._cache.get(idx)
+            if image is not None:
+                self._cache.move_to_end(idx)
+
+        if image is None:
+            # Only a cold start or a jump past the prefetched neighbours decodes here
+            image = self._decode(idx)
+            self._store(idx, image)
+
+        self.prefetch(idx)
+        return image
+
+    def prefetch(self, idx):
+        if not self.files:
+            return
+
+        wanted = []
+        for offset in range(1, self.prefetch_radius + 1):
+            wanted.append((idx + offset) % len(self.files))
+            wanted.append((idx - offset) % len(self.files))
+
+        with self._wakeup:
+            # Keep cached neighbours away from the LRU end
+            for i in wanted:
+                if i in self._cache:
+                    self._cache.move_to_end(i)
+            missing = [i for i in wanted if i not in self._cache and i not in self._pending]
+            if missing:
+                self._pending.extend(missing)
+                self._wakeup.notify()
+
+    def close(self):
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify()
+        self._thread.join(timeout=1.0)
+
+    def _prefetch_loop(self):
+        while True:
+            with self._wakeup:
+                self._wakeup.wait_for(lambda: self._pending or self._stopped)
+                if self._stopped:
+                    return
+                idx = self._pending[0]
+
+            image = self._decode(idx)
+
+            with self._lock:
+                self._pending.remove(idx)
+            self._store(idx, image)
+
+    def _decode(self, idx):
+        filepath = self.files[idx]
+        img = cv2.imread(filepath)
+        if img is None:
+            print(f"Failed to load {os.path.basename(filepath)}")
+            return self._empty_frame()
+        return cv2.resize(img, (self.width, self.height))
+
+    def _store(self, idx, image):
+        with self._lock:
+            self._cache[idx] = image
+            self._cache.move_to_end(idx)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def _empty_frame(self):
+        if self._placeholder is None:
+            self._placeholder = np.full((self.height, self.width, 3), 30, dtype=np.uint8)
+        return self._placeholder
@@ -1,115 +1,223 @@
-import torch
-import joblib
 import numpy as np
-from gaze_classifier import GazeClassifier
+import tracing
+from landmarks import landmarks_to_array
 
 class GazePredictor:
-    def __init__(self, model_path, scaler_path, device='cpu'):
-        self.device = torch.device(device)
-        
-        self.KEY_LANDMARK_INDICES = [
+    KEY_LANDMARK_INDICES = [
+
+        # Right eye
+        33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246,
+
+        # Right iris
+        468, 469, 470, 471, 472,
+
+        # Left eye
+        362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398,
+
+        # Left iris
+        473, 474, 475, 476, 477,
+
+        # Right upper eyelid
+        124, 113, 247, 30, 29, 27, 28, 56, 190, 189, 221, 222, 223, 224, 225,
+
+        # Right lower eyelid 
+        130, 226, 31, 228, 229, 230, 231, 232, 233, 245, 244, 112, 26, 22, 23, 24, 110, 25,243,
+
+        #Left upper eyelid 
+        413, 414, 286, 258, 257, 259, 260, 467, 342, 353, 445, 444, 443, 442, 441,
+
+        # Left lower eyelid 
+        464, 465, 453, 452, 451, 450, 449, 448, 261, 446, 359, 255, 339, 254, 253, 252, 256, 341,
+
+        #Nose 
+        1, 4, 5, 195, 197, 6, 168, 8, 9, 
+
+        #Chin 
+        152,  175, 428, 199, 208
+    ]
+
+    # Offsets of (x, y) for every key landmark in a flattened (478, 3) landmark array
+    FEATURE_INDEX = (np.array(KEY_LANDMARK_INDICES)[:, None] * 3 + np.arange(2)).ravel()
+
+    BACKENDS = ('torch', 'numpy', 'onnx')
+
+    def __init__(self, model_path, scaler_path, device='cpu', backend='torch', motion_epsilon=None, precision=None):
+        self._features = np.empty(len(self.FEATURE_INDEX), dtype=np.float32)
+        self.backend = self._load_backend(backend, model_path, scaler_path, device, precision)
+        self.gate = MotionGate(motion_epsilon) if motion_epsilon else None
+        # Set while a remote backend (GazeClient) is unreachable
+        self.backend_error = None
+
+    def _load_backend(self, backend, model_path, scaler_path, device, precision=None):
+        input_dim = len(self.FEATURE_INDEX)
+
+        # Anything with forward() and num_classes, e.g. a GazeClient for a remote server
+        if not isinstance(backend, str):
+            return backend
+
+        # Backends are imported lazily so the numpy engine never pulls in torch
+        if backend == 'numpy':
+            from numpy_gaze_engine import NumpyGazeEngine
+            try:
+                engine = NumpyGazeEngine.from_checkpoint(model_path, scaler_path, input_dim)
+            except Exception as e:
+                print(f"Error loading numpy gaze engine: {e}")
+                return None
+            if engine.input_dim != input_dim:
+                print(f"Numpy gaze engine expects {engine.input_dim} features, got {input_dim}")
+                return None
+            return engine
+
+        if backend == 'onnx':
+            from onnx_gaze_backend import OnnxGazeBackend
+            if precision and precision != 'float32':
+                print(f"The onnx backend runs float32, ignoring precision={precision}")
+            onnx_backend = OnnxGazeBackend(model_path, scaler_path, input_dim)
+            return onnx_backend if onnx_backend.ready else None
+
+        if backend == 'torch':
+            from torch_gaze_backend import TorchGazeBackend
+            torch_backend = TorchGazeBackend(model_path, scaler_path, input_dim, device, precision)
+            return torch_backend if torch_backend.ready else None
+
+        print(f"Unknown gaze backend '{backend}', expected one of {self.BACKENDS}")
+        return None
+
+    def extract_features(self, landmark_array, out=None):
+        if out is None:
+            out = self._features
+        return np.take(landmark_array.reshape(-1), self.FEATURE_INDEX, out=out)
+
+    def extract_batch_features(self, faces):
+        num_features = len(self.FEATURE_INDEX)
+
+        if isinstance(faces, np.ndarray):
+            if faces.ndim == 2 and faces.shape[1] == num_features:
+                return np.asarray(faces, dtype=np.float32)
+            if faces.ndim == 3:
+                flat = faces.reshape(faces.shape[0], faces.shape[1] * faces.shape[2])
+                return np.take(flat, self.FEATURE_INDEX, axis=1).astype(np.float32, copy=False)
+            raise ValueError(f"Expected (N, {num_features}) features or (N, 478, 3) landmarks, got {faces.shape}")
+
+        features = np.empty((len(faces), num_features), dtype=np.float32)
+        for row, face in zip(features, faces):
+            self.extract_features(landmarks_to_array(face), out=row)
+        return features
 
-            # Right eye
-            33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246,
-
-            # Right iris
-            468, 469, 470, 471, 472,
-
-            # Left eye
-            362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398,
-
-            # Left iris
-            473, 474, 475, 476, 477,
-
-            # Right upper eyelid
-            124, 113, 247, 30, 29, 27, 28, 56, 190, 189, 221, 222, 223, 224, 225,
-
-            # Right lower eyelid 
-            130, 226, 31, 228, 229, 230, 231, 232, 233, 245, 244, 112, 26, 22, 23, 24, 110, 25,243,
+    def predict(self, face_landmarks):
 
-            #Left upper eyelid 
-            413, 414, 286, 258, 257, 259, 260, 467, 342, 353, 445, 444, 443, 442, 441,
+        if self.backend is None:
+            return None
 
-            # Left lower eyelid 
-            464, 465, 453, 452, 451, 450, 449, 448, 261, 446, 359, 255, 339, 254, 253, 252, 256, 341,
+        if self.gate is not None:
+            classes, _ = self.predict_batch(landmarks_to_array(face_landmarks)[None])
+            return None if classes is None else int(classes[0])
 
-            #Nose 
-            1, 4, 5, 195, 197, 6, 168, 8, 9, 
+        raw_features = self.extract_features(landmarks_to_array(face_landmarks))
 
-            #Chin 
-            152,  175, 428, 199, 208
-        ]
+        features_reshaped = raw_features.reshape(1, -1)
 
-        # Model
-        try:
-            input_dim = len(self.KEY_LANDMARK_INDICES) * 2
-            checkpoint = torch.load(model_path, map_location=self.device)
-            
-            num_classes = 3 # Default
-            state_dict = None
-
-            if isinstance(checkpoint, dict) and 'model_state_dict' in checkpoint:
-                state_dict = checkpoint['model_state_dict']
-                
-                if 'num_classes' in checkpoint:
-                    num_classes = checkpoint['num_classes']
-                    print(f"Found num_classes in checkpoint: {num_classes}")
-            else:
-                state_dict = checkpoint
-                keys = list(state_dict.keys())
-                if keys:
-                    last_weight_key = keys[-2] 
-                    if 'weight' in last_weight_key:
-                         num_classes = state_dict[last_weight_key].shape[0]
-                         print(f"Inferred num_classes from state_dict: {num_classes}")
-
-            self.model = GazeClassifier(input_features=input_dim, num_classes=num_classes)
-            self.model.to(self.device)
-
-            self.model.load_state_dict(state_dict)
-            self.model.eval()
-            print("Model loaded successfully from state_dict.")
-            
-        except RuntimeError as e:
-            print(f"Error loading model weights: {e}")
-            print("Mismatch between GazeClassifier architecture and the loaded state_dict.")
-            print("Please ensure src/gaze_classifier.py matches your training model exactly.")
-            self.model = None
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            self.model = None
-        
-        # Scaler
         try:
-            self.scaler = joblib.load(scaler_path)
-        except Exception as e:
-            print(f"Error loading scaler: {e}")
-            self.scaler = None
-
-    def _extract_landmarks(self, face_landmarks):
-
-        coords = []
-        for idx in self.KEY_LANDMARK_INDICES:
-            lm = face_landmarks.landmark[idx]
-            coords.append(lm.x)
-            coords.append(lm.y)
-            
-        return np.array(coords)
-
-    def predict(self, face_landmarks):
-
-        if self.model is None or self.scaler is None:
+            with tracing.span("gaze.forward", {"rows": 1}):
+                outputs = self.backend.forward(features_reshaped)
+        except OSError as e:
+            self._backend_failed(e)
             return None
+        self._backend_ok()
 
-        raw_features = self._extract_landmarks(face_landmarks)
+        return int(outputs[0].argmax())
 
-        features_reshaped = raw_features.reshape(1, -1)
-
-        scaled_features = self.scaler.transform(features_reshaped)
+    def predict_batch(self, faces):
+        # faces: (N, features) array, (N, 478, 3) landmark arrays or a list of face landmarks
+        if self.backend is None:
+            return None, None
 
-        with torch.inference_mode():
-            input_tensor = torch.tensor(scaled_features, dtype=torch.float32).to(self.device)
-            outputs = self.model(input_tensor)
-            _, predicted = torch.max(outputs, 1)
+        with tracing.span("gaze.features"):
+            features = self.extract_batch_features(faces)
+        if len(features) == 0:
+            num_classes = self.backend.num_classes
+            return np.empty(0, dtype=np.int64), np.empty((0, num_classes), dtype=np.float32)
 
-            return predicted.item()
+        try:
+            if self.gate is not None:
+                result = self.gate.predict(features, self._forward)
+            else:
+                result = self._forward(features)
+        except OSError as e:
+            self._backend_failed(e)
+            return None, None
+        self._backend_ok()
+        return result
+
+    def _backend_failed(self, error):
+        # Reported once; the backend reconnects by itself on a later call
+        if self.backend_error is None:
+            print(f"Gaze backend unavailable, no predictions until it is back: {error}")
+        self.backend_error = error
+
+    def _backend_ok(self):
+        if self.backend_error is not None:
+            print("Gaze backend is back")
+            self.backend_error = None
+
+    def _forward(self, features):
+        with tracing.span("gaze.forward", {"rows": len(features)}):
+            logits = self.backend.forward(features)
+        return logits.argmax(axis=1), softmax(logits)
+
+
+class MotionGate:
+    # Reuses the last class and probabilities of a face while its key landmarks
+    # stay within epsilon of the features that were last sent to the model.
+    # Motion is the RMS feature change divided by the width of the key landmarks,
+    # so the threshold does not depend on how close the user sits.
+    def __init__(self, epsilon):
+        self.epsilon = epsilon
+        self.hits = 0
+        self.misses = 0
+        self._features = None
+        self._classes = None
+        self._probabilities = None
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+    def reset(self):
+        self._features = None
+        self._classes = None
+        self._probabilities = None
+
+    def motion(self, features):
+        delta = features - self._features
+        rms = np.sqrt(np.mean(delta * delta, axis=1))
+        x = features[:, 0::2]
+        width = x.max(axis=1) - x.min(axis=1)
+        return rms / np.maximum(width, 1e-6)
+
+    def predict(self, features, forward):
+        # Rows are matched to the previous call by position, so a change in the
+        # number of faces invalidates the cache
+        if self._features is None or self._features.shape != features.shape:
+            self._classes, self._probabilities = forward(features)
+            self._features = features.copy()
+            self.misses += len(features)
+            return self._classes.copy(), self._probabilities.copy()
+
+        moved = self.motion(features) > self.epsilon
+        num_moved = int(moved.sum())
+        if num_moved:
+            classes, probabilities = forward(features[moved])
+            self._classes[moved] = classes
+            self._probabilities[moved] = probabilities
+            self._features[moved] = features[moved]
+
+        self.misses += num_moved
+        self.hits += len(features) - num_moved
+        return self._classes.copy(), self._probabilities.copy()
+
+
+def softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
@@ -0,0 +1,303 @@
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from gaze_predictor import GazePredictor
+
+DEFAULT_ADDRESS = "127.0.0.1:5055"
+
+# On connect the server sends HELLO; every request is REQUEST + rows * input_dim
+# float32 features and every response is RESPONSE + rows * num_classes float32 logits,
+# or RESPONSE + a UTF-8 error message of error_length bytes if the forward pass failed.
+MAGIC = b"ETGZ"
+HELLO = struct.Struct("<4sHH")
+REQUEST = struct.Struct("<IH")
+RESPONSE = struct.Struct("<IHH")
+
+
+def parse_address(address):
+    # "unix:/path/to.sock" (or any path) for a Unix socket, otherwise "host:port"
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    if "/" in address:
+        return "unix", address
+    host, port = address.rsplit(":", 1)
+    return "tcp", (host, int(port))
+
+
+class BatchingInferenceServer:
+    # Requests queue up while a forward pass is running; the next pass takes up
+    # to max_batch rows, waiting at most max_wait_ms for more to arrive.
+    def __init__(self, backend, input_dim, max_batch=64, max_wait_ms=2.0):
+        self.backend = backend
+        self.input_dim = input_dim
+        self.num_classes = backend.num_classes
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+        self.clients = 0
+        self._queue = None
+        self._loop = None
+        self._stop = None
+
+    async def serve(self, address, handle_signals=True):
+        self._queue = asyncio.Queue()
+        kind, target = parse_address(address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.remove(target)
+            server = await asyncio.start_unix_server(self._handle_client, path=target)
+        else:
+            server = await asyncio.start_server(self._handle_client, host=target[0], port=target[1])
+
+        # Stop the same way on SIGTERM (e.g. from benchmark_server.py) as on Ctrl+C
+        loop = self._loop = asyncio.get_running_loop()
+        stop = self._stop = asyncio.Event()
+        signals = (signal.SIGINT, signal.SIGTERM) if handle_signals else ()
+        for signum in signals:
+            loop.add_signal_handler(signum, stop.set)
+
+        print(f"Gaze inference server listening on {address} "
+              f"(max batch {self.max_batch}, max wait {self.max_wait * 1000:.1f} ms)")
+        batcher = asyncio.create_task(self._batch_loop())
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            for signum in signals:
+                loop.remove_signal_handler(signum)
+            batcher.cancel()
+            if kind == "unix" and os.path.exists(target):
+                os.remove(target)
+
+    def stop(self):
+        # From any thread, e.g. when serve() runs in a background thread
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    async def _handle_client(self, reader, writer):
+        self.clients += 1
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family != socket.AF_UNIX:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        writer.write(HELLO.pack(MAGIC, self.input_dim, self.num_classes))
+        pending = set()
+        try:
+            while True:
+                header = await reader.readexactly(REQUEST.size)
+                request_id, rows = REQUEST.unpack(header)
+                payload = await reader.readexactly(rows * self.input_dim * 4)
+                features = np.frombuffer(payload, dtype=np.float32).reshape(rows, self.input_dim)
+
+                future = asyncio.get_running_loop().create_future()
+                self._queue.put_nowait((features, future))
+                # Clients may pipeline requests; answers go out as their batch finishes
+                task = asyncio.create_task(self._respond(writer, request_id, future))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown with the client still connected
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+            self.clients -= 1
+
+    async def _respond(self, writer, request_id, future):
+        try:
+            logits = await future
+        except Exception as e:
+            # Tell the client instead of leaving it to time out
+            message = f"{type(e).__name__}: {e}".encode()[:0xFFFF]
+            writer.write(RESPONSE.pack(request_id, 0, len(message)) + message)
+        else:
+            writer.write(RESPONSE.pack(request_id, len(logits), 0) + logits.tobytes())
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            rows = len(batch[0][0])
+
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                batch.append(item)
+                rows += len(item[0])
+
+            features = np.concatenate([item[0] for item in batch]) if len(batch) > 1 else batch[0][0]
+            try:
+                # The forward pass runs off the event loop so new requests keep queueing
+                logits = await loop.run_in_executor(None, self._forward, features)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            start = 0
+            for item_features, future in batch:
+                end = start + len(item_features)
+                if not future.done():
+                    future.set_result(logits[start:end])
+                start = end
+
+            self.requests += len(batch)
+            self.batches += 1
+            self.rows += rows
+
+    def _forward(self, features):
+        return np.ascontiguousarray(self.backend.forward(features), dtype=np.float32)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_rows": self.rows / self.batches if self.batches else None,
+        }
+
+
+class GazeClient:
+    # Blocking client with the backend interface (forward / num_classes), so it can
+    # be passed to GazePredictor as backend=GazeClient(address). A failed request
+    # drops the connection; the next forward() reconnects, at most once per
+    # retry_interval so a server that is down does not cost a connect per frame.
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=2.0, retry_interval=1.0):
+        self.address = address
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.input_dim = None
+        self.num_classes = None
+        self._sock = None
+        self._next_id = 0
+        self._next_connect = 0.0
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self):
+        kind, target = parse_address(self.address)
+        if kind == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        sock.connect(target)
+
+        magic, input_dim, num_classes = HELLO.unpack(self._recv_exactly(sock, HELLO.size))
+        if magic != MAGIC:
+            sock.close()
+            raise ConnectionError(f"{self.address} is not a gaze inference server")
+        self.input_dim = input_dim
+        self.num_classes = num_classes
+        self._sock = sock
+
+    @staticmethod
+    def _recv_exactly(sock, size):
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            count = sock.recv_into(view[received:])
+            if not count:
+                raise ConnectionError("Gaze inference server closed the connection")
+            received += count
+        return buffer
+
+    def forward(self, features):
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        with self._lock:
+            if self._sock is None:
+                self._reconnect()
+            try:
+                return self._request(features)
+            except OSError:
+                self.close()
+                raise
+
+    def _reconnect(self):
+        now = time.monotonic()
+        if now < self._next_connect:
+            raise ConnectionError(f"Not connected to the gaze inference server at {self.address}")
+        self._next_connect = now + self.retry_interval
+        self._connect()
+
+    def _request(self, features):
+        request_id = self._next_id
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        self._sock.sendall(REQUEST.pack(request_id, len(features)) + features.tobytes())
+
+        response_id, rows, error_length = RESPONSE.unpack(self._recv_exactly(self._sock, RESPONSE.size))
+        payload = self._recv_exactly(self._sock, error_length or rows * self.num_classes * 4)
+        if response_id != request_id:
+            raise ConnectionError(f"Out of order response {response_id}, expected {request_id}")
+        if error_length:
+            raise RuntimeError(f"Gaze inference server failed: {bytes(payload).decode(errors='replace')}")
+        return np.frombuffer(payload, dtype=np.float32).reshape(rows, self.num_classes)
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve gaze predictions to local clients with dynamic batching")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="host:port or unix:/path/to.sock")
+    parser.add_argument("--model", default="src/models/gc_1x3_loso.pth")
+    parser.add_argument("--scaler", default="src/scalers/scaler_1x3_loso.pkl")
+    parser.add_argument("--backend", choices=GazePredictor.BACKENDS, default="torch")
+    parser.add_argument("--precision", choices=("float32", "float16", "bfloat16", "int8"),
+                        help="Convert the torch classifier on load")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    predictor = GazePredictor(
+        model_path=args.model, scaler_path=args.scaler, backend=args.backend, precision=args.precision,
+    )
+    if predictor.backend is None:
+        print("Model could not be loaded")
+        return 1
+
+    server = BatchingInferenceServer(
+        predictor.backend, len(GazePredictor.FEATURE_INDEX),
+        max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+    )
+    asyncio.run(server.serve(args.address))
+    print(f"Server stats: {server.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
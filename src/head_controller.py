@@ -1,3 +1,12 @@
+import numpy as np
+
+from landmarks import truncate
+
+# Upper and lower lids of both eyes, and the nose tip
+EYE_LANDMARKS = np.array([159, 145, 386, 374])
+NOSE_LANDMARK = 1
+
+
 class HeadController:
     def __init__(
         self,
@@ -13,32 +22,66 @@ class HeadController:
         self.min_distance = min_distance
         self.max_distance = max_distance
 
-    def is_head_position_valid(self, landmarks, image_width, image_height):
+    def head_position_masks(self, landmarks, image_width, image_height):
+        # landmarks: (N, 478, 3); image sizes scalars or (N,) arrays
+        landmarks = np.asarray(landmarks)
+        eye_y = landmarks[:, EYE_LANDMARKS, 1].astype(np.float64)
+        nose_x = landmarks[:, NOSE_LANDMARK, 0].astype(np.float64)
+        return self._position_checks(
+            eye_y[:, 0], eye_y[:, 1], eye_y[:, 2], eye_y[:, 3], nose_x, image_width, image_height,
+        )
 
-        left_eye_y = int((landmarks[159].y + landmarks[145].y) / 2 * image_height)
-        right_eye_y = int((landmarks[386].y + landmarks[374].y) / 2 * image_height)
-        nose_x = int(landmarks[1].x * image_width)
+    def _position_checks(self, left_top, left_bottom, right_top, right_bottom, nose, image_width, image_height):
+        # Python floats for one face or (N,) arrays for a batch
+        left_eye_y = truncate((left_top + left_bottom) / 2 * image_height)
+        right_eye_y = truncate((right_top + right_bottom) / 2 * image_height)
+        nose_x = truncate(nose * image_width)
 
         middle_x = image_width // 2
-        target_y = int(image_height * 1 / 3)
+        target_y = truncate(image_height * 1 / 3)
 
         threshold_x = image_width * self.width_threshold
         threshold_y = image_height * self.height_threshold
 
         horizontal_ok = abs(nose_x - middle_x) <= threshold_x
         vertical_ok = (
-            abs(left_eye_y - target_y) <= threshold_y
-            and abs(right_eye_y - target_y) <= threshold_y
+            (abs(left_eye_y - target_y) <= threshold_y)
+            & (abs(right_eye_y - target_y) <= threshold_y)
         )
-
         return horizontal_ok, vertical_ok
 
+    def _distance_ok(self, distance):
+        return (self.min_distance <= distance) & (distance <= self.max_distance)
+
+    def distance_masks(self, pixel_face_widths):
+        # Distances are NaN (and invalid) where no width could be measured
+        distances = self.distance_estimator.estimate_distances(pixel_face_widths)
+        return self._distance_ok(distances), distances
+
+    def validate_batch(self, landmarks, image_width, image_height):
+        # All checks for N faces: horizontal_ok, vertical_ok, distance_ok and distances
+        horizontal_ok, vertical_ok = self.head_position_masks(landmarks, image_width, image_height)
+        pixel_face_widths = self.distance_estimator.pixel_face_widths(landmarks, image_width, image_height)
+        distance_ok, distances = self.distance_masks(pixel_face_widths)
+        return horizontal_ok, vertical_ok, distance_ok, distances
+
+    # Single faces skip the array setup but run the same checks as the batch versions
+    def is_head_position_valid(self, landmarks, image_width, image_height):
+        if isinstance(landmarks, np.ndarray):
+            left_top, left_bottom, right_top, right_bottom = landmarks[EYE_LANDMARKS, 1].tolist()
+            nose = landmarks[NOSE_LANDMARK, 0].item()
+        else:
+            left_top, left_bottom = landmarks[159].y, landmarks[145].y
+            right_top, right_bottom = landmarks[386].y, landmarks[374].y
+            nose = landmarks[NOSE_LANDMARK].x
+        return self._position_checks(left_top, left_bottom, right_top, right_bottom, nose, image_width, image_height)
+
     def is_distance_valid(self, pixel_face_width):
         if not pixel_face_width:
             return False, None
 
         distance = self.distance_estimator.estimate_distance(pixel_face_width)
         if distance is None:
-             return False, None
-             
-        return self.min_distance <= distance <= self.max_distance, distance
+            return False, None
+
+        return self._distance_ok(distance), distance
@@ -0,0 +1,156 @@
+import time
+
+import cv2
+import numpy as np
+from landmarks import FaceMeshResults, landmarks_to_array, write_landmarks
+
+
+class KeyframeFaceMeshDetector:
+    # Runs the wrapped FaceMeshDetector only on keyframes and moves the landmarks
+    # along with sparse Lucas-Kanade optical flow on a small gray image in between.
+    def __init__(self, detector, keyframe_interval=3, flow_width=320, max_flow_error=12.0,
+                 max_lost_fraction=0.1, max_motion=0.05, max_keyframe_age=0.5):
+        self.detector = detector
+        self.keyframe_interval = keyframe_interval
+        self.flow_width = flow_width
+        self.max_flow_error = max_flow_error
+        self.max_lost_fraction = max_lost_fraction
+        # Median landmark displacement per frame, as a fraction of the face width
+        self.max_motion = max_motion
+        self.max_keyframe_age = max_keyframe_age
+
+        self.lk_params = dict(
+            winSize=(15, 15),
+            maxLevel=2,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03),
+        )
+
+        self._prev_gray = None
+        self._faces = None
+        self._points = None
+        self._keyframe_time = 0.0
+
+        self.is_keyframe = True
+        self.frames_since_keyframe = 0
+        self.keyframes = 0
+        self.propagated_frames = 0
+        self.last_drift_px = None
+        self._drift_total = 0.0
+        self._drift_count = 0
+
+    @property
+    def mean_drift_px(self):
+        return self._drift_total / self._drift_count if self._drift_count else None
+
+    def stats(self):
+        return {
+            "keyframes": self.keyframes,
+            "propagated_frames": self.propagated_frames,
+            "last_drift_px": self.last_drift_px,
+            "mean_drift_px": self.mean_drift_px,
+        }
+
+    def draw_landmarks(self, image, results):
+        return self.detector.draw_landmarks(image, results)
+
+    def process(self, image):
+        now = time.perf_counter()
+        gray = self._flow_image(image)
+
+        propagated = None
+        if self._faces is not None and self._prev_gray is not None and self._prev_gray.shape == gray.shape:
+            propagated = self._propagate(gray)
+
+        due = (
+            self.frames_since_keyframe + 1 >= self.keyframe_interval
+            or now - self._keyframe_time > self.max_keyframe_age
+        )
+        if propagated is not None and not due:
+            self._prev_gray = gray
+            self._points = propagated
+            self.is_keyframe = False
+            self.frames_since_keyframe += 1
+            self.propagated_frames += 1
+            return self._propagated_results(propagated, gray.shape)
+
+        results = self.detector.process(image)
+
+        self._prev_gray = gray
+        self._keyframe_time = now
+        self.is_keyframe = True
+        self.frames_since_keyframe = 0
+        self.keyframes += 1
+
+        if results.multi_face_landmarks:
+            flow_size = np.array([gray.shape[1], gray.shape[0]], dtype=np.float32)
+            self._faces = list(results.multi_face_landmarks)
+            self._points = [landmarks_to_array(face)[:, :2] * flow_size for face in self._faces]
+
+            # Drift: where flow would have put the landmarks vs. the fresh detection
+            if propagated is not None and len(propagated) == len(self._points):
+                scale = image.shape[1] / gray.shape[1]
+                errors = [np.linalg.norm(p - q, axis=1).mean() for p, q in zip(propagated, self._points)]
+                self.last_drift_px = float(np.mean(errors) * scale)
+                self._drift_total += self.last_drift_px
+                self._drift_count += 1
+        else:
+            self._faces = None
+            self._points = None
+
+        return results
+
+    def _flow_image(self, image):
+        height, width = image.shape[:2]
+        if width > self.flow_width:
+            small = cv2.resize(image, (self.flow_width, round(height * self.flow_width / width)),
+                               interpolation=cv2.INTER_LINEAR)
+        else:
+            small = image
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _propagate(self, gray):
+        prev_points = np.concatenate(self._points).reshape(-1, 1, 2).astype(np.float32)
+        next_points, status, error = cv2.calcOpticalFlowPyrLK(
+            self._prev_gray, gray, prev_points, None, **self.lk_params
+        )
+        if next_points is None:
+            return None
+
+        good = status.ravel() == 1
+        if 1.0 - good.mean() > self.max_lost_fraction:
+            return None
+        if error.ravel()[good].mean() > self.max_flow_error:
+            return None
+
+        prev_points = prev_points.reshape(-1, 2)
+        next_points = next_points.reshape(-1, 2)
+        displacement = np.median(next_points[good] - prev_points[good], axis=0)
+
+        propagated = []
+        start = 0
+        for points in self._points:
+            end = start + len(points)
+            face_next = next_points[start:end].copy()
+            face_good = good[start:end]
+            # Lost points follow the face's median motion
+            face_next[~face_good] = points[~face_good] + displacement
+
+            face_width = points[:, 0].max() - points[:, 0].min()
+            motion = np.linalg.norm(np.median(face_next - points, axis=0))
+            if face_width <= 0 or motion / face_width > self.max_motion:
+                return None
+
+            propagated.append(face_next)
+            start = end
+        return propagated
+
+    def _propagated_results(self, propagated, flow_shape):
+        flow_size = np.array([flow_shape[1], flow_shape[0]], dtype=np.float32)
+        faces = []
+        for keyframe_face, points in zip(self._faces, propagated):
+            face = type(keyframe_face)()
+            face.CopyFrom(keyframe_face)
+            # z is kept from the keyframe, flow only moves x and y
+            write_landmarks(face, points / flow_size)
+            faces.append(face)
+        return FaceMeshResults(faces)
@@ -0,0 +1,93 @@
+import os
+import struct
+
+import numpy as np
+from landmarks import NUM_LANDMARKS
+
+MAGIC = b"ETLM"
+VERSION = 1
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<4sHHI")
+
+# Fixed-width records so a recording can be memory-mapped as one structured array
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("target_age", "<f4"),
+    ("image_width", "<u2"),
+    ("image_height", "<u2"),
+    ("target", "i1"),
+    ("has_face", "u1"),
+    ("reserved", "<u2"),
+    ("landmarks", "<f4", (NUM_LANDMARKS, 3)),
+])
+
+
+class LandmarkRecorder:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, "rb") as f:
+                _read_header(f)
+
+        self._file = open(path, "ab")
+        if exists:
+            # Drop a partial record left behind by a crash so records stay aligned
+            size = self._file.tell()
+            whole = HEADER_SIZE + (size - HEADER_SIZE) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+            if whole != size:
+                self._file.truncate(whole)
+                self._file.seek(whole)
+        else:
+            header = _HEADER.pack(MAGIC, VERSION, NUM_LANDMARKS, RECORD_DTYPE.itemsize)
+            self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+
+        self._record = np.zeros(1, dtype=RECORD_DTYPE)
+        self.count = 0
+
+    def write(self, timestamp, landmark_array, image_width, image_height, target=None, target_age=0.0):
+        record = self._record[0]
+        record["timestamp"] = timestamp
+        record["target_age"] = target_age
+        record["image_width"] = image_width
+        record["image_height"] = image_height
+        record["target"] = -1 if target is None else target
+
+        if landmark_array is None:
+            record["has_face"] = 0
+            record["landmarks"] = 0
+        else:
+            record["has_face"] = 1
+            record["landmarks"] = landmark_array
+
+        self._file.write(self._record.tobytes())
+        self.count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def open_recording(path):
+    with open(path, "rb") as f:
+        _read_header(f)
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count <= 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def _read_header(f):
+    magic, version, num_landmarks, record_size = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{f.name} is not a landmark recording")
+    if version != VERSION or num_landmarks != NUM_LANDMARKS or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(
+            f"Unsupported recording layout in {f.name}: "
+            f"version {version}, {num_landmarks} landmarks, {record_size} byte records"
+        )
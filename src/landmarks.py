@@ -0,0 +1,136 @@
+import numpy as np
+
+NUM_LANDMARKS = 478
+
+# A NormalizedLandmark with only x, y and z set serializes to 17 bytes:
+# 0x0a <len=15> | 0x0d <x:f32> | 0x15 <y:f32> | 0x1d <z:f32>
+_WIRE_RECORD = np.dtype([
+    ("tag", "u1"), ("length", "u1"),
+    ("x_tag", "u1"), ("x", "<f4"),
+    ("y_tag", "u1"), ("y", "<f4"),
+    ("z_tag", "u1"), ("z", "<f4"),
+])
+_WIRE_TAGS = ((0, 0x0A), (1, 0x0F), (2, 0x0D), (7, 0x15), (12, 0x1D))
+_wire_tag_cache = {}
+
+
+def landmarks_to_array(face_landmarks, out=None):
+    if isinstance(face_landmarks, np.ndarray):
+        return face_landmarks
+
+    if hasattr(face_landmarks, "SerializeToString"):
+        records = _wire_records(face_landmarks)
+        if records is not None:
+            out = _ensure_buffer(out, len(records))
+            out[:, 0] = records["x"]
+            out[:, 1] = records["y"]
+            out[:, 2] = records["z"]
+            return out
+
+    # Fallback for landmarks carrying visibility/presence or non-protobuf containers
+    points = face_landmarks.landmark
+    out = _ensure_buffer(out, len(points))
+    out[:] = [(lm.x, lm.y, lm.z) for lm in points]
+    return out
+
+
+def remap_landmarks(face_landmarks, scale_x, offset_x, scale_y, offset_y, scale_z=1.0):
+    # In place: x' = x * scale_x + offset_x, y' = y * scale_y + offset_y, z' = z * scale_z
+    records = _writable_records(face_landmarks)
+    if records is not None:
+        records["x"] = records["x"] * scale_x + offset_x
+        records["y"] = records["y"] * scale_y + offset_y
+        records["z"] = records["z"] * scale_z
+        face_landmarks.ParseFromString(records.tobytes())
+        return face_landmarks
+
+    for lm in face_landmarks.landmark:
+        lm.x = lm.x * scale_x + offset_x
+        lm.y = lm.y * scale_y + offset_y
+        lm.z = lm.z * scale_z
+    return face_landmarks
+
+
+def write_landmarks(face_landmarks, points):
+    # In place: overwrite x, y (and z if given) from an (N, 2) or (N, 3) array
+    records = _writable_records(face_landmarks)
+    if records is not None and len(records) == len(points):
+        records["x"] = points[:, 0]
+        records["y"] = points[:, 1]
+        if points.shape[1] > 2:
+            records["z"] = points[:, 2]
+        face_landmarks.ParseFromString(records.tobytes())
+        return face_landmarks
+
+    for lm, point in zip(face_landmarks.landmark, points.tolist()):
+        lm.x, lm.y = point[0], point[1]
+        if len(point) > 2:
+            lm.z = point[2]
+    return face_landmarks
+
+
+def array_to_landmarks(points, landmark_list):
+    # Fill an empty NormalizedLandmarkList from an (N, 3) array in one parse
+    records = np.empty(len(points), dtype=_WIRE_RECORD)
+    records["tag"] = 0x0A
+    records["length"] = 0x0F
+    records["x_tag"] = 0x0D
+    records["y_tag"] = 0x15
+    records["z_tag"] = 0x1D
+    records["x"] = points[:, 0]
+    records["y"] = points[:, 1]
+    records["z"] = points[:, 2]
+    landmark_list.ParseFromString(records.tobytes())
+    return landmark_list
+
+
+class FaceMeshResults:
+    # Stand-in for MediaPipe's results when landmarks are produced outside FaceMesh
+    def __init__(self, multi_face_landmarks=None):
+        self.multi_face_landmarks = multi_face_landmarks or None
+
+
+def landmark_xy(landmark):
+    if isinstance(landmark, np.ndarray):
+        return landmark[0].item(), landmark[1].item()
+    return landmark.x, landmark.y
+
+
+def truncate(value):
+    # int() for Python numbers, np.trunc for arrays, so the geometry checks share
+    # one formula between single faces and batches
+    if isinstance(value, np.ndarray):
+        return np.trunc(value)
+    return int(value)
+
+
+def _writable_records(face_landmarks):
+    records = _wire_records(face_landmarks)
+    return None if records is None else records.copy()
+
+
+def _wire_records(face_landmarks):
+    # The serialized list viewed as _WIRE_RECORDs, or None if it is laid out in any
+    # other way (other fields set, a different encoding after a protobuf upgrade),
+    # in which case callers go through the landmark attributes instead
+    buffer = face_landmarks.SerializeToString()
+    count, remainder = divmod(len(buffer), _WIRE_RECORD.itemsize)
+    if not count or remainder or count != len(face_landmarks.landmark) or not _has_wire_layout(buffer, count):
+        return None
+    return np.frombuffer(buffer, dtype=_WIRE_RECORD)
+
+
+def _has_wire_layout(buffer, count):
+    expected = _wire_tag_cache.get(count)
+    if expected is None:
+        expected = [(offset, bytes([tag]) * count) for offset, tag in _WIRE_TAGS]
+        _wire_tag_cache[count] = expected
+
+    stride = _WIRE_RECORD.itemsize
+    return all(buffer[offset::stride] == tags for offset, tags in expected)
+
+
+def _ensure_buffer(out, count):
+    if out is None or out.shape != (count, 3):
+        return np.empty((count, 3), dtype=np.float32)
+    return out
@@ -0,0 +1,164 @@
+import math
+
+import cv2
+import numpy as np
+
+
+class LatencyHistogram:
+    # Log-spaced buckets: constant memory, ~2% relative error on quantiles with
+    # the defaults, and histograms with the same layout can be merged.
+    def __init__(self, min_ms=0.01, max_ms=100000.0, buckets_per_decade=50):
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.buckets_per_decade = buckets_per_decade
+
+        self._log_min = math.log10(min_ms)
+        num_buckets = int(math.ceil((math.log10(max_ms) - self._log_min) * buckets_per_decade))
+        self.counts = np.zeros(num_buckets, dtype=np.int64)
+        # Geometric centre of every bucket
+        self._centers = 10 ** (self._log_min + (np.arange(num_buckets) + 0.5) / buckets_per_decade)
+
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        if value <= self.min_ms:
+            index = 0
+        else:
+            index = min(int((math.log10(value) - self._log_min) * self.buckets_per_decade), len(self.counts) - 1)
+        self.counts[index] += 1
+
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantiles(self, qs):
+        if not self.count:
+            return [None for _ in qs]
+        cumulative = np.cumsum(self.counts)
+        ranks = np.ceil(np.asarray(qs) * self.count).clip(1, self.count)
+        indices = np.searchsorted(cumulative, ranks)
+        # Exact extremes are known, keep estimates inside them
+        return [float(min(max(self._centers[i], self.min), self.max)) for i in indices]
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def merge(self, other):
+        if len(other.counts) != len(self.counts) or other.min_ms != self.min_ms:
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+        self.counts += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def summary(self):
+        if not self.count:
+            return None
+        p50, p95, p99 = self.quantiles([0.50, 0.95, 0.99])
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "avg": self.total / self.count,
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+        }
+
+
+class RingBuffer:
+    def __init__(self, capacity, num_fields):
+        self.capacity = capacity
+        self._data = np.zeros((capacity, num_fields), dtype=np.float64)
+        self._next = 0
+        self.total = 0
+
+    def append(self, row):
+        self._data[self._next] = row
+        self._next = (self._next + 1) % self.capacity
+        self.total += 1
+
+    def values(self):
+        # Oldest first
+        if self.total < self.capacity:
+            return self._data[:self.total]
+        return np.roll(self._data, -self._next, axis=0)
+
+
+class LatencyStats:
+    # Histograms cover the whole session; the ring buffer keeps the last
+    # recent_samples frames so the overlay follows the current load.
+    def __init__(self, stages, recent_samples=1000):
+        self.stages = list(stages)
+        self.histograms = {stage: LatencyHistogram() for stage in self.stages}
+        self.recent = RingBuffer(recent_samples, len(self.stages) + 1)
+        self._row = np.zeros(len(self.stages) + 1, dtype=np.float64)
+        self.count = 0
+
+        self._overlay_lines = []
+        self._overlay_updated = 0.0
+
+    def record(self, timestamp, values):
+        self._row[0] = timestamp
+        for i, stage in enumerate(self.stages, start=1):
+            value = values.get(stage, 0.0)
+            self._row[i] = value
+            # Stages that did not run this frame report 0 and are left out
+            if value > 0:
+                self.histograms[stage].add(value)
+        self.recent.append(self._row)
+        self.count += 1
+
+    def percentiles(self, stage, qs=(0.50, 0.95, 0.99)):
+        return self.histograms[stage].quantiles(qs)
+
+    def recent_percentiles(self, stage, qs=(0.50, 0.95, 0.99)):
+        # Exact percentiles over the frames still in the ring buffer
+        values = self.recent.values()[:, self.stages.index(stage) + 1]
+        values = values[values > 0]
+        if not len(values):
+            return [None for _ in qs]
+        return np.percentile(values, np.multiply(qs, 100)).tolist()
+
+    def merge(self, other):
+        for stage in self.stages:
+            self.histograms[stage].merge(other.histograms[stage])
+        self.count += other.count
+        return self
+
+    def summary(self):
+        stats = {}
+        for stage in self.stages:
+            stage_summary = self.histograms[stage].summary()
+            if stage_summary:
+                stats[stage] = stage_summary
+        return stats
+
+    def overlay_rect(self, origin=(20, 40)):
+        x, y = origin
+        return (x - 10, y - 25, x + 640, y + 25 * (len(self.stages) - 1) + 10)
+
+    def draw_overlay(self, frame, now, refresh_interval=0.5, origin=(20, 40)):
+        if now - self._overlay_updated >= refresh_interval:
+            self._overlay_lines = []
+            for stage in self.stages:
+                p50, p95, p99 = self.recent_percentiles(stage)
+                if p50 is not None:
+                    self._overlay_lines.append(
+                        f"{stage[:-3]:<11} p50 {p50:6.1f}  p95 {p95:6.1f}  p99 {p99:6.1f} ms"
+                    )
+            self._overlay_updated = now
+
+        x, y = origin
+        for line in self._overlay_lines:
+            cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 1, cv2.LINE_AA)
+            y += 25
+        return frame
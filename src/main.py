@@ -1,346 +1,425 @@
+import argparse
 import cv2
 import sys
 import os
 import time
-import random
-import json
 import numpy as np
-from datetime import datetime
-from screeninfo import get_monitors
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from face_mesh_detector import FaceMeshDetector
+from face_mesh_worker import WorkerPipeline
+from keyframe_detector import KeyframeFaceMeshDetector
 from distance_estimator import DistanceEstimator
 from head_controller import HeadController
-from message_service import MessageService
 from user_interface import UserInterface
 from gaze_predictor import GazePredictor
-
-def load_gallery_images(width, height):
-    images = []
-
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    gallery_dir = os.path.join(base_dir, "gallery")
-    
-    if os.path.exists(gallery_dir):
-        valid_extensions = ('.jpg', '.jpeg', '.png', '.bmp')
-        file_list = sorted([f for f in os.listdir(gallery_dir) if f.lower().endswith(valid_extensions)])
-        
-        for filename in file_list:
-            filepath = os.path.join(gallery_dir, filename)
-            img = cv2.imread(filepath)
-            if img is not None:
-                img = cv2.resize(img, (width, height))
-                images.append(img)
-                print(f"Loaded {filename}")
-
-    if not images:
-        print("Warning: No images found in 'gallery' folder.")
-
-    return images
-
-def main():
-    detector = FaceMeshDetector()
-    estimator = DistanceEstimator()
-    head_controller = HeadController(estimator)
-    ui = UserInterface()
-
-    predictor = GazePredictor(
-        model_path="src/models/gc_1x3_loso.pth", 
-        scaler_path="src/scalers/scaler_1x3_loso.pkl"
+from gaze_server import GazeClient
+from frame_pipeline import FrameProcessor, SyncPipeline, ThreadedPipeline
+from landmark_recorder import LandmarkRecorder
+from gallery_store import GalleryStore, default_gallery_dir
+from pipeline_engine import DisplaySink, NullSink, PipelineEngine, RecorderSink
+from startup import StartupOrchestrator
+import tracing
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Eye tracking demo")
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="Run capture, face mesh and prediction on separate threads",
     )
-
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Run the face mesh in a separate process fed through a shared-memory frame ring",
+    )
+    parser.add_argument(
+        "--worker-predict",
+        action="store_true",
+        help="With --worker, also run validation and gaze prediction in the worker process",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=GazePredictor.BACKENDS,
+        default="torch",
+        help="Gaze classifier runtime; 'numpy' runs without importing torch or sklearn, "
+             "'onnx' runs an exported model on ONNX Runtime",
+    )
+    parser.add_argument(
+        "--detector",
+        choices=("solutions", "tasks"),
+        default="solutions",
+        help="Face mesh runtime; 'tasks' runs the MediaPipe FaceLandmarker asynchronously in LIVE_STREAM mode",
+    )
+    parser.add_argument(
+        "--landmarker-model",
+        help="FaceLandmarker .task bundle used by --detector tasks (default src/models/face_landmarker.task)",
+    )
+    parser.add_argument(
+        "--max-faces",
+        type=int,
+        default=1,
+        help="Faces tracked per frame; all stable faces share one forward pass",
+    )
+    parser.add_argument(
+        "--model",
+        default="src/models/gc_1x3_loso.pth",
+        help="Gaze classifier checkpoint; with --backend onnx also an exported .onnx model, "
+             "which then runs without torch",
+    )
+    parser.add_argument(
+        "--scaler",
+        default="src/scalers/scaler_1x3_loso.pkl",
+        help="Feature scaler for --model (not needed for .onnx models exported with the scaler folded in)",
+    )
+    parser.add_argument(
+        "--precision",
+        choices=("float32", "float16", "bfloat16", "int8"),
+        help="Convert the torch classifier on load (converted checkpoints keep their saved precision)",
+    )
+    parser.add_argument(
+        "--gaze-server",
+        metavar="ADDRESS",
+        help="Send features to a running gaze_server.py (host:port or unix:/path) instead of loading the model",
+    )
+    parser.add_argument(
+        "--motion-epsilon",
+        type=float,
+        default=0.0,
+        help="Reuse the last prediction while the eye landmarks move less than this "
+             "fraction of the face width (0 disables)",
+    )
+    parser.add_argument(
+        "--roi-tracking",
+        action="store_true",
+        help="Run the face mesh on a downscaled crop around the previous face",
+    )
+    parser.add_argument(
+        "--keyframe-interval",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Run the face mesh every N frames and track landmarks with optical flow in between (0 or 1 disables)",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="Append every frame's landmarks, timestamp and target to a binary recording",
+    )
+    parser.add_argument(
+        "--stats-overlay",
+        action="store_true",
+        help="Show live p50/p95/p99 stage latencies in evaluation mode",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="No window and no screen lookup; frames are processed as fast as the pipeline allows",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=("evaluation", "gallery"),
+        help="Skip the mode selection screen (required with --headless)",
+    )
+    parser.add_argument(
+        "--source",
+        default="0",
+        help="Camera index or video file",
+    )
+    parser.add_argument(
+        "--max-frames",
+        type=int,
+        help="Stop after this many frames",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="Stop after this many seconds",
+    )
+    parser.add_argument(
+        "--shadow-model",
+        action="append",
+        metavar="PATH",
+        help="Candidate checkpoint scored next to the primary model in evaluation mode, can be repeated",
+    )
+    parser.add_argument(
+        "--shadow-scaler",
+        action="append",
+        metavar="PATH",
+        help="Scaler for each --shadow-model, in the same order (default: the primary scaler)",
+    )
+    parser.add_argument(
+        "--shadow-backend",
+        choices=GazePredictor.BACKENDS,
+        help="Runtime for the shadow models (default: --backend)",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Record tracing spans and write a Chrome trace (chrome://tracing, ui.perfetto.dev) to PATH at exit",
+    )
+    args = parser.parse_args()
+    if args.headless and args.mode is None:
+        parser.error("--headless needs --mode")
+    if args.model.endswith(".onnx") and args.backend != "onnx":
+        parser.error("an .onnx --model needs --backend onnx")
+    if args.shadow_scaler and len(args.shadow_scaler) != len(args.shadow_model or []):
+        parser.error("--shadow-model and --shadow-scaler must be given the same number of times")
+    return args
+
+def get_screen_size():
     try:
+        from screeninfo import get_monitors
         monitor = get_monitors()[0]
-        screen_width = monitor.width
-        screen_height = monitor.height
-
+        return monitor.width, monitor.height
     except Exception:
-        screen_width = 1920
-        screen_height = 1080
+        return 1920, 1080
+
+def init_detector(detector_options):
+    # MediaPipe is imported here, on a startup thread, so the welcome screen does not wait for it
+    from face_mesh_detector import create_detector
+
+    detector = create_detector(**detector_options)
+    # The first process() call builds MediaPipe's graph; do it on a blank frame.
+    # A keyframe wrapper is bypassed so its counters start clean.
+    mesh_detector = getattr(detector, "detector", detector)
+    mesh_detector.process(np.zeros((480, 640, 3), dtype=np.uint8))
+    return detector
+
+def init_predictor(predictor_options):
+    predictor = GazePredictor(**predictor_options)
+    if predictor.backend is not None:
+        # First forward pass pays for lazy allocations (and torch's kernel selection)
+        predictor.predict_batch(np.zeros((1, 478, 3), dtype=np.float32))
+        if predictor.gate is not None:
+            predictor.gate.reset()
+            predictor.gate.hits = predictor.gate.misses = 0
+    return predictor
+
+def init_shadow(candidate_options):
+    from shadow_evaluator import ShadowEvaluator, candidate_name
+
+    candidates = {}
+    for options in candidate_options:
+        predictor = init_predictor(options)
+        if predictor.backend is None:
+            print(f"Skipping shadow model {options['model_path']}: could not be loaded")
+            continue
+        candidates[candidate_name(options["model_path"], candidates)] = predictor
+    return ShadowEvaluator(candidates) if candidates else None
+
+def init_camera(source, width, height, set_resolution):
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if set_resolution:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if source.isdigit():
+        # Cameras take a while to deliver the first frame after opening
+        cap.read()
+    return cap
+
+def init_gallery(width, height):
+    gallery = GalleryStore(default_gallery_dir(), width, height)
+    gallery.get(0)
+    return gallery
+
+def main():
+    args = parse_args()
+    if args.trace:
+        tracing.enable()
+
+    detector_options = {
+        "detector": args.detector,
+        "landmarker_model": args.landmarker_model,
+        "max_num_faces": args.max_faces,
+        "roi_tracking": args.roi_tracking,
+        "keyframe_interval": args.keyframe_interval,
+    }
+    predictor_options = {
+        "model_path": args.model,
+        "scaler_path": args.scaler,
+        "backend": args.backend,
+        "motion_epsilon": args.motion_epsilon,
+        "precision": args.precision,
+    }
+
+    if args.headless:
+        # Only used to size rendered frames, which headless runs never produce
+        screen_width, screen_height = 1920, 1080
+    else:
+        screen_width, screen_height = get_screen_size()
 
-    cap = cv2.VideoCapture(0)
-    
+    ui = UserInterface()
     window_name = 'Eye Tracker Demo'
-    cv2.namedWindow(window_name, cv2.WND_PROP_FULLSCREEN)
-    time.sleep(0.1)
-    cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
-
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, screen_width)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, screen_height)
-    
-    welcome_screen = ui.create_welcome_screen(screen_width, screen_height)
-    cv2.imshow(window_name, welcome_screen)
-    cv2.waitKey(0)
-
-    # Mode Selection
-    mode = 0
-    selection_screen = ui.create_mode_selection_screen(screen_width, screen_height)
-    while True:
-        cv2.imshow(window_name, selection_screen)
-        key = cv2.waitKey(10) & 0xFF
-        if key == ord('1'):
-            mode = 1
-            break
-        elif key == ord('2'):
-            mode = 2
-            break
-        elif key == 27: # ESC
-            cap.release()
-            cv2.destroyAllWindows()
-            return
-
-    if mode == 1:
-        # Evaluation setup
-        start_time = time.time()
-        evaluation_started = False
-        evaluation_data = []
-        performance_data = []
-
-        target_column = None
-        last_target_change_time = 0
-        
-        while cap.isOpened():
-            success, image = cap.read()
-            if not success:
-                print("Ignoring empty camera frame.")
-                continue
-
-            # Start Latency Measurement
-            t_frame_start = time.perf_counter()
-
-            current_time = time.time()
-            if current_time - last_target_change_time > 1.0:
-                target_column = random.randint(0, 2)
-                last_target_change_time = current_time
-
-            # Measure Detection
-            t0 = time.perf_counter()
-            results = detector.process(image)
-            t_detection = time.perf_counter() - t0
-
-            is_stable = False
-            predicted_column = None
-
-            horizontal_ok, vertical_ok, distance_ok = False, False, False
-            distance = 0
-            
-            t_validation = 0
-            t_prediction = 0
-
-            if results.multi_face_landmarks:
-                for face_landmarks in results.multi_face_landmarks:
-                    # Measure Validation
-                    t0 = time.perf_counter()
-                    pixel_face_width = estimator.calculate_pixel_distance(
-                        face_landmarks.landmark[33],
-                        face_landmarks.landmark[263],
-                        image.shape[1],
-                        image.shape[0],
-                    )
-
-                    horizontal_ok, vertical_ok = head_controller.is_head_position_valid(
-                        face_landmarks.landmark,
-                        image.shape[1],
-                        image.shape[0],
-                    )
-
-                    distance_ok, distance = head_controller.is_distance_valid(pixel_face_width)
-                    t_validation = time.perf_counter() - t0
-                    
-                    if horizontal_ok and vertical_ok and distance_ok:
-                        is_stable = True
-                        # Predict Gaze
-                        # Measure Prediction
-                        t0 = time.perf_counter()
-                        predicted_column = predictor.predict(face_landmarks)
-                        t_prediction = time.perf_counter() - t0
-
-                        # Evaluation logic
-                        if not evaluation_started:
-                            if (current_time - start_time) > 30.0:
-                                evaluation_started = True
-                                print("Evaluation started.")
-                        
-                        if evaluation_started and target_column is not None and predicted_column is not None:
-                            # 500ms delay to account for reaction time
-                            if (current_time - last_target_change_time) > 0.5:
-                                evaluation_data.append({
-                                    "timestamp": current_time,
-                                    "target": target_column,
-                                    "prediction": int(predicted_column)
-                                })
-
-            # Measure UI
-            t0 = time.perf_counter()
-            if is_stable:
-                # highlight the prediction 
-                display_frame = ui.create_frame(image, highlight_column=predicted_column, target_column=target_column)
-
-            else:
-                if results.multi_face_landmarks:
-                    image = detector.draw_landmarks(image, results)
-                MessageService.display_feedback(image, horizontal_ok, vertical_ok, distance_ok, distance)
-
-                height, width, _ = image.shape
-                cv2.line(image, (width // 2, 0), (width // 2, height), (0, 255, 255), 2)
-                cv2.line(image, (0, int(height / 3)), (width, int(height / 3)), (255, 255, 0), 2)
-                display_frame = cv2.resize(image, (screen_width, screen_height))
-
-            cv2.imshow(window_name, display_frame)
-            t_ui = time.perf_counter() - t0
-            
-            # End Latency Measurement
-            t_total_latency = time.perf_counter() - t_frame_start
-            
-            performance_data.append({
-                "timestamp": current_time,
-                "detection_ms": t_detection * 1000,
-                "validation_ms": t_validation * 1000,
-                "prediction_ms": t_prediction * 1000,
-                "ui_ms": t_ui * 1000,
-                "latency_ms": t_total_latency * 1000
-            })
-            
-            if cv2.waitKey(5) & 0xFF == 27: 
+    welcome_screen = None
+    if not args.headless:
+        cv2.namedWindow(window_name, cv2.WND_PROP_FULLSCREEN)
+        time.sleep(0.1)
+        cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+        welcome_screen = ui.create_welcome_screen(screen_width, screen_height)
+        cv2.imshow(window_name, welcome_screen)
+        cv2.waitKey(1)
+
+    if args.gaze_server:
+        try:
+            predictor_options["backend"] = GazeClient(args.gaze_server)
+        except OSError as e:
+            print(f"Could not connect to gaze server at {args.gaze_server}: {e}")
+        if args.worker_predict:
+            print("--worker-predict is ignored with --gaze-server; predicting in the main process")
+            args.worker_predict = False
+
+    # Heavy components load while the user reads the welcome screen.
+    # In worker mode MediaPipe (and with --worker-predict the classifier) only load in the worker.
+    startup = StartupOrchestrator()
+    if not args.worker:
+        startup.add("detector", init_detector, detector_options)
+    if not (args.worker and args.worker_predict):
+        startup.add("predictor", init_predictor, predictor_options)
+    startup.add("camera", init_camera, args.source, screen_width, screen_height, not args.headless)
+    if args.mode != "evaluation":
+        startup.add("gallery", init_gallery, screen_width, screen_height)
+    if args.shadow_model and args.mode != "gallery":
+        scalers = args.shadow_scaler or [predictor_options["scaler_path"]] * len(args.shadow_model)
+        shadow_options = [
+            {"model_path": model_path, "scaler_path": scaler_path,
+             "backend": args.shadow_backend or args.backend}
+            for model_path, scaler_path in zip(args.shadow_model, scalers)
+        ]
+        startup.add("shadow", init_shadow, shadow_options)
+
+    mode = args.mode
+    if mode is None:
+        # Any key continues, even if loading is still going on
+        shown_pending = None
+        while True:
+            pending = startup.pending()
+            if pending != shown_pending:
+                cv2.imshow(window_name, ui.draw_loading_status(welcome_screen, pending))
+                shown_pending = pending
+            if cv2.waitKey(30) != -1:
                 break
 
-        if evaluation_data or performance_data:
-            results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Results")
-            os.makedirs(results_dir, exist_ok=True)
-            
-            timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = os.path.join(results_dir, f"experiment_{timestamp_str}.json")
-            
-            output = {}
-
-            if evaluation_data:
-                total_samples = len(evaluation_data)
-                correct_predictions = sum(1 for d in evaluation_data if d['target'] == d['prediction'])
-                accuracy = (correct_predictions / total_samples) * 100 if total_samples > 0 else 0
-                duration = evaluation_data[-1]['timestamp'] - evaluation_data[0]['timestamp'] if evaluation_data else 0
-
-                output["evaluation"] = {
-                    "summary": {
-                        "total_samples": total_samples,
-                        "accuracy_percent": round(accuracy, 2),
-                        "duration_seconds": round(duration, 2),
-                        "start_time": datetime.fromtimestamp(evaluation_data[0]['timestamp']).isoformat()
-                    },
-                    "raw_data": evaluation_data
-                }
-
-            if performance_data:
-                keys = ["detection_ms", "validation_ms", "prediction_ms", "ui_ms", "latency_ms"]
-                stats = {}
-                for k in keys:
-                    values = [d[k] for d in performance_data if d[k] > 0]
-                    if values:
-                        stats[k] = {
-                            "min": min(values),
-                            "max": max(values),
-                            "avg": sum(values) / len(values)
-                        }
-                output["efficiency"] = {
-                    "summary": stats,
-                    "raw_data": performance_data
-                }
-
-            try:
-                with open(filename, 'w') as f:
-                    json.dump(output, f, indent=4)
-                print(f"Experiment results saved to {filename}")
-            except Exception as e:
-                print(f"Failed to save results: {e}")
-
-    elif mode == 2:
-        # Gallery Mode
-        images_list = load_gallery_images(screen_width, screen_height)
-        current_idx = 0
-        dwell_time = 0.0
-        last_frame_time = time.time()
-        cooldown = 0.0
-        
-        while cap.isOpened():
-            success, image = cap.read()
-            if not success:
-               continue
-
-            current_time = time.time()
-            dt = current_time - last_frame_time
-            last_frame_time = current_time
-            
-            if cooldown > 0:
-                cooldown -= dt
-
-            results = detector.process(image)
-            is_stable = False
-            predicted_column = None
-            
-            horizontal_ok, vertical_ok, distance_ok = False, False, False
-            distance = 0
-
-            if results.multi_face_landmarks:
-                for face_landmarks in results.multi_face_landmarks:
-                    pixel_face_width = estimator.calculate_pixel_distance(
-                        face_landmarks.landmark[33], face_landmarks.landmark[263],
-                        image.shape[1], image.shape[0])
-                    horizontal_ok, vertical_ok = head_controller.is_head_position_valid(
-                        face_landmarks.landmark, image.shape[1], image.shape[0])
-                    distance_ok, distance = head_controller.is_distance_valid(pixel_face_width)
-                    
-                    if horizontal_ok and vertical_ok and distance_ok:
-                        is_stable = True
-                        predicted_column = predictor.predict(face_landmarks)
-            
-            hover_state = None
-            progress = 0.0
-            
-            if is_stable and cooldown <= 0:
-                if predicted_column == 0: 
-                    hover_state = 'prev'
-                    dwell_time += dt
-                elif predicted_column == 2: 
-                    hover_state = 'next'
-                    dwell_time += dt
-                else:
-                    dwell_time = 0.0 
-                
-                # Check thresholds
-                if dwell_time > 2.5:
-                    if hover_state == 'prev':
-                        current_idx = (current_idx - 1) % len(images_list)
-                    elif hover_state == 'next':
-                        current_idx = (current_idx + 1) % len(images_list)
-                    
-                    dwell_time = 0.0
-                    cooldown = 1.0 
-            else:
-                 dwell_time = 0.0
-
-            if dwell_time > 0:
-                progress = min(dwell_time / 2.5, 1.0)
-
-            if not is_stable:
-                 if results.multi_face_landmarks:
-                    image = detector.draw_landmarks(image, results)
-                 MessageService.display_feedback(image, horizontal_ok, vertical_ok, distance_ok, distance)
-                 
-                 height, width, _ = image.shape
-                 cv2.line(image, (width // 2, 0), (width // 2, height), (0, 255, 255), 2)
-                 cv2.line(image, (0, int(height / 3)), (width, int(height / 3)), (255, 255, 0), 2)
-                 
-                 display_frame = cv2.resize(image, (screen_width, screen_height))
-            else:
-                 display_frame = ui.create_gallery_interface(images_list[current_idx], hover_state, progress)
-            
-            cv2.imshow(window_name, display_frame)
-            if cv2.waitKey(5) & 0xFF == 27: 
+        # Mode Selection
+        selection_screen = ui.create_mode_selection_screen(screen_width, screen_height)
+        while True:
+            cv2.imshow(window_name, selection_screen)
+            key = cv2.waitKey(10) & 0xFF
+            if key == ord('1'):
+                mode = "evaluation"
+                break
+            elif key == ord('2'):
+                mode = "gallery"
                 break
+            elif key == 27: # ESC
+                components = startup.wait_all()
+                startup.shutdown()
+                components["camera"].release()
+                if "gallery" in components:
+                    components["gallery"].close()
+                cv2.destroyAllWindows()
+                return
+
+    poll = None if args.headless else (lambda: cv2.waitKey(1))
+    components = startup.wait_all(poll=poll)
+    startup.shutdown()
+    print(startup.report())
+
+    detector = components.get("detector")
+    predictor = components.get("predictor")
+    cap = components["camera"]
+    gallery = components.get("gallery")
+    shadow = components.get("shadow")
+    estimator = DistanceEstimator()
+    head_controller = HeadController(estimator)
+
+    processor = FrameProcessor(detector, estimator, head_controller, predictor, max_faces=args.max_faces)
+    stop_on_empty = not args.source.isdigit()
+    if args.worker:
+        pipeline = WorkerPipeline(
+            cap, processor, detector_options,
+            predictor_options if args.worker_predict else None,
+            stop_on_empty=stop_on_empty,
+        )
+    elif args.pipelined:
+        pipeline = ThreadedPipeline(cap, processor, stop_on_empty=stop_on_empty)
+    else:
+        pipeline = SyncPipeline(cap, processor, stop_on_empty=stop_on_empty)
+
+    from modes import EvaluationMode, GalleryMode
+    if mode == "evaluation":
+        if gallery is not None:
+            gallery.close()
+        results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Results")
+        metadata = {
+            "detector": args.detector,
+            "keyframe_interval": args.keyframe_interval,
+            "backend": "server" if args.gaze_server else args.backend,
+            "precision": args.precision,
+            "model": os.path.basename(predictor_options["model_path"]),
+            "motion_epsilon": args.motion_epsilon,
+            "pipeline": "worker" if args.worker else "threaded" if args.pipelined else "sync",
+            "source": args.source,
+            "shadow_models": sorted(shadow.names) if shadow is not None else [],
+        }
+        app_mode = EvaluationMode(
+            ui, screen_width, screen_height, results_dir, stats_overlay=args.stats_overlay, metadata=metadata,
+            shadow=shadow,
+        )
+    else:
+        if shadow is not None:
+            print("Shadow models only run in evaluation mode")
+            shadow.close(wait=False)
+        app_mode = GalleryMode(ui, screen_width, screen_height, default_gallery_dir(), gallery=gallery)
+
+    sinks = [NullSink() if args.headless else DisplaySink(window_name)]
+    recorder = LandmarkRecorder(args.record) if args.record else None
+    if recorder is not None:
+        sinks.insert(0, RecorderSink(recorder))
+
+    engine = PipelineEngine(pipeline, app_mode, sinks)
+    t_start = time.perf_counter()
+
+    def report_first_prediction(packet):
+        if packet.predicted_column is not None:
+            print(f"First prediction {(time.perf_counter() - t_start) * 1000:.0f} ms after start")
+            engine.hooks["packet"].remove(report_first_prediction)
+    engine.add_hook("packet", report_first_prediction)
+
+    frames = engine.run(max_frames=args.max_frames, duration=args.duration)
+    elapsed = time.perf_counter() - t_start
+    if args.headless and elapsed > 0:
+        print(f"Processed {frames} frames in {elapsed:.1f}s ({frames / elapsed:.1f} fps)")
+
+    if isinstance(detector, KeyframeFaceMeshDetector):
+        stats = detector.stats()
+        drift = stats["mean_drift_px"]
+        drift_str = f"{drift:.1f}px" if drift is not None else "n/a"
+        print(f"Face mesh keyframes: {stats['keyframes']}, propagated frames: {stats['propagated_frames']}, "
+              f"mean drift: {drift_str}")
+
+    if predictor is not None and predictor.gate is not None and predictor.gate.hit_rate is not None:
+        print(f"Prediction gate: {predictor.gate.hits} reused, {predictor.gate.misses} evaluated "
+              f"({predictor.gate.hit_rate * 100:.1f}% hit rate)")
+
+    if recorder is not None:
+        print(f"Recorded {recorder.count} frames to {args.record}")
+
+    if args.trace:
+        if args.worker:
+            print("Face mesh spans from the worker process are not included in the trace")
+        events = tracing.export_chrome_trace(args.trace)
+        print(f"Wrote {events} trace events to {args.trace}")
+
+    # The Tasks FaceLandmarker owns a MediaPipe runner that has to be closed
+    mesh_detector = getattr(detector, "detector", detector)
+    close = getattr(mesh_detector, "close", None)
+    if close is not None:
+        close()
 
     cap.release()
-    cv2.destroyAllWindows()
+    if not args.headless:
+        cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,223 @@
+import random
+import time
+
+import cv2
+from face_mesh_detector import draw_face_landmarks
+from gallery_store import GalleryStore
+from message_service import MessageService
+from results_writer import SessionLog
+from session_store import SessionStore, default_store_dir
+
+
+class Mode:
+    # Plugin interface for PipelineEngine: update() runs for every packet,
+    # render() only when a display sink wants a frame.
+    def __init__(self, ui, screen_width, screen_height):
+        self.ui = ui
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+
+    def start(self):
+        pass
+
+    def update(self, packet):
+        pass
+
+    def render(self, packet):
+        return self.render_feedback(packet)
+
+    def after_frame(self, packet):
+        pass
+
+    def recording_target(self, packet):
+        return None, 0.0
+
+    def finish(self):
+        pass
+
+    def render_feedback(self, packet):
+        # Camera view with alignment guides, shown until the head position is stable
+        image = packet.image
+        results = packet.results
+        if results is not None and results.multi_face_landmarks:
+            image = draw_face_landmarks(image, results)
+        MessageService.display_feedback(
+            image, packet.horizontal_ok, packet.vertical_ok, packet.distance_ok, packet.distance
+        )
+
+        height, width, _ = image.shape
+        cv2.line(image, (width // 2, 0), (width // 2, height), (0, 255, 255), 2)
+        cv2.line(image, (0, int(height / 3)), (width, int(height / 3)), (255, 255, 0), 2)
+        return cv2.resize(image, (self.screen_width, self.screen_height))
+
+
+class EvaluationMode(Mode):
+    def __init__(self, ui, screen_width, screen_height, results_dir, stats_overlay=False,
+                 warmup_s=30.0, target_interval_s=1.0, reaction_delay_s=0.5, metadata=None, shadow=None):
+        super().__init__(ui, screen_width, screen_height)
+        self.results_dir = results_dir
+        self.metadata = metadata
+        # ShadowEvaluator scoring candidate models on the same features
+        self.shadow = shadow
+        self.stats_overlay = stats_overlay
+        self.warmup_s = warmup_s
+        self.target_interval_s = target_interval_s
+        self.reaction_delay_s = reaction_delay_s
+
+        self.session_log = None
+        self.performance_stats = None
+        self.summary_path = None
+
+        self.start_time = None
+        self.evaluation_started = False
+        self.target_column = None
+        self.last_target_change_time = 0
+
+    def start(self):
+        self.start_time = time.time()
+        self.session_log = SessionLog(
+            self.results_dir, reaction_delay_s=self.reaction_delay_s, metadata=self.metadata,
+        )
+        self.performance_stats = self.session_log.summary.performance
+
+    def update(self, packet):
+        if self.shadow is not None:
+            self.log_shadow_results(self.shadow.drain())
+
+        current_time = packet.timestamp
+        if current_time - self.last_target_change_time > self.target_interval_s:
+            self.target_column = random.randint(0, 2)
+            self.last_target_change_time = current_time
+
+        if not packet.is_stable:
+            return
+
+        if not self.evaluation_started:
+            if (current_time - self.start_time) > self.warmup_s:
+                self.evaluation_started = True
+                print("Evaluation started.")
+
+        if self.evaluation_started and self.target_column is not None and packet.predicted_column is not None:
+            # Every sample is logged with its target age; the summary leaves out the ones
+            # within the reaction delay, analytics can sweep other delays
+            target_age = current_time - self.last_target_change_time
+            self.session_log.log_evaluation(current_time, self.target_column, int(packet.predicted_column), target_age)
+
+            if self.shadow is not None and packet.features is not None:
+                self.shadow.submit(packet.features[:1], (current_time, self.target_column, target_age))
+
+    def log_shadow_results(self, results):
+        for name, predictions, _, latency_ms, (timestamp, target, target_age) in results:
+            self.session_log.log_shadow(timestamp, name, target, int(predictions[0]), target_age, latency_ms)
+
+    def render(self, packet):
+        if packet.is_stable:
+            # highlight the prediction
+            # (the overlay draws into the cached frame, so its area is marked dirty)
+            dirty_regions = [self.performance_stats.overlay_rect()] if self.stats_overlay else None
+            display_frame = self.ui.create_frame(
+                packet.image, highlight_column=packet.predicted_column, target_column=self.target_column,
+                dirty_regions=dirty_regions,
+            )
+        else:
+            display_frame = self.render_feedback(packet)
+
+        if self.stats_overlay:
+            self.performance_stats.draw_overlay(display_frame, packet.timestamp)
+        return display_frame
+
+    def after_frame(self, packet):
+        timings = packet.timings
+        self.session_log.log_performance(packet.timestamp, {
+            "detection_ms": timings["detection_ms"],
+            "validation_ms": timings["validation_ms"],
+            "prediction_ms": timings["prediction_ms"],
+            "ui_ms": timings["ui_ms"],
+            "latency_ms": timings["latency_ms"],
+        })
+
+    def recording_target(self, packet):
+        return self.target_column, packet.timestamp - self.last_target_change_time
+
+    def finish(self):
+        if self.shadow is not None:
+            self.log_shadow_results(self.shadow.close())
+            for name, stats in self.shadow.stats().items():
+                print(f"Shadow model {name}: {stats['submitted']} frames scored, {stats['skipped']} skipped while busy")
+        self.summary_path = self.session_log.close()
+        if self.summary_path and self.session_log.error is not None:
+            print(f"Experiment results saved to {self.summary_path} (raw data in {self.session_log.log_path} "
+                  f"is incomplete, not added to the session store)")
+        elif self.summary_path:
+            print(f"Experiment results saved to {self.summary_path} (raw data in {self.session_log.log_path})")
+            try:
+                SessionStore(default_store_dir(self.results_dir)).import_file(self.session_log.log_path)
+            except (OSError, ValueError) as e:
+                print(f"Failed to add the session to the session store: {e}")
+
+
+class GalleryMode(Mode):
+    def __init__(self, ui, screen_width, screen_height, gallery_dir, dwell_s=2.5, cooldown_s=1.0, gallery=None):
+        super().__init__(ui, screen_width, screen_height)
+        self.gallery_dir = gallery_dir
+        self.dwell_s = dwell_s
+        self.cooldown_s = cooldown_s
+
+        # May be handed in already warm from startup
+        self.gallery = gallery
+        self.current_idx = 0
+        self.dwell_time = 0.0
+        self.last_frame_time = None
+        self.cooldown = 0.0
+        self.hover_state = None
+        self.progress = 0.0
+
+    def start(self):
+        if self.gallery is None:
+            self.gallery = GalleryStore(self.gallery_dir, self.screen_width, self.screen_height)
+        self.last_frame_time = time.time()
+
+    def update(self, packet):
+        current_time = packet.timestamp
+        dt = current_time - self.last_frame_time
+        self.last_frame_time = current_time
+
+        if self.cooldown > 0:
+            self.cooldown -= dt
+
+        predicted_column = packet.predicted_column
+        self.hover_state = None
+        self.progress = 0.0
+
+        if packet.is_stable and self.cooldown <= 0:
+            if predicted_column == 0:
+                self.hover_state = 'prev'
+                self.dwell_time += dt
+            elif predicted_column == 2:
+                self.hover_state = 'next'
+                self.dwell_time += dt
+            else:
+                self.dwell_time = 0.0
+
+            # Check thresholds
+            if self.dwell_time > self.dwell_s:
+                if self.hover_state == 'prev':
+                    self.current_idx = (self.current_idx - 1) % len(self.gallery)
+                elif self.hover_state == 'next':
+                    self.current_idx = (self.current_idx + 1) % len(self.gallery)
+
+                self.dwell_time = 0.0
+                self.cooldown = self.cooldown_s
+        else:
+            self.dwell_time = 0.0
+
+        if self.dwell_time > 0:
+            self.progress = min(self.dwell_time / self.dwell_s, 1.0)
+
+    def render(self, packet):
+        if not packet.is_stable:
+            return self.render_feedback(packet)
+        return self.ui.create_gallery_interface(self.gallery.get(self.current_idx), self.hover_state, self.progress)
+
+    def finish(self):
+        self.gallery.close()
@@ -0,0 +1,209 @@
+import argparse
+import hashlib
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+class NumpyGazeEngine:
+    # GazeClassifier forward pass in float32 NumPy with the scaler folded into
+    # the first Linear layer. Only needs torch/sklearn when (re)exporting weights.
+    def __init__(self, layers):
+        self.layers = []
+        for kind, params in layers:
+            if kind == 'layernorm':
+                gamma, beta, eps = params[:3]
+                average = np.full((len(gamma), 1), 1.0 / len(gamma), dtype=np.float32)
+                params = (gamma, beta, np.float32(eps), average)
+            self.layers.append((kind, params))
+
+        linears = [params for kind, params in layers if kind == 'linear']
+        self.input_dim = linears[0][0].shape[0]
+        self.num_classes = linears[-1][0].shape[1]
+
+    @classmethod
+    def from_torch(cls, model, scaler):
+        layers = []
+        folded = False
+        for module in model.model:
+            kind = type(module).__name__
+            if kind == 'Linear':
+                weight = module.weight.detach().cpu().double().numpy()
+                bias = module.bias.detach().cpu().double().numpy()
+                if not folded:
+                    weight, bias = fold_scaler(weight, bias, scaler)
+                    folded = True
+                layers.append(('linear', (
+                    np.ascontiguousarray(weight.T, dtype=np.float32),
+                    bias.astype(np.float32),
+                )))
+            elif kind == 'LayerNorm':
+                layers.append(('layernorm', (
+                    module.weight.detach().cpu().numpy().astype(np.float32),
+                    module.bias.detach().cpu().numpy().astype(np.float32),
+                    np.float32(module.eps),
+                )))
+            elif kind == 'SiLU':
+                layers.append(('silu', ()))
+            elif kind == 'Dropout':
+                continue
+            else:
+                raise ValueError(f"Unsupported layer in GazeClassifier: {kind}")
+
+        return cls(layers)
+
+    @classmethod
+    def from_checkpoint(cls, model_path, scaler_path, input_dim=246, cache_path=None):
+        if cache_path is None:
+            cache_path = default_cache_path(model_path, scaler_path)
+
+        signature = source_signature(model_path, scaler_path)
+        engine = None
+        if os.path.exists(cache_path):
+            engine, cached_signature = cls.load(cache_path)
+            # Deployments may ship only the exported weights
+            if signature is None or signature == cached_signature:
+                return engine
+            print(f"Exported weights in {cache_path} are stale, re-exporting.")
+
+        try:
+            from torch_gaze_backend import TorchGazeBackend
+        except ImportError as e:
+            if engine is None:
+                raise
+            print(f"Cannot re-export without torch ({e}), using the existing weights in {cache_path}")
+            return engine
+
+        backend = TorchGazeBackend(model_path, scaler_path, input_dim)
+        if not backend.ready:
+            raise RuntimeError(f"Could not load {model_path} / {scaler_path}")
+        if backend.precision != 'float32':
+            raise RuntimeError(f"The numpy engine needs a float32 checkpoint, {model_path} is {backend.precision}")
+
+        engine = cls.from_torch(backend.model, backend.scaler)
+        try:
+            engine.save(cache_path, signature or "")
+            print(f"Exported numpy gaze engine weights to {cache_path}")
+        except OSError as e:
+            print(f"Failed to save exported weights: {e}")
+        return engine
+
+    @classmethod
+    def load(cls, path):
+        layers = []
+        with np.load(path, allow_pickle=False) as data:
+            for i, kind in enumerate(data['ops'].tolist()):
+                if kind == 'linear':
+                    params = (data[f'p{i}_weight'], data[f'p{i}_bias'])
+                elif kind == 'layernorm':
+                    params = (data[f'p{i}_weight'], data[f'p{i}_bias'], data[f'p{i}_eps'][()])
+                else:
+                    params = ()
+                layers.append((kind, params))
+            signature = str(data['source'])
+        return cls(layers), signature
+
+    def save(self, path, signature=""):
+        arrays = {'ops': np.array([kind for kind, _ in self.layers]), 'source': np.array(signature)}
+        for i, (kind, params) in enumerate(self.layers):
+            if kind in ('linear', 'layernorm'):
+                arrays[f'p{i}_weight'] = params[0]
+                arrays[f'p{i}_bias'] = params[1]
+            if kind == 'layernorm':
+                arrays[f'p{i}_eps'] = params[2]
+        np.savez(path, **arrays)
+
+    def forward(self, features):
+        x = np.asarray(features, dtype=np.float32)
+        for kind, params in self.layers:
+            if kind == 'linear':
+                weight_t, bias = params
+                x = x @ weight_t
+                x += bias
+            elif kind == 'layernorm':
+                gamma, beta, eps, average = params
+                # Row means as a matmul, np.mean has noticeable per-call overhead
+                x = x - x @ average
+                variance = (x * x) @ average
+                variance += eps
+                x /= np.sqrt(variance)
+                x *= gamma
+                x += beta
+            elif kind == 'silu':
+                x = x / (1.0 + np.exp(-x))
+        return x
+
+
+def fold_scaler(weight, bias, scaler):
+    # Folds the scaler into the first Linear layer (float64 weight (out, in) and bias):
+    # W((x - c) / s) + b == (W / s)x + (b - (W / s)c)
+    center = getattr(scaler, 'center_', None)
+    if center is None:
+        center = getattr(scaler, 'mean_', None)
+    scale = getattr(scaler, 'scale_', None)
+
+    if scale is not None:
+        weight = weight / np.asarray(scale, dtype=np.float64)[None, :]
+    if center is not None:
+        bias = bias - weight @ np.asarray(center, dtype=np.float64)
+    return weight, bias
+
+
+def default_cache_path(model_path, scaler_path):
+    model_stem = os.path.splitext(model_path)[0]
+    scaler_stem = os.path.splitext(os.path.basename(scaler_path))[0]
+    return f"{model_stem}.{scaler_stem}.npz"
+
+
+def source_signature(*paths):
+    # Content hashes, so copies and checkouts (new mtimes) keep exported files valid
+    parts = []
+    for path in paths:
+        if not os.path.exists(path):
+            return None
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        parts.append(f"{os.path.basename(path)}:{digest.hexdigest()}")
+    return "|".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export GazeClassifier weights for the numpy engine")
+    parser.add_argument("--model", default="src/models/gc_1x3_loso.pth")
+    parser.add_argument("--scaler", default="src/scalers/scaler_1x3_loso.pkl")
+    parser.add_argument("--output", default=None, help="Defaults to <model>.<scaler>.npz next to the model")
+    parser.add_argument("--samples", type=int, default=1000, help="Random samples for the parity check")
+    args = parser.parse_args()
+
+    from torch_gaze_backend import TorchGazeBackend
+
+    output = args.output or default_cache_path(args.model, args.scaler)
+    backend = TorchGazeBackend(args.model, args.scaler, input_dim=246)
+    if not backend.ready:
+        return 1
+
+    engine = NumpyGazeEngine.from_torch(backend.model, backend.scaler)
+    engine.save(output, source_signature(args.model, args.scaler) or "")
+    print(f"Saved {output}")
+
+    # Parity check around the scaler's operating range
+    center = getattr(backend.scaler, 'center_', getattr(backend.scaler, 'mean_', 0.0))
+    scale = getattr(backend.scaler, 'scale_', 1.0)
+    rng = np.random.default_rng(0)
+    features = (center + rng.standard_normal((args.samples, engine.input_dim)) * scale).astype(np.float32)
+
+    reference = backend.forward(features)
+    outputs = engine.forward(features)
+    agreement = np.mean(reference.argmax(axis=1) == outputs.argmax(axis=1)) * 100
+    print(f"Max abs logit difference: {np.abs(reference - outputs).max():.2e}")
+    print(f"Class agreement: {agreement:.2f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
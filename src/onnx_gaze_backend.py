@@ -0,0 +1,276 @@
+import argparse
+import copy
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from numpy_gaze_engine import fold_scaler, source_signature
+
+INPUT_NAME = "features"
+OUTPUT_NAME = "logits"
+# A single-row MLP is fastest without intra-op parallelism
+DEFAULT_THREADS = 1
+INSTALL_HINT = "install the onnx extra: poetry install -E onnx"
+
+
+def default_onnx_path(model_path, scaler_path, fold_scaler=True):
+    model_stem = os.path.splitext(model_path)[0]
+    if not fold_scaler:
+        return f"{model_stem}.onnx"
+    scaler_stem = os.path.splitext(os.path.basename(scaler_path))[0]
+    return f"{model_stem}.{scaler_stem}.onnx"
+
+
+def fold_scaler_into_model(model, scaler):
+    # Same folding as the numpy engine, on a copy of the model
+    import torch
+
+    model = copy.deepcopy(model)
+    first = next(module for module in model.model if type(module).__name__ == 'Linear')
+    weight, bias = fold_scaler(
+        first.weight.detach().cpu().double().numpy(), first.bias.detach().cpu().double().numpy(), scaler,
+    )
+    with torch.no_grad():
+        first.weight.copy_(torch.from_numpy(weight))
+        first.bias.copy_(torch.from_numpy(bias))
+    return model
+
+
+def export_onnx(model, scaler, path, fold_scaler=True, signature="", opset=17):
+    # Needs torch and onnx; running the exported model only needs onnxruntime
+    try:
+        import onnx
+    except ImportError as e:
+        raise ImportError(f"Exporting to ONNX needs the onnx package ({INSTALL_HINT})") from e
+    import torch
+
+    if fold_scaler:
+        model = fold_scaler_into_model(model, scaler)
+    model.eval()
+
+    example = torch.zeros((1, model.input_features), dtype=torch.float32)
+    torch.onnx.export(
+        model, example, path,
+        input_names=[INPUT_NAME], output_names=[OUTPUT_NAME],
+        dynamic_axes={INPUT_NAME: {0: "batch"}, OUTPUT_NAME: {0: "batch"}},
+        opset_version=opset, dynamo=False,
+    )
+
+    exported = onnx.load(path)
+    onnx.helper.set_model_props(exported, {
+        "scaler_folded": "1" if fold_scaler else "0",
+        "num_classes": str(model.num_classes),
+        "source": signature,
+    })
+    onnx.save(exported, path)
+
+
+class OnnxGazeBackend:
+    # GazeClassifier on ONNX Runtime's CPU execution provider. With io_binding, small
+    # batch sizes get input/output buffers that are bound once and reused.
+    def __init__(self, model_path, scaler_path, input_dim, threads=DEFAULT_THREADS, io_binding=True, onnx_path=None):
+        self.session = None
+        self.scaler = None
+        self.num_classes = None
+        self.io_binding = io_binding
+        self._bindings = {}
+        self._lock = threading.Lock()
+
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            print(f"onnxruntime is not installed ({INSTALL_HINT})")
+            return
+
+        if model_path.endswith(".onnx"):
+            onnx_path = model_path
+        elif onnx_path is None:
+            onnx_path = self._exported_path(model_path, scaler_path, input_dim)
+            if onnx_path is None:
+                return
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        try:
+            self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        except Exception as e:
+            print(f"Error loading ONNX model {onnx_path}: {e}")
+            return
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.num_classes = int(metadata.get("num_classes", self.session.get_outputs()[0].shape[1]))
+        expected_dim = self.session.get_inputs()[0].shape[1]
+        if expected_dim != input_dim:
+            print(f"ONNX model expects {expected_dim} features, got {input_dim}")
+            self.session = None
+            return
+
+        if metadata.get("scaler_folded") != "1":
+            import joblib
+            try:
+                self.scaler = joblib.load(scaler_path)
+            except Exception as e:
+                print(f"Error loading scaler: {e}")
+                self.session = None
+                return
+
+        print(f"ONNX Runtime gaze backend loaded from {onnx_path} ({threads} intra-op threads)")
+
+    @staticmethod
+    def _exported_path(model_path, scaler_path, input_dim):
+        # Re-exports when the checkpoint or scaler changed, like the numpy engine
+        onnx_path = default_onnx_path(model_path, scaler_path)
+        signature = source_signature(model_path, scaler_path)
+        exists = os.path.exists(onnx_path)
+        if exists:
+            import onnxruntime as ort
+            try:
+                session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+                cached_signature = session.get_modelmeta().custom_metadata_map.get("source")
+            except Exception:
+                cached_signature = None
+            # Deployments may ship only the exported model
+            if signature is None or signature == cached_signature:
+                return onnx_path
+            print(f"Exported ONNX model {onnx_path} is stale, re-exporting.")
+
+        try:
+            from torch_gaze_backend import TorchGazeBackend
+        except ImportError as e:
+            if not exists:
+                print(f"Cannot export {model_path} to ONNX without torch ({e})")
+                return None
+            print(f"Cannot re-export without torch ({e}), using the existing model in {onnx_path}")
+            return onnx_path
+
+        try:
+            backend = TorchGazeBackend(model_path, scaler_path, input_dim)
+            if not backend.ready:
+                return None
+            if backend.precision != 'float32':
+                print(f"ONNX export needs a float32 checkpoint, {model_path} is {backend.precision}")
+                return None
+            export_onnx(backend.model, backend.scaler, onnx_path, signature=signature or "")
+        except Exception as e:
+            print(f"Failed to export {model_path} to ONNX: {e}")
+            return None
+        print(f"Exported ONNX model to {onnx_path}")
+        return onnx_path
+
+    @property
+    def ready(self):
+        return self.session is not None
+
+    def forward(self, features):
+        if self.scaler is not None:
+            features = self.scaler.transform(features)
+        features = np.ascontiguousarray(features, dtype=np.float32)
+
+        rows = len(features)
+        # Larger batches are rare (multi-face, replay) and not worth pinned buffers
+        if not self.io_binding or rows > 16:
+            return self.session.run([OUTPUT_NAME], {INPUT_NAME: features})[0]
+
+        # The bound buffers are shared, e.g. by the gaze server's executor threads
+        with self._lock:
+            bound = self._bindings.get(rows)
+            if bound is None:
+                bound = self._bind(rows)
+            binding, input_buffer, output_buffer = bound
+            input_buffer[...] = features
+            self.session.run_with_iobinding(binding)
+            return output_buffer.copy()
+
+    def _bind(self, rows):
+        input_buffer = np.empty((rows, self.session.get_inputs()[0].shape[1]), dtype=np.float32)
+        output_buffer = np.empty((rows, self.num_classes), dtype=np.float32)
+        binding = self.session.io_binding()
+        binding.bind_input(INPUT_NAME, "cpu", 0, np.float32, input_buffer.shape, input_buffer.ctypes.data)
+        binding.bind_output(OUTPUT_NAME, "cpu", 0, np.float32, output_buffer.shape, output_buffer.ctypes.data)
+        self._bindings[rows] = (binding, input_buffer, output_buffer)
+        return self._bindings[rows]
+
+
+def measure_latency(backend, features, samples):
+    from latency_stats import LatencyHistogram
+
+    histogram = LatencyHistogram()
+    for i in range(samples):
+        row = features[i % len(features)][None]
+        t0 = time.perf_counter()
+        backend.forward(row)
+        histogram.add((time.perf_counter() - t0) * 1000)
+    return histogram.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export GazeClassifier to ONNX and check it against torch")
+    parser.add_argument("--model", default="src/models/gc_1x3_loso.pth")
+    parser.add_argument("--scaler", default="src/scalers/scaler_1x3_loso.pkl")
+    parser.add_argument("--output", default=None, help="Defaults to <model>[.<scaler>].onnx next to the model")
+    parser.add_argument("--no-fold-scaler", action="store_true",
+                        help="Keep the scaler outside the graph (the backend then needs sklearn)")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--samples", type=int, default=1000, help="Random samples for the parity check")
+    parser.add_argument("--latency-samples", type=int, default=2000)
+    parser.add_argument("--threads", default="1,2,4", help="Comma separated intra-op thread counts to time")
+    args = parser.parse_args()
+
+    import torch
+    from torch_gaze_backend import TorchGazeBackend
+
+    fold_scaler = not args.no_fold_scaler
+    output = args.output or default_onnx_path(args.model, args.scaler, fold_scaler)
+    reference = TorchGazeBackend(args.model, args.scaler, input_dim=246, precision='float32')
+    if not reference.ready:
+        return 1
+    try:
+        export_onnx(reference.model, reference.scaler, output, fold_scaler,
+                    source_signature(args.model, args.scaler) or "", args.opset)
+    except ImportError as e:
+        print(e)
+        return 1
+    print(f"Saved {output} ({os.path.getsize(output) / 1024:.1f} KiB)")
+
+    # Parity check around the scaler's operating range, batched and row by row
+    center = getattr(reference.scaler, 'center_', getattr(reference.scaler, 'mean_', 0.0))
+    scale = getattr(reference.scaler, 'scale_', 1.0)
+    rng = np.random.default_rng(0)
+    features = (center + rng.standard_normal((args.samples, 246)) * scale).astype(np.float32)
+
+    backend = OnnxGazeBackend(args.model, args.scaler, 246, onnx_path=output)
+    if not backend.ready:
+        return 1
+    expected = reference.forward(features)
+    batched = backend.forward(features)
+    single = np.concatenate([backend.forward(row[None]) for row in features])
+    for name, outputs in (("batched", batched), ("single row", single)):
+        agreement = np.mean(expected.argmax(axis=1) == outputs.argmax(axis=1)) * 100
+        print(f"{name:<10} max abs logit difference {np.abs(expected - outputs).max():.2e}, "
+              f"class agreement {agreement:.2f}%")
+
+    torch.set_num_threads(1)
+    rows = [("torch", 1, measure_latency(reference, features, args.latency_samples))]
+    for threads in (int(value) for value in args.threads.split(",")):
+        for io_binding in (True, False):
+            variant = OnnxGazeBackend(args.model, args.scaler, 246, threads, io_binding, onnx_path=output)
+            name = "onnx+binding" if io_binding else "onnx"
+            rows.append((name, threads, measure_latency(variant, features, args.latency_samples)))
+
+    print("Single-row latency:")
+    for name, threads, summary in rows:
+        print(f"  {name:<13} {threads} threads  p50 {summary['p50'] * 1000:7.1f} us  "
+              f"p99 {summary['p99'] * 1000:7.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import time
+
+import cv2
+import tracing
+
+
+class PipelineEngine:
+    # Drives a pipeline (SyncPipeline, ThreadedPipeline or WorkerPipeline) for one
+    # mode and fans every packet out to the sinks. Hooks run at fixed points:
+    #   "packet" - after the mode updated its state, before any sink
+    #   "frame"  - after the sinks, once ui_ms and latency_ms are in packet.timings
+    HOOK_STAGES = ("packet", "frame")
+
+    def __init__(self, pipeline, mode, sinks=()):
+        self.pipeline = pipeline
+        self.mode = mode
+        self.sinks = list(sinks)
+        self.hooks = {stage: [] for stage in self.HOOK_STAGES}
+        self.frames = 0
+        self._stopped = False
+
+    def add_hook(self, stage, hook):
+        self.hooks[stage].append(hook)
+        return hook
+
+    def stop(self):
+        self._stopped = True
+
+    def run(self, max_frames=None, duration=None):
+        self.mode.start()
+        self.pipeline.start()
+        deadline = time.monotonic() + duration if duration else None
+
+        try:
+            while self.pipeline.running and not self._stopped:
+                if max_frames is not None and self.frames >= max_frames:
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+
+                with tracing.span("pipeline.read"):
+                    packet = self.pipeline.read()
+                if packet is None:
+                    continue
+                self.frames += 1
+
+                with tracing.span("mode.update"):
+                    self.mode.update(packet)
+                for hook in self.hooks["packet"]:
+                    hook(packet)
+
+                t0 = time.perf_counter()
+                for sink in self.sinks:
+                    sink.emit(packet, self.mode)
+                packet.timings["ui_ms"] = (time.perf_counter() - t0) * 1000
+                # From capture, includes time spent queued
+                packet.timings["latency_ms"] = (time.perf_counter() - packet.capture_time) * 1000
+
+                with tracing.span("mode.after_frame"):
+                    self.mode.after_frame(packet)
+                for hook in self.hooks["frame"]:
+                    hook(packet)
+
+                for sink in self.sinks:
+                    if not sink.poll():
+                        self._stopped = True
+        finally:
+            self.pipeline.stop()
+            self.mode.finish()
+            for sink in self.sinks:
+                sink.close()
+        return self.frames
+
+
+class Sink:
+    def emit(self, packet, mode):
+        pass
+
+    def poll(self):
+        # False ends the run
+        return True
+
+    def close(self):
+        pass
+
+
+class NullSink(Sink):
+    # Headless runs: nothing is rendered, the pipeline runs as fast as it can
+    pass
+
+
+class DisplaySink(Sink):
+    def __init__(self, window_name, wait_ms=5):
+        self.window_name = window_name
+        self.wait_ms = wait_ms
+
+    def emit(self, packet, mode):
+        with tracing.span("ui.render"):
+            frame = mode.render(packet)
+        with tracing.span("ui.imshow"):
+            cv2.imshow(self.window_name, frame)
+
+    def poll(self):
+        with tracing.span("ui.waitKey"):
+            return cv2.waitKey(self.wait_ms) & 0xFF != 27  # ESC
+
+
+class RecorderSink(Sink):
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def emit(self, packet, mode):
+        target, target_age = mode.recording_target(packet)
+        image = packet.image
+        with tracing.span("recorder.write"):
+            self.recorder.write(
+                packet.timestamp, packet.landmark_array, image.shape[1], image.shape[0], target, target_age,
+            )
+
+    def close(self):
+        self.recorder.close()
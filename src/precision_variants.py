@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from gaze_predictor import GazePredictor
+from latency_stats import LatencyHistogram
+from torch_gaze_backend import PRECISIONS, TorchGazeBackend, save_checkpoint
+
+
+def default_variant_path(model_path, precision):
+    stem, ext = os.path.splitext(model_path)
+    return f"{stem}.{precision}{ext}"
+
+
+def load_features(args, scaler):
+    # Recorded landmarks if given, otherwise samples around the scaler's operating range
+    if args.recording:
+        from distance_estimator import DistanceEstimator
+        from head_controller import HeadController
+        from landmark_recorder import open_recording
+        from replay import ReplayEngine, evaluation_mask
+
+        records = open_recording(args.recording)
+        estimator = DistanceEstimator()
+        stable = ReplayEngine(estimator, HeadController(estimator)).validate(records)
+        has_face = records["has_face"].astype(bool)
+
+        landmarks = np.asarray(records["landmarks"][has_face])
+        features = np.take(landmarks.reshape(len(landmarks), -1), GazePredictor.FEATURE_INDEX, axis=1)
+        mask = evaluation_mask(records, stable, args.reaction_delay)[has_face]
+        targets = np.where(mask, records["target"][has_face], -1)
+        return features, targets
+
+    center = getattr(scaler, 'center_', getattr(scaler, 'mean_', 0.0))
+    scale = getattr(scaler, 'scale_', 1.0)
+    rng = np.random.default_rng(0)
+    features = (center + rng.standard_normal((args.samples, len(GazePredictor.FEATURE_INDEX))) * scale)
+    return features.astype(np.float32), None
+
+
+def forward_all(backend, features, batch_size):
+    return np.concatenate([
+        backend.forward(features[start:start + batch_size]) for start in range(0, len(features), batch_size)
+    ])
+
+
+def measure(backend, features, latency_samples, batch_size, min_seconds=1.0):
+    # Per-sample latency: one row per forward pass, as in the live demo
+    histogram = LatencyHistogram()
+    for i in range(min(latency_samples, len(features))):
+        row = features[i:i + 1]
+        t0 = time.perf_counter()
+        backend.forward(row)
+        histogram.add((time.perf_counter() - t0) * 1000)
+
+    # Batch throughput over the whole set, repeated for at least min_seconds
+    rows = 0
+    t0 = time.perf_counter()
+    while True:
+        for start in range(0, len(features), batch_size):
+            backend.forward(features[start:start + batch_size])
+        rows += len(features)
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_seconds:
+            break
+
+    summary = histogram.summary()
+    return forward_all(backend, features, batch_size), {
+        "latency_ms": {key: summary[key] for key in ("p50", "p95", "p99")},
+        "rows_per_s": rows / elapsed,
+    }
+
+
+def convert(args):
+    backend = TorchGazeBackend(args.model, args.scaler, len(GazePredictor.FEATURE_INDEX), precision=args.precision)
+    if not backend.ready:
+        return 1
+    output = args.output or default_variant_path(args.model, args.precision)
+    save_checkpoint(backend.model, output, backend.precision)
+    print(f"Saved {backend.precision} checkpoint to {output} ({os.path.getsize(output) / 1024:.1f} KiB)")
+    return 0
+
+
+def compare(args):
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    input_dim = len(GazePredictor.FEATURE_INDEX)
+    variants = [(precision, args.model, precision) for precision in args.precisions.split(",")]
+    variants += [(os.path.basename(path), path, None) for path in args.variant or []]
+
+    reference = TorchGazeBackend(args.model, args.scaler, input_dim, precision='float32')
+    if not reference.ready:
+        return 1
+    features, targets = load_features(args, reference.scaler)
+    print(f"Comparing on {len(features)} samples")
+
+    reference_logits = forward_all(reference, features, args.batch_size)
+    reference_classes = reference_logits.argmax(axis=1)
+    evaluated = targets >= 0 if targets is not None else None
+
+    report = {"model": args.model, "samples": len(features), "variants": []}
+    for name, model_path, precision in variants:
+        backend = TorchGazeBackend(model_path, args.scaler, input_dim, precision=precision)
+        if not backend.ready:
+            print(f"Skipping {name}: could not be loaded")
+            continue
+
+        logits, timing = measure(backend, features, args.latency_samples, args.batch_size)
+        classes = logits.argmax(axis=1)
+        result = {
+            "variant": name,
+            "precision": backend.precision,
+            "checkpoint_kib": os.path.getsize(model_path) / 1024 if precision is None else None,
+            **timing,
+            "agreement_percent": float(np.mean(classes == reference_classes) * 100),
+            "max_abs_logit_diff": float(np.abs(logits - reference_logits).max()),
+        }
+        if evaluated is not None and evaluated.any():
+            result["accuracy_percent"] = float(np.mean(classes[evaluated] == targets[evaluated]) * 100)
+        report["variants"].append(result)
+
+        latency = result["latency_ms"]
+        print(f"{name:<12} p50 {latency['p50']:6.3f} ms  p99 {latency['p99']:6.3f} ms  "
+              f"{result['rows_per_s']:10.0f} rows/s  agreement {result['agreement_percent']:6.2f}%")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Report saved to {args.output}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert GazeClassifier to reduced precision and compare variants")
+    parser.add_argument("--model", default="src/models/gc_1x3_loso.pth")
+    parser.add_argument("--scaler", default="src/scalers/scaler_1x3_loso.pkl")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = commands.add_parser("convert", help="Save a converted checkpoint")
+    convert_parser.add_argument("--precision", choices=PRECISIONS, required=True)
+    convert_parser.add_argument("--output", help="Defaults to <model>.<precision>.pth")
+
+    compare_parser = commands.add_parser("compare", help="Latency, throughput and agreement with float32")
+    compare_parser.add_argument("--recording", help="Landmark recording to evaluate on (default: synthetic samples)")
+    compare_parser.add_argument("--precisions", default=",".join(PRECISIONS),
+                                help="Comma separated precisions converted on the fly")
+    compare_parser.add_argument("--variant", action="append", help="Converted checkpoint to include, can be repeated")
+    compare_parser.add_argument("--samples", type=int, default=5000)
+    compare_parser.add_argument("--latency-samples", type=int, default=2000)
+    compare_parser.add_argument("--batch-size", type=int, default=256)
+    compare_parser.add_argument("--reaction-delay", type=float, default=0.5)
+    compare_parser.add_argument("--threads", type=int, help="torch intra-op threads")
+    compare_parser.add_argument("--output", help="Write the report to this JSON file")
+
+    args = parser.parse_args()
+    return convert(args) if args.command == "convert" else compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from distance_estimator import DistanceEstimator
+from gaze_predictor import GazePredictor
+from head_controller import HeadController
+from landmark_recorder import open_recording
+
+
+class ReplayEngine:
+    def __init__(self, estimator, head_controller, batch_size=4096):
+        self.estimator = estimator
+        self.head_controller = head_controller
+        self.batch_size = batch_size
+
+    def validate(self, records):
+        stable = np.zeros(len(records), dtype=bool)
+        indices = np.flatnonzero(records["has_face"])
+        for start in range(0, len(indices), self.batch_size):
+            batch = indices[start:start + self.batch_size]
+            horizontal_ok, vertical_ok, distance_ok, _ = self.head_controller.validate_batch(
+                records["landmarks"][batch],
+                records["image_width"][batch].astype(np.int64),
+                records["image_height"][batch].astype(np.int64),
+            )
+            stable[batch] = horizontal_ok & vertical_ok & distance_ok
+        return stable
+
+    def predict(self, predictor, records, stable):
+        predictions = np.full(len(records), -1, dtype=np.int64)
+        indices = np.flatnonzero(stable)
+
+        if predictor.gate is not None:
+            # The gate compares consecutive frames, so replay them one at a time
+            landmarks = records["landmarks"]
+            for i in indices:
+                classes, _ = predictor.predict_batch(landmarks[i:i + 1])
+                if classes is None:
+                    return None
+                predictions[i] = classes[0]
+            return predictions
+
+        for start in range(0, len(indices), self.batch_size):
+            batch = indices[start:start + self.batch_size]
+            classes, _ = predictor.predict_batch(records["landmarks"][batch])
+            if classes is None:
+                return None
+            predictions[batch] = classes
+        return predictions
+
+
+def evaluation_mask(records, stable, reaction_delay):
+    return stable & (records["target"] >= 0) & (records["target_age"] > reaction_delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a landmark recording through validation and prediction")
+    parser.add_argument("recording")
+    parser.add_argument("--model", action="append", help="Checkpoint to score, can be repeated")
+    parser.add_argument("--scaler", action="append", help="Scaler for each --model, in the same order")
+    parser.add_argument("--backend", choices=GazePredictor.BACKENDS, default="torch")
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--reaction-delay", type=float, default=0.5)
+    parser.add_argument("--motion-epsilon", type=float, default=None,
+                        help="Replay frame by frame through the motion gate and report its hit rate")
+    parser.add_argument("--output", help="Write per-frame predictions to this .npz file")
+    args = parser.parse_args()
+
+    models = args.model or ["src/models/gc_1x3_loso.pth"]
+    scalers = args.scaler or ["src/scalers/scaler_1x3_loso.pkl"]
+    if len(models) != len(scalers):
+        parser.error("--model and --scaler must be given the same number of times")
+
+    records = open_recording(args.recording)
+    print(f"Loaded {len(records)} records from {args.recording}")
+
+    estimator = DistanceEstimator()
+    engine = ReplayEngine(estimator, HeadController(estimator), batch_size=args.batch_size)
+
+    t0 = time.perf_counter()
+    stable = engine.validate(records)
+    validation_s = time.perf_counter() - t0
+
+    report = {
+        "recording": args.recording,
+        "frames": len(records),
+        "faces": int(records["has_face"].sum()),
+        "stable": int(stable.sum()),
+        "validation_fps": len(records) / validation_s if validation_s > 0 else None,
+        "models": [],
+    }
+    outputs = {"timestamp": np.asarray(records["timestamp"]), "stable": stable}
+
+    mask = evaluation_mask(records, stable, args.reaction_delay)
+    targets = records["target"][mask]
+
+    for model_path, scaler_path in zip(models, scalers):
+        predictor = GazePredictor(
+            model_path=model_path, scaler_path=scaler_path, backend=args.backend,
+            motion_epsilon=args.motion_epsilon,
+        )
+
+        t0 = time.perf_counter()
+        predictions = engine.predict(predictor, records, stable)
+        prediction_s = time.perf_counter() - t0
+        if predictions is None:
+            print(f"Skipping {model_path}: model could not be loaded")
+            continue
+
+        accuracy = float(np.mean(predictions[mask] == targets) * 100) if mask.any() else None
+        model_report = {
+            "model": model_path,
+            "scaler": scaler_path,
+            "prediction_fps": int(stable.sum()) / prediction_s if prediction_s > 0 else None,
+            "evaluated_samples": int(mask.sum()),
+            "accuracy_percent": round(accuracy, 2) if accuracy is not None else None,
+        }
+        if predictor.gate is not None:
+            model_report["gate"] = {
+                "epsilon": predictor.gate.epsilon,
+                "hits": predictor.gate.hits,
+                "misses": predictor.gate.misses,
+                "hit_rate": predictor.gate.hit_rate,
+            }
+        report["models"].append(model_report)
+        outputs[os.path.splitext(os.path.basename(model_path))[0]] = predictions
+
+    print(json.dumps(report, indent=4))
+
+    if args.output:
+        np.savez_compressed(args.output, **outputs)
+        print(f"Predictions saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from latency_stats import LatencyHistogram, LatencyStats
+
+PERFORMANCE_STAGES = ["detection_ms", "validation_ms", "prediction_ms", "ui_ms", "latency_ms"]
+
+
+class SessionSummary:
+    # Running totals for the summary; fed either live or from a session log.
+    # Samples logged within reaction_delay_s of a target change are left out.
+    def __init__(self, stages=PERFORMANCE_STAGES, reaction_delay_s=None):
+        self.reaction_delay_s = reaction_delay_s
+        self.performance = LatencyStats(stages)
+        self.total_samples = 0
+        self.correct_predictions = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        # Shadow model name -> [samples, correct, LatencyHistogram]
+        self.shadow = {}
+
+    def _within_reaction_delay(self, target_age):
+        return self.reaction_delay_s is not None and target_age is not None and target_age <= self.reaction_delay_s
+
+    def add_evaluation(self, timestamp, target, prediction, target_age=None):
+        if self._within_reaction_delay(target_age):
+            return
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        self.last_timestamp = timestamp
+        self.total_samples += 1
+        if target == prediction:
+            self.correct_predictions += 1
+
+    def add_performance(self, timestamp, values):
+        self.performance.record(timestamp, values)
+
+    def add_shadow(self, model, target, prediction, target_age, latency_ms):
+        totals = self.shadow.get(model)
+        if totals is None:
+            totals = self.shadow[model] = [0, 0, LatencyHistogram()]
+        # Latency counts for every scored frame, accuracy only outside the reaction delay
+        totals[2].add(latency_ms)
+        if self._within_reaction_delay(target_age):
+            return
+        totals[0] += 1
+        if target == prediction:
+            totals[1] += 1
+
+    def add_record(self, record):
+        kind = record.get("type")
+        if kind == "evaluation":
+            self.add_evaluation(record["timestamp"], record["target"], record["prediction"], record.get("target_age"))
+        elif kind == "performance":
+            self.add_performance(record["timestamp"], record)
+        elif kind == "shadow":
+            self.add_shadow(
+                record["model"], record["target"], record["prediction"], record.get("target_age"), record["latency_ms"],
+            )
+
+    def to_dict(self):
+        output = {}
+
+        if self.total_samples:
+            accuracy = (self.correct_predictions / self.total_samples) * 100
+            output["evaluation"] = {
+                "summary": {
+                    "total_samples": self.total_samples,
+                    "accuracy_percent": round(accuracy, 2),
+                    "duration_seconds": round(self.last_timestamp - self.first_timestamp, 2),
+                    "start_time": datetime.fromtimestamp(self.first_timestamp).isoformat()
+                }
+            }
+
+        if self.performance.count:
+            output["efficiency"] = {
+                "summary": self.performance.summary()
+            }
+
+        if self.shadow:
+            output["shadow"] = {
+                model: {
+                    "total_samples": samples,
+                    "accuracy_percent": round(correct / samples * 100, 2) if samples else None,
+                    "latency_ms": latency.summary(),
+                }
+                for model, (samples, correct, latency) in self.shadow.items()
+            }
+
+        return output
+
+
+class SessionLog:
+    # Appends compact JSON lines from a background thread; the summary is written
+    # on close() and can be rebuilt with rebuild_summary() if the process dies.
+    def __init__(self, results_dir, prefix="experiment", stages=PERFORMANCE_STAGES,
+                 flush_interval=0.5, batch_size=512, reaction_delay_s=None, metadata=None):
+        os.makedirs(results_dir, exist_ok=True)
+        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.log_path = os.path.join(results_dir, f"{prefix}_{timestamp_str}.jsonl")
+        self.summary_path = os.path.join(results_dir, f"{prefix}_{timestamp_str}.json")
+
+        self.summary = SessionSummary(stages, reaction_delay_s)
+        self.records_written = 0
+        # Set if the writer thread stopped on an error; later records only reach the summary
+        self.error = None
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._queue = queue.Queue()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-log", daemon=True)
+        self._thread.start()
+
+        self._put({
+            "type": "session",
+            "start_time": datetime.now().isoformat(),
+            "reaction_delay_s": reaction_delay_s,
+            "metadata": metadata or {},
+        })
+
+    def log_evaluation(self, timestamp, target, prediction, target_age=None):
+        self.summary.add_evaluation(timestamp, target, prediction, target_age)
+        self._put({
+            "type": "evaluation", "timestamp": timestamp, "target": target, "prediction": prediction,
+            "target_age": target_age,
+        })
+
+    def log_shadow(self, timestamp, model, target, prediction, target_age, latency_ms):
+        self.summary.add_shadow(model, target, prediction, target_age, latency_ms)
+        self._put({
+            "type": "shadow", "timestamp": timestamp, "model": model, "target": target, "prediction": prediction,
+            "target_age": target_age, "latency_ms": latency_ms,
+        })
+
+    def log_performance(self, timestamp, values):
+        self.summary.add_performance(timestamp, values)
+        record = {"type": "performance", "timestamp": timestamp}
+        record.update(values)
+        self._put(record)
+
+    def _put(self, record):
+        if self.error is None:
+            self._queue.put(record)
+
+    def _run(self):
+        try:
+            self._write_records()
+        except Exception as e:
+            self.error = e
+            print(f"Failed to write session log {self.log_path}: {e}")
+            # Nothing reads the queue any more
+            while not self._queue.empty():
+                self._queue.get_nowait()
+
+    def _write_records(self):
+        with open(self.log_path, "a") as f:
+            while True:
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    if self._closed.is_set():
+                        break
+                    continue
+
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                f.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch))
+                f.flush()
+                self.records_written += len(batch)
+
+            os.fsync(f.fileno())
+
+    def close(self):
+        self._closed.set()
+        self._thread.join()
+
+        output = self.summary.to_dict()
+        if not output:
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+            return None
+
+        output["log_file"] = os.path.basename(self.log_path)
+        if self.error is not None:
+            output["log_error"] = str(self.error)
+        try:
+            write_summary(self.summary_path, output)
+        except Exception as e:
+            print(f"Failed to save results: {e}")
+            return None
+        return self.summary_path
+
+
+def write_summary(path, output):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(output, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def rebuild_summary(log_path, stages=PERFORMANCE_STAGES):
+    summary = SessionSummary(stages)
+    with open(log_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave the last line half-written
+                continue
+            if record.get("type") == "session":
+                summary.reaction_delay_s = record.get("reaction_delay_s")
+            summary.add_record(record)
+
+    output = summary.to_dict()
+    output["log_file"] = os.path.basename(log_path)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild session summaries from .jsonl logs")
+    parser.add_argument("logs", nargs="+")
+    args = parser.parse_args()
+
+    for log_path in args.logs:
+        summary_path = os.path.splitext(log_path)[0] + ".json"
+        write_summary(summary_path, rebuild_summary(log_path))
+        print(f"Summary for {log_path} saved to {summary_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from results_writer import PERFORMANCE_STAGES
+from session_store import SessionStore, default_store_dir, reaction_mask
+
+EVALUATION_COLUMNS = ["eval_target", "eval_prediction", "eval_target_age"]
+PERFORMANCE_COLUMNS = [f"perf_{stage}" for stage in PERFORMANCE_STAGES]
+
+
+def parse_sweep(spec):
+    start, stop, step = (float(part) for part in spec.split(":"))
+    return np.round(np.arange(start, stop + step / 2, step), 6)
+
+
+def group_sessions(store, session_ids, group_by):
+    # Group index per session, in session_ids order
+    if not group_by:
+        return ["all"], np.zeros(len(session_ids), dtype=np.int32)
+    keys = [str(store.index[session_id]["metadata"].get(group_by)) for session_id in session_ids]
+    names = sorted(set(keys))
+    lookup = {name: i for i, name in enumerate(names)}
+    return names, np.array([lookup[key] for key in keys], dtype=np.int32)
+
+
+def confusion_matrices(groups, targets, predictions, num_groups, num_classes):
+    # (groups, target, prediction) counts from one bincount
+    flat = (groups.astype(np.int64) * num_classes + targets) * num_classes + predictions
+    counts = np.bincount(flat, minlength=num_groups * num_classes * num_classes)
+    return counts.reshape(num_groups, num_classes, num_classes)
+
+
+def session_accuracies(sessions, correct, num_sessions):
+    samples = np.bincount(sessions, minlength=num_sessions)
+    hits = np.bincount(sessions, weights=correct, minlength=num_sessions)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return hits / samples * 100, samples
+
+
+def delay_sweep(target_age, correct, delays):
+    # Accuracy over samples with target_age > delay, for every delay at once
+    known = np.isfinite(target_age)
+    order = np.argsort(target_age[known], kind="stable")
+    ages = target_age[known][order]
+    # Correct samples at or after each position
+    suffix_correct = np.concatenate([np.cumsum(correct[known][order][::-1])[::-1], [0]])
+
+    start = np.searchsorted(ages, delays, side="right")
+    samples = len(ages) - start
+    with np.errstate(invalid="ignore", divide="ignore"):
+        accuracy = suffix_correct[start] / samples * 100
+    return samples, accuracy
+
+
+def latency_percentiles(values, qs=(50, 95, 99)):
+    # Stages that did not run on a frame report 0 and are left out
+    values = values[values > 0]
+    if not len(values):
+        return None
+    percentiles = np.percentile(values, qs)
+    summary = {"count": int(len(values)), "avg": float(values.mean())}
+    summary.update({f"p{q}": float(value) for q, value in zip(qs, percentiles)})
+    return summary
+
+
+def rounded(value, digits=2):
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def analyze(store, session_ids, group_by=None, reaction_delay=0.5, delays=None, num_classes=3):
+    group_names, session_groups = group_sessions(store, session_ids, group_by)
+    num_groups = len(group_names)
+
+    evaluations = store.load_many(session_ids, EVALUATION_COLUMNS)
+    targets = evaluations["eval_target"].astype(np.int64)
+    predictions = evaluations["eval_prediction"].astype(np.int64)
+    target_age = evaluations["eval_target_age"].astype(np.float64)
+    sessions = evaluations["session"]
+    groups = session_groups[sessions]
+    num_classes = max(num_classes, int(max(targets.max(initial=-1), predictions.max(initial=-1))) + 1)
+
+    valid = (targets >= 0) & (predictions >= 0)
+    evaluated = valid & reaction_mask(target_age, reaction_delay)
+    correct = (targets == predictions).astype(np.float64)
+
+    confusion = confusion_matrices(
+        groups[evaluated], targets[evaluated], predictions[evaluated], num_groups, num_classes,
+    )
+    per_session, session_samples = session_accuracies(
+        sessions[evaluated], correct[evaluated], len(session_ids),
+    )
+
+    performance = store.load_many(session_ids, PERFORMANCE_COLUMNS)
+    performance_groups = session_groups[performance["session"]]
+
+    report = {"sessions": len(session_ids), "reaction_delay_s": reaction_delay, "groups": []}
+    for g, name in enumerate(group_names):
+        matrix = confusion[g]
+        samples = int(matrix.sum())
+        class_totals = matrix.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            class_accuracy = np.diag(matrix) / class_totals * 100
+
+        in_group = session_groups == g
+        scored = in_group & (session_samples > 0)
+        group = {
+            "group": name,
+            "sessions": int(in_group.sum()),
+            "samples": samples,
+            "accuracy_percent": rounded(np.trace(matrix) / samples * 100) if samples else None,
+            "per_class_accuracy_percent": [rounded(value) for value in class_accuracy],
+            "confusion_matrix": matrix.tolist(),
+            "session_accuracy_percent": {
+                "mean": rounded(per_session[scored].mean()) if scored.any() else None,
+                "min": rounded(per_session[scored].min()) if scored.any() else None,
+                "max": rounded(per_session[scored].max()) if scored.any() else None,
+            },
+        }
+
+        if delays is not None:
+            rows = valid & (groups == g)
+            sweep_samples, sweep_accuracy = delay_sweep(target_age[rows], correct[rows], delays)
+            group["reaction_delay_sweep"] = [
+                {"delay_s": float(delay), "samples": int(count), "accuracy_percent": rounded(accuracy)}
+                for delay, count, accuracy in zip(delays, sweep_samples, sweep_accuracy)
+            ]
+
+        frames = performance_groups == g
+        group["latency_ms"] = {}
+        for stage in PERFORMANCE_STAGES:
+            summary = latency_percentiles(performance[f"perf_{stage}"][frames])
+            if summary is not None:
+                group["latency_ms"][stage] = summary
+        report["groups"].append(group)
+    return report
+
+
+def print_report(report, group_by):
+    print(f"{report['sessions']} sessions, reaction delay {report['reaction_delay_s']}s")
+    for group in report["groups"]:
+        print()
+        title = f"{group_by} = {group['group']}" if group_by else "All sessions"
+        accuracy = group["accuracy_percent"]
+        accuracy_str = f"{accuracy:.2f}%" if accuracy is not None else "n/a"
+        print(f"{title}: {group['sessions']} sessions, {group['samples']} samples, accuracy {accuracy_str}")
+
+        per_class = ", ".join(f"{i}: {'n/a' if a is None else f'{a:.1f}%'}"
+                              for i, a in enumerate(group["per_class_accuracy_percent"]))
+        print(f"  per class    {per_class}")
+        print("  confusion    (rows target, columns prediction)")
+        for row in group["confusion_matrix"]:
+            print("    " + " ".join(f"{count:8d}" for count in row))
+
+        for entry in group.get("reaction_delay_sweep", []):
+            accuracy = entry["accuracy_percent"]
+            accuracy_str = f"{accuracy:6.2f}%" if accuracy is not None else "    n/a"
+            print(f"  delay {entry['delay_s']:5.2f}s  {accuracy_str}  ({entry['samples']} samples)")
+
+        for stage, stats in group["latency_ms"].items():
+            print(f"  {stage[:-3]:<11} p50 {stats['p50']:7.2f}  p95 {stats['p95']:7.2f}  p99 {stats['p99']:7.2f} ms"
+                  f"  ({stats['count']} frames)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and latency analytics over stored sessions")
+    parser.add_argument("--store", default=default_store_dir("Results"))
+    parser.add_argument("--import", dest="import_paths", nargs="+", metavar="PATH",
+                        help="Import these session logs into the store first")
+    parser.add_argument("--where", action="append", default=[], metavar="KEY=VALUE",
+                        help="Only sessions whose metadata matches, can be repeated")
+    parser.add_argument("--group-by", metavar="KEY", help="Metadata key to compare sessions by, e.g. model")
+    parser.add_argument("--reaction-delay", type=float, default=0.5)
+    parser.add_argument("--sweep", metavar="START:STOP:STEP",
+                        help="Reaction delays to sweep, e.g. 0:1:0.1 (needs sessions with target ages)")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    store = SessionStore(args.store)
+    if args.import_paths:
+        store.import_files(args.import_paths)
+
+    try:
+        where = dict(condition.split("=", 1) for condition in args.where)
+    except ValueError:
+        parser.error("--where expects KEY=VALUE")
+
+    session_ids = store.select(where)
+    if not session_ids:
+        print(f"No matching sessions in {args.store}")
+        return 1
+
+    t0 = time.perf_counter()
+    delays = parse_sweep(args.sweep) if args.sweep else None
+    report = analyze(store, session_ids, args.group_by, args.reaction_delay, delays)
+    elapsed = time.perf_counter() - t0
+
+    print_report(report, args.group_by)
+    print(f"\nAnalyzed {len(session_ids)} sessions in {elapsed:.2f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Report saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from results_writer import PERFORMANCE_STAGES, write_summary
+
+INDEX_FILE = "index.json"
+
+# One uncompressed .npz per session, so single columns load without touching the rest.
+# target_age is NaN for sessions logged before it was recorded (those samples were
+# only logged once the reaction delay had passed).
+COLUMN_DTYPES = {
+    "eval_timestamp": np.float64,
+    "eval_target": np.int8,
+    "eval_prediction": np.int8,
+    "eval_target_age": np.float32,
+    "perf_timestamp": np.float64,
+}
+COLUMN_DTYPES.update({f"perf_{stage}": np.float32 for stage in PERFORMANCE_STAGES})
+# Shadow model predictions; shadow_model indexes the session's "shadow_models" names
+COLUMN_DTYPES.update({
+    "shadow_timestamp": np.float64,
+    "shadow_model": np.int16,
+    "shadow_target": np.int8,
+    "shadow_prediction": np.int8,
+    "shadow_target_age": np.float32,
+    "shadow_latency_ms": np.float32,
+})
+
+
+def default_store_dir(results_dir):
+    return os.path.join(results_dir, "sessions")
+
+
+def session_id_for(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def columns_from_records(records):
+    evaluations = {"timestamp": [], "target": [], "prediction": [], "target_age": []}
+    performance = {key: [] for key in ["timestamp"] + PERFORMANCE_STAGES}
+    shadow = {key: [] for key in ("timestamp", "model", "target", "prediction", "target_age", "latency_ms")}
+    shadow_models = {}
+    session = {}
+
+    for record in records:
+        kind = record.get("type")
+        if kind == "evaluation":
+            for key in evaluations:
+                value = record.get(key)
+                evaluations[key].append(np.nan if value is None else value)
+        elif kind == "performance":
+            for key in performance:
+                performance[key].append(record.get(key, 0.0))
+        elif kind == "shadow":
+            record = dict(record, model=shadow_models.setdefault(record["model"], len(shadow_models)))
+            for key in shadow:
+                value = record.get(key)
+                shadow[key].append(np.nan if value is None else value)
+        elif kind == "session":
+            session = record
+
+    columns = {f"eval_{key}": values for key, values in evaluations.items()}
+    columns.update({f"perf_{key}": values for key, values in performance.items()})
+    columns.update({f"shadow_{key}": values for key, values in shadow.items()})
+    columns = {name: np.asarray(values, dtype=COLUMN_DTYPES[name]) for name, values in columns.items()}
+    columns["shadow_models"] = np.array(list(shadow_models), dtype=str)
+    return columns, session
+
+
+def read_session_log(path):
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A crash can leave the last line half-written
+                continue
+    return columns_from_records(records)
+
+
+def read_legacy_results(path):
+    # Results written before session logs existed, in one of two layouts:
+    #   {"summary": ..., "raw_data": [{"timestamp", "target", "prediction"}, ...]}
+    #   {"evaluation": {"summary", "raw_data"}, "efficiency": {"summary", "raw_data": [{"timestamp", "<stage>_ms"...}]}}
+    # Their evaluation samples were only logged once the reaction delay had passed.
+    with open(path) as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("not a results file")
+
+    if "raw_data" in data:
+        evaluation, efficiency = data, {}
+    else:
+        evaluation, efficiency = data.get("evaluation") or {}, data.get("efficiency") or {}
+        if "raw_data" not in evaluation and "raw_data" not in efficiency:
+            if "log_file" in data:
+                raise ValueError(f"summary without raw data, import {data['log_file']} instead")
+            raise ValueError("no raw_data in results file")
+
+    records = [{"type": "evaluation", **sample} for sample in evaluation.get("raw_data", [])]
+    records += [{"type": "performance", **sample} for sample in efficiency.get("raw_data", [])]
+    start_time = evaluation.get("summary", {}).get("start_time")
+    return columns_from_records(records)[0], {"start_time": start_time}
+
+
+class SessionStore:
+    def __init__(self, root):
+        self.root = root
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)["sessions"]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, session_id):
+        return session_id in self.index
+
+    def add(self, session_id, columns, session=None, source=None, save_index=True):
+        os.makedirs(self.root, exist_ok=True)
+        session = session or {}
+        file_name = f"{session_id}.npz"
+        tmp_path = os.path.join(self.root, f"{session_id}.tmp.npz")
+        np.savez(tmp_path, **columns)
+        os.replace(tmp_path, os.path.join(self.root, file_name))
+
+        evaluated = reaction_mask(columns["eval_target_age"], session.get("reaction_delay_s"))
+        targets = columns["eval_target"][evaluated]
+        predictions = columns["eval_prediction"][evaluated]
+        self.index[session_id] = {
+            "file": file_name,
+            "source": os.path.basename(source) if source else None,
+            "start_time": session.get("start_time"),
+            "reaction_delay_s": session.get("reaction_delay_s"),
+            "samples": int(len(targets)),
+            "frames": int(len(columns["perf_timestamp"])),
+            "shadow_models": columns["shadow_models"].tolist() if "shadow_models" in columns else [],
+            "accuracy_percent": round(float(np.mean(targets == predictions) * 100), 2) if len(targets) else None,
+            "metadata": session.get("metadata", {}),
+        }
+        if save_index:
+            self.save_index()
+        return self.index[session_id]
+
+    def save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        write_summary(self.index_path, {"sessions": self.index})
+
+    def import_file(self, path, replace=False, save_index=True):
+        # None if the session is already stored; ValueError if path holds no session data
+        session_id = session_id_for(path)
+        if session_id in self.index and not replace:
+            return None
+
+        if path.endswith(".jsonl"):
+            columns, session = read_session_log(path)
+        else:
+            columns, session = read_legacy_results(path)
+        return self.add(session_id, columns, session, source=path, save_index=save_index)
+
+    def import_files(self, paths, replace=False):
+        # Reports every file that was not imported; the index is written once
+        imported = existing = 0
+        for path in paths:
+            try:
+                entry = self.import_file(path, replace=replace, save_index=False)
+            except (OSError, ValueError) as e:
+                print(f"Skipped {path}: {e}")
+                continue
+            if entry is None:
+                existing += 1
+            else:
+                imported += 1
+        self.save_index()
+        skipped = len(paths) - imported - existing
+        print(f"Imported {imported} sessions into {self.root} ({existing} already stored, {skipped} skipped, "
+              f"{len(self)} stored)")
+        return imported
+
+    def select(self, where=None):
+        # where: {metadata key: value as string}
+        selected = []
+        for session_id, entry in self.index.items():
+            metadata = entry["metadata"]
+            if all(str(metadata.get(key)) == value for key, value in (where or {}).items()):
+                selected.append(session_id)
+        return selected
+
+    def load(self, session_id, columns=None):
+        with np.load(os.path.join(self.root, self.index[session_id]["file"])) as data:
+            return {name: data[name] for name in (columns or data.files) if name in data.files}
+
+    def load_many(self, session_ids, columns):
+        # Concatenated columns (all from the same table, eval_* or perf_*) plus
+        # "session", the position of each row's session in session_ids
+        parts = [self.load(session_id, columns) for session_id in session_ids]
+        merged = {
+            name: np.concatenate([part[name] for part in parts] + [np.empty(0, COLUMN_DTYPES[name])])
+            for name in columns
+        }
+        lengths = [len(part[columns[0]]) for part in parts]
+        merged["session"] = np.repeat(np.arange(len(parts), dtype=np.int32), lengths)
+        return merged
+
+
+def reaction_mask(target_age, reaction_delay):
+    # Samples without a known target age are kept, they were filtered when logged
+    if reaction_delay is None:
+        return np.ones(len(target_age), dtype=bool)
+    return ~(target_age <= reaction_delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert session logs into the columnar session store")
+    parser.add_argument("--store", default=default_store_dir("Results"))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Import .jsonl session logs or legacy result .json files")
+    import_parser.add_argument("paths", nargs="+")
+    import_parser.add_argument("--replace", action="store_true", help="Re-import sessions already in the store")
+
+    commands.add_parser("list", help="List stored sessions")
+    args = parser.parse_args()
+
+    store = SessionStore(args.store)
+    if args.command == "import":
+        store.import_files(args.paths, replace=args.replace)
+    else:
+        for session_id, entry in store.index.items():
+            accuracy = entry["accuracy_percent"]
+            accuracy_str = f"{accuracy:6.2f}%" if accuracy is not None else "    n/a"
+            print(f"{session_id:<32} {entry['samples']:7d} samples {entry['frames']:7d} frames {accuracy_str}  "
+                  f"{json.dumps(entry['metadata'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
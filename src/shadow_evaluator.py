@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+
+class ShadowEvaluator:
+    # Candidate models score the primary model's features on a thread pool. A
+    # candidate that is still busy with an earlier frame skips the new one, so a
+    # slow model never holds up the UI thread. Finished results are collected with
+    # drain() on the caller's thread.
+    def __init__(self, candidates, max_workers=None):
+        # candidates: {name: GazePredictor}
+        self.candidates = dict(candidates)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(self.candidates), thread_name_prefix="shadow",
+        )
+        self._busy = set()
+        self._lock = threading.Lock()
+        self._results = deque()
+        self.submitted = {name: 0 for name in self.candidates}
+        self.skipped = {name: 0 for name in self.candidates}
+
+    @property
+    def names(self):
+        return list(self.candidates)
+
+    def submit(self, features, context=None):
+        # features: (N, F) rows already extracted for the primary model.
+        # context comes back unchanged with every result.
+        for name, predictor in self.candidates.items():
+            with self._lock:
+                if name in self._busy:
+                    self.skipped[name] += 1
+                    continue
+                self._busy.add(name)
+            self.submitted[name] += 1
+            self._executor.submit(self._run, name, predictor, features, context)
+
+    def _run(self, name, predictor, features, context):
+        try:
+            t0 = time.perf_counter()
+            with tracing.span(f"shadow.{name}"):
+                predictions, probabilities = predictor.predict_batch(features)
+            latency_ms = (time.perf_counter() - t0) * 1000
+            if predictions is not None:
+                self._results.append((name, predictions, probabilities, latency_ms, context))
+        except Exception as e:
+            print(f"Shadow model {name} failed: {e}")
+        finally:
+            with self._lock:
+                self._busy.discard(name)
+
+    def drain(self):
+        results = []
+        while self._results:
+            results.append(self._results.popleft())
+        return results
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait)
+        return self.drain()
+
+    def stats(self):
+        return {
+            name: {"submitted": self.submitted[name], "skipped": self.skipped[name]}
+            for name in self.candidates
+        }
+
+
+def candidate_name(model_path, names):
+    # Checkpoint file name, made unique if two candidates share it
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    unique, suffix = name, 2
+    while unique in names:
+        unique = f"{name}_{suffix}"
+        suffix += 1
+    return unique
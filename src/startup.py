@@ -0,0 +1,65 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+
+class StartupOrchestrator:
+    # Runs component initialisers on background threads while the welcome screen
+    # is up and records how long each one took (including its warm-up).
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.timings = {}
+        self.t0 = time.perf_counter()
+
+    def add(self, name, init, *args, **kwargs):
+        self._futures[name] = self._executor.submit(self._run, name, init, args, kwargs)
+        return self
+
+    def _run(self, name, init, args, kwargs):
+        t0 = time.perf_counter()
+        try:
+            with tracing.span(f"startup.{name}"):
+                return init(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.timings[name] = {
+                    "ms": (time.perf_counter() - t0) * 1000,
+                    "ready_after_ms": (time.perf_counter() - self.t0) * 1000,
+                }
+
+    @property
+    def names(self):
+        return list(self._futures)
+
+    def done(self, name):
+        return self._futures[name].done()
+
+    def pending(self):
+        return [name for name, future in self._futures.items() if not future.done()]
+
+    def result(self, name, timeout=None):
+        # Re-raises whatever the initialiser raised
+        return self._futures[name].result(timeout)
+
+    def wait_all(self, poll=None, interval=0.03):
+        # poll() is called while waiting, e.g. to keep an OpenCV window responsive
+        while self.pending():
+            if poll is not None:
+                poll()
+            time.sleep(interval)
+        return {name: self.result(name) for name in self._futures}
+
+    def report(self):
+        lines = ["Startup timings:"]
+        for name in self._futures:
+            timing = self.timings.get(name)
+            if timing is not None:
+                lines.append(f"  {name:<10} {timing['ms']:8.1f} ms (ready {timing['ready_after_ms']:8.1f} ms after start)")
+        return "\n".join(lines)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
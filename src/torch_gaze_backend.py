@@ -0,0 +1,111 @@
+import platform
+
+import torch
+import torch.nn as nn
+import joblib
+from gaze_classifier import GazeClassifier
+
+PRECISIONS = ('float32', 'float16', 'bfloat16', 'int8')
+
+
+def convert_model(model, precision):
+    if precision == 'int8':
+        # Dynamic quantization: int8 weights, activations quantized per batch
+        if platform.machine().lower() in ('aarch64', 'arm64', 'armv7l') \
+                and 'qnnpack' in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = 'qnnpack'
+        return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    if precision in ('float16', 'bfloat16'):
+        return model.to(getattr(torch, precision))
+    return model
+
+
+def save_checkpoint(model, path, precision):
+    torch.save({
+        'model_state_dict': model.state_dict(),
+        'input_features': model.input_features,
+        'num_classes': model.num_classes,
+        'precision': precision,
+    }, path)
+
+
+class TorchGazeBackend:
+    def __init__(self, model_path, scaler_path, input_dim, device='cpu', precision=None):
+        self.device = torch.device(device)
+        self.num_classes = None
+        self.precision = None
+
+        # Model
+        try:
+            checkpoint = torch.load(model_path, map_location=self.device)
+            
+            num_classes = 3 # Default
+            state_dict = None
+            saved_precision = 'float32'
+
+            if isinstance(checkpoint, dict) and 'model_state_dict' in checkpoint:
+                state_dict = checkpoint['model_state_dict']
+                
+                if 'num_classes' in checkpoint:
+                    num_classes = checkpoint['num_classes']
+                    print(f"Found num_classes in checkpoint: {num_classes}")
+                saved_precision = checkpoint.get('precision', 'float32')
+            else:
+                state_dict = checkpoint
+                keys = list(state_dict.keys())
+                if keys:
+                    last_weight_key = keys[-2] 
+                    if 'weight' in last_weight_key:
+                         num_classes = state_dict[last_weight_key].shape[0]
+                         print(f"Inferred num_classes from state_dict: {num_classes}")
+
+            self.model = GazeClassifier(input_features=input_dim, num_classes=num_classes)
+            self.model.to(self.device)
+
+            # Converted checkpoints store the converted structure, so convert before loading
+            if saved_precision != 'float32':
+                self.model = convert_model(self.model, saved_precision)
+            self.model.load_state_dict(state_dict)
+            self.model.eval()
+
+            self.precision = saved_precision
+            if precision and precision != saved_precision:
+                if saved_precision == 'float32':
+                    self.model = convert_model(self.model, precision)
+                    self.precision = precision
+                else:
+                    print(f"Checkpoint is already {saved_precision}, ignoring precision={precision}")
+
+            self.num_classes = num_classes
+            print(f"Model loaded successfully from state_dict ({self.precision}).")
+            
+        except RuntimeError as e:
+            print(f"Error loading model weights: {e}")
+            print("Mismatch between GazeClassifier architecture and the loaded state_dict.")
+            print("Please ensure src/gaze_classifier.py matches your training model exactly.")
+            self.model = None
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            self.model = None
+        
+        # Scaler
+        try:
+            self.scaler = joblib.load(scaler_path)
+        except Exception as e:
+            print(f"Error loading scaler: {e}")
+            self.scaler = None
+
+    @property
+    def ready(self):
+        return self.model is not None and self.scaler is not None
+
+    def forward(self, features):
+        scaled_features = self.scaler.transform(features)
+
+        # int8 dynamic quantization keeps float32 activations
+        dtype = getattr(torch, self.precision) if self.precision in ('float16', 'bfloat16') else torch.float32
+        with torch.inference_mode():
+            input_tensor = torch.tensor(scaled_features, dtype=dtype).to(self.device)
+            outputs = self.model(input_tensor)
+
+        return outputs.float().cpu().numpy()
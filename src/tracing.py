@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Spans are recorded into a bounded per-thread buffer, so recording never takes a
+# lock. While tracing is disabled span() returns a shared no-op context manager.
+_enabled = False
+_max_events = 1_000_000
+_local = threading.local()
+_buffers = []
+_buffers_lock = threading.Lock()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        _thread_buffer().append((self.name, self.start, end - self.start, self.args))
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enable(max_events_per_thread=1_000_000):
+    global _enabled, _max_events
+    _max_events = max_events_per_thread
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def span(name, args=None):
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def instant(name, args=None):
+    # Zero-length marker, e.g. a dropped frame
+    if _enabled:
+        _thread_buffer().append((name, time.perf_counter_ns(), None, args))
+
+
+def _thread_buffer():
+    events = getattr(_local, "events", None)
+    if events is None:
+        events = deque(maxlen=_max_events)
+        _local.events = events
+        thread = threading.current_thread()
+        with _buffers_lock:
+            _buffers.append((thread.ident, thread.name, events))
+    return events
+
+
+def clear():
+    with _buffers_lock:
+        for _, _, events in _buffers:
+            events.clear()
+
+
+def chrome_trace_events():
+    pid = os.getpid()
+    trace_events = []
+    with _buffers_lock:
+        buffers = list(_buffers)
+
+    for tid, thread_name, events in buffers:
+        trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+        for name, start, duration, args in list(events):
+            event = {"name": name, "pid": pid, "tid": tid, "ts": start / 1000}
+            if duration is None:
+                event.update(ph="i", s="t")
+            else:
+                event.update(ph="X", dur=duration / 1000)
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+    return trace_events
+
+
+def export_chrome_trace(path):
+    # Loads in chrome://tracing and ui.perfetto.dev
+    trace_events = chrome_trace_events()
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f, separators=(",", ":"))
+    return len(trace_events)
@@ -1,11 +1,26 @@
 import cv2
 import numpy as np
+from collections import OrderedDict
 
 class UserInterface: #3 columns 
     def __init__(self):
         self.line_color = (255, 255, 255) 
         self.line_thickness = 2
 
+        # create_frame output only depends on size, highlight and target
+        self._frame_cache = {}
+        self._frame_cache_size = 32
+        self._live_frame = None
+        self._live_key = None
+        self._live_dirty = []
+
+        # Gallery layers: prebaked photo + side panels + chevrons per (image, hover state)
+        self._gallery_layers = OrderedDict()
+        self._gallery_layers_size = 6
+        self._gallery_frame = None
+        self._gallery_key = None
+        self._gallery_dirty = None
+
     def apply_gray_overlay(self, frame):
         gray_screen = frame.copy()
         gray_screen[:, :, :] = int(255 * 0.18) 
@@ -58,6 +73,15 @@ class UserInterface: #3 columns
 
         return info_screen
 
+    def draw_loading_status(self, screen, pending):
+        # Small status line under the welcome screen while startup is still running
+        frame = screen.copy()
+        height = frame.shape[0]
+        text = "Loading: " + ", ".join(pending) if pending else "Ready"
+        color = (150, 150, 150) if pending else (100, 255, 100)
+        cv2.putText(frame, text, (30, height - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 1, cv2.LINE_AA)
+        return frame
+
     def _draw_centered_text(self, img, text, x, y, font, scale, thickness, color):
         text_size = cv2.getTextSize(text, font, scale, thickness)[0]
         text_x = x - text_size[0] // 2
@@ -82,6 +106,64 @@ class UserInterface: #3 columns
         return screen
 
     def create_gallery_interface(self, image, hover_state=None, progress=0.0):
+        height, width = image.shape[:2]
+        key = (id(image), hover_state)
+        base = self._gallery_layer(image, hover_state)
+
+        # Persistent output buffer: full copy only when the photo or hover state
+        # changes, otherwise only the dwell-progress ring is redrawn
+        out = self._gallery_frame
+        if out is None or out.shape != base.shape or self._gallery_key != key:
+            out = self._gallery_frame = base.copy()
+            self._gallery_key = key
+        elif self._gallery_dirty is not None:
+            x0, y0, x1, y1 = self._gallery_dirty
+            out[y0:y1, x0:x1] = base[y0:y1, x0:x1]
+        self._gallery_dirty = None
+
+        if hover_state and progress > 0:
+            side_width = width // 6
+            left_center = (side_width // 2, height // 2)
+            right_center = (width - side_width // 2, height // 2)
+            center = left_center if hover_state == 'prev' else right_center
+            radius = 50
+
+            # Draw into the small ROI around the ring only
+            margin = radius + 6
+            x0, y0 = max(center[0] - margin, 0), max(center[1] - margin, 0)
+            x1, y1 = min(center[0] + margin, width), min(center[1] + margin, height)
+            roi = out[y0:y1, x0:x1]
+            roi_center = (center[0] - x0, center[1] - y0)
+
+            cv2.circle(roi, roi_center, radius, (100, 100, 100), 2, cv2.LINE_AA)
+
+            axes = (radius, radius)
+            angle = 0
+            startAngle = -90
+            endAngle = -90 + (360 * progress)
+
+            prog_color = (int(255 * (1-progress)), 255, int(255 * (1-progress)))
+            
+            cv2.ellipse(roi, roi_center, axes, angle, startAngle, endAngle, prog_color, 4, cv2.LINE_AA)
+            self._gallery_dirty = (x0, y0, x1, y1)
+
+        return out
+
+    def _gallery_layer(self, image, hover_state):
+        key = (id(image), hover_state)
+        entry = self._gallery_layers.get(key)
+        # The image reference is kept so a recycled id() can never match
+        if entry is not None and entry[0] is image:
+            self._gallery_layers.move_to_end(key)
+            return entry[1]
+
+        layer = self._render_gallery_layer(image, hover_state)
+        self._gallery_layers[key] = (image, layer)
+        while len(self._gallery_layers) > self._gallery_layers_size:
+            self._gallery_layers.popitem(last=False)
+        return layer
+
+    def _render_gallery_layer(self, image, hover_state=None):
 
         display = image.copy()
         height, width, _ = display.shape
@@ -106,21 +188,6 @@ class UserInterface: #3 columns
         r_thickness = 4 if hover_state == 'next' else 2
         self._draw_chevron(display, right_center, size=30, direction='right', color=r_color, thickness=r_thickness)
 
-        if hover_state and progress > 0:
-            center = left_center if hover_state == 'prev' else right_center
-            radius = 50
-
-            cv2.circle(display, center, radius, (100, 100, 100), 2, cv2.LINE_AA)
-
-            axes = (radius, radius)
-            angle = 0
-            startAngle = -90
-            endAngle = -90 + (360 * progress)
-
-            prog_color = (int(255 * (1-progress)), 255, int(255 * (1-progress)))
-            
-            cv2.ellipse(display, center, axes, angle, startAngle, endAngle, prog_color, 4, cv2.LINE_AA)
-
         return display
 
     def _draw_chevron(self, img, center, size, direction, color, thickness):
@@ -141,7 +208,43 @@ class UserInterface: #3 columns
             
         cv2.polylines(img, [pts], False, color, thickness, cv2.LINE_AA)
 
-    def create_frame(self, frame, highlight_column=None, target_column=None):
+    def clear_frame_cache(self):
+        self._frame_cache.clear()
+        self._live_frame = None
+        self._live_key = None
+        self._live_dirty = []
+
+    def create_frame(self, frame, highlight_column=None, target_column=None, dirty_regions=None):
+        height, width = frame.shape[:2]
+        key = (width, height, highlight_column, target_column)
+
+        base = self._frame_cache.get(key)
+        if base is None:
+            if len(self._frame_cache) >= self._frame_cache_size:
+                self._frame_cache.clear()
+            base = self._render_frame(frame, highlight_column, target_column)
+            base.flags.writeable = False
+            self._frame_cache[key] = base
+
+        if dirty_regions is None:
+            # Shared, read-only frame
+            return base
+
+        # Live content path: a persistent buffer where only the regions drawn
+        # over on the previous frame are restored from the cached composite
+        if self._live_key != key or self._live_frame is None:
+            self._live_frame = base.copy()
+            self._live_key = key
+        else:
+            for x0, y0, x1, y1 in self._live_dirty:
+                self._live_frame[y0:y1, x0:x1] = base[y0:y1, x0:x1]
+        self._live_dirty = [
+            (max(x0, 0), max(y0, 0), min(x1, width), min(y1, height))
+            for x0, y0, x1, y1 in dirty_regions
+        ]
+        return self._live_frame
+
+    def _render_frame(self, frame, highlight_column=None, target_column=None):
         display_frame = self.apply_gray_overlay(frame)
         height, width, _ = display_frame.shape
         
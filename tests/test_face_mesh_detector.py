@@ -0,0 +1,142 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")
+from mediapipe.framework.formats import landmark_pb2
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from face_mesh_detector import FaceMeshDetector
+from landmarks import NUM_LANDMARKS, FaceMeshResults, array_to_landmarks, landmarks_to_array
+
+WIDTH, HEIGHT = 1280, 720
+
+
+def face_points(center_x=0.5, center_y=0.5, size=0.4):
+    # Normalized landmarks spread over a face-sized box
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-0.5, 0.5, (NUM_LANDMARKS, 3)).astype(np.float32)
+    points[:, 0] = center_x + points[:, 0] * size * HEIGHT / WIDTH
+    points[:, 1] = center_y + points[:, 1] * size
+    points[:, 2] *= 0.05
+    return points
+
+
+class FullFrameMesh:
+    def __init__(self, points):
+        self.points = points
+        self.shapes = []
+
+    def process(self, image):
+        self.shapes.append(image.shape)
+        if self.points is None:
+            return FaceMeshResults()
+        return FaceMeshResults([array_to_landmarks(self.points, landmark_pb2.NormalizedLandmarkList())])
+
+
+class CropMesh:
+    # Sees only the crop and answers in crop-normalized coordinates, like FaceMesh would
+    def __init__(self, detector, points):
+        self.detector = detector
+        self.points = points
+        self.shapes = []
+
+    def process(self, image):
+        self.shapes.append(image.shape)
+        if self.points is None:
+            return FaceMeshResults()
+        x0, y0, x1, y1 = self.detector.roi
+        crop = self.points.copy()
+        crop[:, 0] = (crop[:, 0] * WIDTH - x0) / (x1 - x0)
+        crop[:, 1] = (crop[:, 1] * HEIGHT - y0) / (y1 - y0)
+        crop[:, 2] = crop[:, 2] * WIDTH / (x1 - x0)
+        return FaceMeshResults([array_to_landmarks(crop, landmark_pb2.NormalizedLandmarkList())])
+
+
+@pytest.fixture
+def detector():
+    detector = FaceMeshDetector(roi_tracking=True, roi_padding=0.35, roi_size=320)
+    detector.face_mesh = FullFrameMesh(face_points())
+    detector.roi_face_mesh = CropMesh(detector, face_points())
+    return detector
+
+
+@pytest.fixture
+def image():
+    return np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+
+def test_first_frame_sets_padded_roi(detector, image):
+    detector.process(image)
+    assert detector.face_mesh.shapes == [(HEIGHT, WIDTH, 3)]
+
+    points = face_points()
+    x0, y0, x1, y1 = detector.roi
+    extent = np.ptp(points[:, :2], axis=0) * (WIDTH, HEIGHT)
+    assert x1 - x0 == pytest.approx(extent.max() * 1.7, abs=2)
+    assert y1 - y0 == pytest.approx(extent.max() * 1.7, abs=2)
+    assert (x0 + x1) / 2 == pytest.approx((points[:, 0].min() + points[:, 0].max()) / 2 * WIDTH, abs=1)
+    assert (y0 + y1) / 2 == pytest.approx((points[:, 1].min() + points[:, 1].max()) / 2 * HEIGHT, abs=1)
+
+
+def test_roi_frames_are_mapped_back(detector, image):
+    detector.process(image)
+    roi = detector.roi
+    results = detector.process(image)
+
+    # The crop is downscaled to roi_size and the full frame model is not run again
+    assert len(detector.face_mesh.shapes) == 1
+    assert max(detector.roi_face_mesh.shapes[0][:2]) == 320
+    assert detector.roi == roi
+
+    landmarks = landmarks_to_array(results.multi_face_landmarks[0])
+    np.testing.assert_allclose(landmarks, face_points(), atol=1e-5)
+
+
+def test_roi_follows_the_face(detector, image):
+    detector.process(image)
+    moved = face_points(0.55, 0.45)
+    detector.roi_face_mesh.points = moved
+    results = detector.process(image)
+    np.testing.assert_allclose(landmarks_to_array(results.multi_face_landmarks[0]), moved, atol=1e-5)
+
+    x0, y0, x1, y1 = detector.roi
+    assert (x0 + x1) / 2 == pytest.approx((moved[:, 0].min() + moved[:, 0].max()) / 2 * WIDTH, abs=1)
+    assert (y0 + y1) / 2 == pytest.approx((moved[:, 1].min() + moved[:, 1].max()) / 2 * HEIGHT, abs=1)
+
+
+def test_lost_roi_redetects_on_full_frame(detector, image):
+    detector.process(image)
+    detector.roi_face_mesh.points = None
+    results = detector.process(image)
+
+    # Same frame, second try on the full image
+    assert len(detector.roi_face_mesh.shapes) == 1
+    assert detector.face_mesh.shapes == [(HEIGHT, WIDTH, 3)] * 2
+    assert results.multi_face_landmarks
+    assert detector.roi is not None
+
+    detector.face_mesh.points = None
+    assert not detector.process(image).multi_face_landmarks
+    assert detector.roi is None
+    # Without a ROI the next frame goes straight to the full frame
+    detector.process(image)
+    assert len(detector.roi_face_mesh.shapes) == 2
+    assert len(detector.face_mesh.shapes) == 4
+
+
+def test_edge_and_tiny_faces(detector, image):
+    # The ROI is clamped to the frame
+    detector.face_mesh.points = face_points(0.02, 0.95)
+    detector.process(image)
+    x0, y0, x1, y1 = detector.roi
+    assert x0 == 0 and y1 == HEIGHT and x1 > x0 and y1 > y0
+
+    # A face a few pixels wide gives no usable ROI
+    detector.roi = None
+    detector.face_mesh.points = face_points(size=0.005)
+    detector.process(image)
+    assert detector.roi is None
@@ -0,0 +1,81 @@
+import os
+import signal
+import sys
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from distance_estimator import DistanceEstimator
+from face_mesh_worker import WorkerPipeline
+from frame_pipeline import FrameProcessor
+from head_controller import HeadController
+
+
+class BlankCamera:
+    def __init__(self):
+        self.frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self):
+        time.sleep(0.005)
+        return True, self.frame.copy()
+
+
+def read_packet(pipeline, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        packet = pipeline.read()
+        if packet is not None:
+            return packet
+    return None
+
+
+@pytest.fixture
+def pipeline():
+    estimator = DistanceEstimator()
+    processor = FrameProcessor(None, estimator, HeadController(estimator), None)
+    pipeline = WorkerPipeline(BlankCamera(), processor, read_timeout=0.1, restart_delay=3.0).start()
+    yield pipeline
+    pipeline.stop()
+
+
+def test_frames_resume_after_worker_is_killed(pipeline):
+    assert read_packet(pipeline, 30) is not None
+    os.kill(pipeline._process.pid, signal.SIGKILL)
+
+    # The worker took less than restart_delay to start, so the restart has to wait;
+    # read() keeps returning promptly meanwhile
+    slowest = 0.0
+    deadline = time.monotonic() + 0.8
+    while time.monotonic() < deadline:
+        t0 = time.monotonic()
+        pipeline.read()
+        slowest = max(slowest, time.monotonic() - t0)
+    assert slowest < 0.5
+
+    packet = read_packet(pipeline, 30)
+    assert packet is not None
+    assert pipeline.restarts == 1
+
+
+def test_stop_during_restart_delay(pipeline):
+    pipeline.restart_delay = 30.0
+    assert read_packet(pipeline, 30) is not None
+    os.kill(pipeline._process.pid, signal.SIGKILL)
+    deadline = time.monotonic() + 5
+    while pipeline._restart_at is None and time.monotonic() < deadline:
+        pipeline.read()
+    assert pipeline._restart_at is not None
+
+    t0 = time.monotonic()
+    pipeline.stop()
+    assert time.monotonic() - t0 < 3
+    assert pipeline.restarts == 0
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from distance_estimator import DistanceEstimator
+from frame_pipeline import FramePacket, FrameProcessor
+from gaze_predictor import GazePredictor
+from head_controller import HeadController
+from landmarks import NUM_LANDMARKS, FaceMeshResults
+
+WIDTH, HEIGHT = 1280, 720
+
+
+class FixedBackend:
+    num_classes = 3
+
+    def forward(self, features):
+        logits = np.zeros((len(features), self.num_classes), dtype=np.float32)
+        logits[:, 2] = 1.0
+        return logits
+
+
+class LandmarkList:
+    # Minimal landmark container without SerializeToString, like non-protobuf detectors
+    def __init__(self, points):
+        self.landmark = [type("Landmark", (), {"x": x, "y": y, "z": z})() for x, y, z in points.tolist()]
+
+
+def stable_face(shift=0.0):
+    # Centred, eyes on the upper third and about 60 cm away
+    points = np.full((NUM_LANDMARKS, 3), 0.5, dtype=np.float32)
+    points[:, 0] += shift
+    points[1, 0] = 0.5 + shift
+    points[[159, 145, 386, 374], 1] = 1 / 3 + 0.001
+    points[33, 0], points[263, 0] = 0.5 - 0.118, 0.5 + 0.118
+    return points
+
+
+def analyze(processor, faces, frame_id=0):
+    packet = FramePacket(frame_id, np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8), 0.0, 0.0)
+    packet.results = FaceMeshResults([LandmarkList(points) for points in faces])
+    return processor.analyze(packet)
+
+
+def make_processor(max_faces=1):
+    estimator = DistanceEstimator()
+    predictor = GazePredictor(None, None, backend=FixedBackend())
+    return FrameProcessor(None, estimator, HeadController(estimator), predictor, max_faces=max_faces)
+
+
+def test_stable_face_is_predicted():
+    packet = analyze(make_processor(), [stable_face()])
+    assert packet.is_stable
+    assert packet.predicted_column == 2
+    assert 50 <= packet.distance <= 70
+
+
+def test_packets_keep_their_landmarks():
+    processor = make_processor()
+    first = analyze(processor, [stable_face()], 0)
+    analyze(processor, [stable_face(0.02)], 1)
+    # The processor reuses its landmark buffer; the earlier packet must not change
+    np.testing.assert_array_equal(first.landmark_array, stable_face())
+
+
+def test_more_faces_than_buffer():
+    processor = make_processor(max_faces=1)
+    unstable = stable_face(0.3)
+    packet = analyze(processor, [unstable, stable_face(), stable_face(0.01)])
+    assert packet.predictions.tolist() == [2, 2]
+    np.testing.assert_array_equal(packet.landmark_array, stable_face())
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from gallery_store import GalleryStore
+
+WIDTH, HEIGHT = 64, 48
+
+
+class CountingStore(GalleryStore):
+    def __init__(self, *args, **kwargs):
+        self.decoded = []
+        super().__init__(*args, **kwargs)
+
+    def _decode(self, idx):
+        self.decoded.append(idx)
+        return super()._decode(idx)
+
+
+def wait_for_prefetch(store, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with store._lock:
+            if not store._pending:
+                return
+        time.sleep(0.005)
+    raise AssertionError("prefetch did not finish")
+
+
+def cached(store):
+    with store._lock:
+        return list(store._cache)
+
+
+@pytest.fixture
+def gallery_dir(tmp_path):
+    # One solid grey level per image, so a frame tells which file it came from
+    for i in range(6):
+        cv2.imwrite(str(tmp_path / f"{i:02d}.png"), np.full((30, 40, 3), 10 * (i + 1), dtype=np.uint8))
+    (tmp_path / "notes.txt").write_text("not an image")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def store(gallery_dir):
+    store = CountingStore(gallery_dir, WIDTH, HEIGHT, capacity=3, prefetch_radius=1)
+    yield store
+    store.close()
+
+
+def test_images_are_resized_and_wrap_around(store):
+    assert len(store) == 6
+    image = store.get(2)
+    assert image.shape == (HEIGHT, WIDTH, 3)
+    assert (image == 30).all()
+    assert (store.get(-1) == 60).all()
+    assert (store.get(7) == 20).all()
+
+
+def test_neighbours_are_prefetched(store):
+    store.get(2)
+    wait_for_prefetch(store)
+    assert sorted(cached(store)) == [1, 2, 3]
+
+    # Stepping to a prefetched neighbour is a cache hit; only the new neighbour is decoded
+    store.decoded.clear()
+    assert (store.get(3) == 40).all()
+    wait_for_prefetch(store)
+    assert store.decoded == [4]
+
+
+def test_least_recently_used_is_evicted(store):
+    for idx in range(6):
+        store.get(idx)
+        wait_for_prefetch(store)
+        assert len(cached(store)) <= store.capacity
+
+    # Walking forward keeps the current image and both neighbours
+    assert sorted(cached(store)) == [0, 4, 5]
+
+    store.decoded.clear()
+    store.get(2)
+    assert store.decoded[0] == 2
+    wait_for_prefetch(store)
+    assert sorted(cached(store)) == [1, 2, 3]
+
+
+def test_capacity_covers_prefetch_radius(gallery_dir):
+    store = GalleryStore(gallery_dir, WIDTH, HEIGHT, capacity=1, prefetch_radius=2)
+    try:
+        assert store.capacity == 5
+    finally:
+        store.close()
+
+
+def test_empty_gallery_returns_placeholder(tmp_path):
+    store = GalleryStore(str(tmp_path / "missing"), WIDTH, HEIGHT)
+    try:
+        assert len(store) == 0
+        image = store.get(3)
+        assert image.shape == (HEIGHT, WIDTH, 3)
+        assert image is store.get(0)
+    finally:
+        store.close()
@@ -0,0 +1,130 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from gaze_predictor import GazePredictor, MotionGate
+
+
+class FixedBackend:
+    num_classes = 3
+
+    def forward(self, features):
+        logits = np.zeros((len(features), self.num_classes), dtype=np.float32)
+        logits[:, 1] = 1.0
+        return logits
+
+
+def test_predict_batch_empty_landmarks():
+    predictor = GazePredictor(None, None, backend=FixedBackend())
+    predictions, probabilities = predictor.predict_batch(np.empty((0, 478, 3), dtype=np.float32))
+    assert predictions.shape == (0,)
+    assert probabilities.shape == (0, 3)
+
+
+def test_predict_batch_landmarks_match_features():
+    predictor = GazePredictor(None, None, backend=FixedBackend())
+    faces = np.random.default_rng(0).random((4, 478, 3), dtype=np.float32)
+    features = predictor.extract_batch_features(faces)
+    expected = np.stack([predictor.extract_features(face).copy() for face in faces])
+    np.testing.assert_array_equal(features, expected)
+    predictions, _ = predictor.predict_batch(faces)
+    assert predictions.tolist() == [1, 1, 1, 1]
+
+
+class CountingBackend:
+    # Class follows the mean of the features, so a cached answer can be told apart
+    num_classes = 3
+
+    def __init__(self):
+        self.rows = []
+
+    def forward(self, features):
+        self.rows.append(len(features))
+        logits = np.zeros((len(features), self.num_classes), dtype=np.float32)
+        logits[np.arange(len(features)), (features.mean(axis=1) * 30).astype(int) % 3] = 1.0
+        return logits
+
+
+def features(rng, n):
+    return rng.uniform(0.3, 0.7, (n, 10)).astype(np.float32)
+
+
+def test_motion_gate_reuses_still_faces():
+    rng = np.random.default_rng(0)
+    backend = CountingBackend()
+    gate = MotionGate(epsilon=0.01)
+    forward = GazePredictor(None, None, backend=backend)._forward
+
+    still = features(rng, 3)
+    first, probabilities = gate.predict(still, forward)
+    assert backend.rows == [3]
+
+    # Tiny jitter stays under epsilon: no model call and the cached answer comes back
+    again, cached = gate.predict(still + 1e-4, forward)
+    assert backend.rows == [3]
+    np.testing.assert_array_equal(again, first)
+    np.testing.assert_array_equal(cached, probabilities)
+
+    # Only the face that moved goes through the model
+    moved = still.copy()
+    moved[1] = features(rng, 1)[0]
+    classes, _ = gate.predict(moved, forward)
+    assert backend.rows == [3, 1]
+    assert classes.tolist() == forward(moved)[0].tolist()
+    assert (gate.hits, gate.misses) == (5, 4)
+    assert gate.hit_rate == 5 / 9
+
+    # Returned arrays are copies, so callers cannot corrupt the cache
+    classes[:] = -1
+    assert gate.predict(moved, forward)[0].tolist() == forward(moved)[0].tolist()
+
+
+def test_motion_gate_resets_on_face_count():
+    rng = np.random.default_rng(1)
+    backend = CountingBackend()
+    gate = MotionGate(epsilon=0.01)
+    forward = GazePredictor(None, None, backend=backend)._forward
+
+    faces = features(rng, 2)
+    gate.predict(faces, forward)
+    gate.predict(faces[:1], forward)
+    gate.predict(faces[:1], forward)
+    assert backend.rows == [2, 1]
+
+    gate.reset()
+    gate.predict(faces[:1], forward)
+    assert backend.rows == [2, 1, 1]
+
+
+def test_motion_is_relative_to_face_width():
+    rng = np.random.default_rng(2)
+    gate = MotionGate(epsilon=0.01)
+    near = features(rng, 1)
+    delta = rng.standard_normal(near.shape).astype(np.float32) * 0.01
+
+    gate._features = near
+    motion_near = gate.motion(near + delta)
+    # The same movement seen from twice as far is half the size in normalized units
+    gate._features = near / 2
+    np.testing.assert_allclose(gate.motion(near / 2 + delta / 2), motion_near, rtol=1e-5)
+
+
+def test_predictor_with_gate_matches_ungated():
+    rng = np.random.default_rng(3)
+    faces = rng.random((1, 478, 3), dtype=np.float32)
+    ungated = GazePredictor(None, None, backend=CountingBackend())
+    gated = GazePredictor(None, None, backend=CountingBackend(), motion_epsilon=0.01)
+
+    for _ in range(5):
+        assert gated.predict_batch(faces)[0].tolist() == ungated.predict_batch(faces)[0].tolist()
+        faces = faces + rng.normal(0, 0.02, faces.shape).astype(np.float32)
+    assert gated.gate.misses == 5
+    assert len(gated.backend.rows) == 5
+
+    for _ in range(5):
+        assert gated.predict_batch(faces)[0].tolist() == ungated.predict_batch(faces)[0].tolist()
+    assert gated.gate.hits == 4
+    assert len(gated.backend.rows) == 6
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from gaze_predictor import GazePredictor
+from gaze_server import BatchingInferenceServer, GazeClient
+
+INPUT_DIM = len(GazePredictor.FEATURE_INDEX)
+
+
+class ColumnBackend:
+    # Predicts the column stored in the first feature
+    num_classes = 3
+
+    def forward(self, features):
+        logits = np.zeros((len(features), self.num_classes), dtype=np.float32)
+        logits[np.arange(len(features)), features[:, 0].astype(int)] = 1.0
+        return logits
+
+
+def start_server(address, backend=None):
+    server = BatchingInferenceServer(backend or ColumnBackend(), INPUT_DIM, max_wait_ms=0.5)
+    thread = threading.Thread(
+        target=asyncio.run, args=(server.serve(address, handle_signals=False),), daemon=True,
+    )
+    thread.start()
+    deadline = time.monotonic() + 5
+    while server._stop is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return server, thread
+
+
+def stop_server(server, thread):
+    server.stop()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def features(column, rows=1):
+    batch = np.zeros((rows, INPUT_DIM), dtype=np.float32)
+    batch[:, 0] = column
+    return batch
+
+
+@pytest.fixture
+def address(tmp_path):
+    return f"unix:{tmp_path / 'gaze.sock'}"
+
+
+def test_predictions_through_server(address):
+    server, thread = start_server(address)
+    try:
+        predictor = GazePredictor(None, None, backend=GazeClient(address))
+        classes, probabilities = predictor.predict_batch(features(2, rows=3))
+        assert classes.tolist() == [2, 2, 2]
+        assert probabilities.shape == (3, 3)
+    finally:
+        stop_server(server, thread)
+
+
+def test_server_restart_mid_session(address, capsys):
+    server, thread = start_server(address)
+    client = GazeClient(address, retry_interval=0.05)
+    predictor = GazePredictor(None, None, backend=client)
+    assert predictor.predict_batch(features(1))[0].tolist() == [1]
+
+    stop_server(server, thread)
+    # Frames while the server is down get no prediction instead of an exception
+    for _ in range(5):
+        assert predictor.predict_batch(features(1)) == (None, None)
+    assert predictor.backend_error is not None
+    assert capsys.readouterr().out.count("Gaze backend unavailable") == 1
+
+    server, thread = start_server(address)
+    try:
+        time.sleep(0.1)
+        assert predictor.predict_batch(features(0))[0].tolist() == [0]
+        assert predictor.backend_error is None
+    finally:
+        stop_server(server, thread)
+
+
+def test_server_error_reaches_client(address):
+    class FailingBackend(ColumnBackend):
+        def forward(self, features):
+            raise ValueError("bad features")
+
+    server, thread = start_server(address, FailingBackend())
+    try:
+        client = GazeClient(address)
+        with pytest.raises(RuntimeError, match="bad features"):
+            client.forward(features(1))
+    finally:
+        stop_server(server, thread)
@@ -0,0 +1,110 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from distance_estimator import DistanceEstimator
+from head_controller import HeadController
+
+
+@pytest.fixture(scope="module")
+def frames():
+    # Random faces around the stable region, so every check passes and fails often
+    rng = np.random.default_rng(1)
+    n = 20000
+    landmarks = (rng.random((n, 478, 3)) * 0.3 + 0.35).astype(np.float32)
+    landmarks[:, 1, 0] = rng.normal(0.5, 0.05, n)
+    landmarks[:, [159, 145, 386, 374], 1] = rng.normal(0.333, 0.03, (n, 4))
+    landmarks[:, 33, 0] = 0.5 - rng.gamma(3, 0.05, n) / 2
+    landmarks[:, 263, 0] = 0.5 + rng.gamma(3, 0.05, n) / 2
+    # Zero face width
+    landmarks[:5, 263] = landmarks[:5, 33]
+    widths = rng.choice([640, 1280, 1920], n)
+    heights = rng.choice([480, 720, 1080], n)
+    return landmarks, widths, heights
+
+
+def scalar_checks(estimator, head_controller, landmarks, width, height):
+    pixel_face_width = estimator.calculate_pixel_distance(landmarks[33], landmarks[263], width, height)
+    horizontal_ok, vertical_ok = head_controller.is_head_position_valid(landmarks, width, height)
+    distance_ok, distance = head_controller.is_distance_valid(pixel_face_width)
+    return horizontal_ok, vertical_ok, distance_ok, distance, pixel_face_width
+
+
+def test_batch_matches_per_frame(frames):
+    landmarks, widths, heights = frames
+    estimator = DistanceEstimator()
+    head_controller = HeadController(estimator)
+
+    expected = np.array([
+        [np.nan if value is None else value for value in
+         scalar_checks(estimator, head_controller, landmarks[i], int(widths[i]), int(heights[i]))]
+        for i in range(len(landmarks))
+    ], dtype=np.float64)
+
+    horizontal_ok, vertical_ok, distance_ok, distances = head_controller.validate_batch(landmarks, widths, heights)
+    pixel_face_widths = estimator.pixel_face_widths(landmarks, widths, heights)
+
+    np.testing.assert_array_equal(horizontal_ok, expected[:, 0].astype(bool))
+    np.testing.assert_array_equal(vertical_ok, expected[:, 1].astype(bool))
+    np.testing.assert_array_equal(distance_ok, expected[:, 2].astype(bool))
+    np.testing.assert_array_equal(distances, expected[:, 3])
+    np.testing.assert_array_equal(pixel_face_widths, expected[:, 4])
+    # The fixture has to exercise both outcomes of every check
+    assert 0 < (horizontal_ok & vertical_ok & distance_ok).mean() < 1
+    assert np.isnan(distances[:5]).all()
+
+
+def test_scalar_image_size_matches_per_frame(frames):
+    landmarks = frames[0][:2000]
+    estimator = DistanceEstimator()
+    head_controller = HeadController(estimator)
+
+    horizontal_ok, vertical_ok, distance_ok, _ = head_controller.validate_batch(landmarks, 1280, 720)
+    for i, face in enumerate(landmarks):
+        checks = scalar_checks(estimator, head_controller, face, 1280, 720)
+        assert checks[:3] == (horizontal_ok[i], vertical_ok[i], distance_ok[i])
+
+
+def test_landmark_objects_match_arrays(frames):
+    landmarks = frames[0][:500]
+    estimator = DistanceEstimator()
+    head_controller = HeadController(estimator)
+
+    for face in landmarks:
+        objects = [SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z in face]
+        assert head_controller.is_head_position_valid(objects, 1280, 720) == \
+            head_controller.is_head_position_valid(face, 1280, 720)
+        assert estimator.calculate_pixel_distance(objects[33], objects[263], 1280, 720) == \
+            estimator.calculate_pixel_distance(face[33], face[263], 1280, 720)
+
+
+@pytest.mark.parametrize("seed", [2, 3, 4])
+def test_random_sizes_scalar_matches_batch(seed):
+    # Odd image sizes and landmarks anywhere in the frame, so truncation and the
+    # threshold edges are hit from both sides
+    rng = np.random.default_rng(seed)
+    n = 3000
+    landmarks = rng.random((n, 478, 3)).astype(np.float32)
+    landmarks[:, 1, 0] = rng.normal(0.5, 0.08, n)
+    landmarks[:, [159, 145, 386, 374], 1] = rng.normal(0.333, 0.05, (n, 4))
+    widths = rng.integers(100, 4000, n)
+    heights = rng.integers(100, 3000, n)
+    estimator = DistanceEstimator()
+    head_controller = HeadController(estimator)
+
+    horizontal_ok, vertical_ok, distance_ok, distances = head_controller.validate_batch(landmarks, widths, heights)
+    pixel_face_widths = estimator.pixel_face_widths(landmarks, widths, heights)
+    for i in range(n):
+        checks = scalar_checks(estimator, head_controller, landmarks[i], int(widths[i]), int(heights[i]))
+        assert checks[:3] == (horizontal_ok[i], vertical_ok[i], distance_ok[i])
+        assert checks[4] == pixel_face_widths[i]
+        if checks[3] is None:
+            assert np.isnan(distances[i])
+        else:
+            assert checks[3] == distances[i]
+    assert 0 < horizontal_ok.mean() < 1 and 0 < vertical_ok.mean() < 1
@@ -0,0 +1,134 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")
+from mediapipe.framework.formats import landmark_pb2
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from keyframe_detector import KeyframeFaceMeshDetector
+from landmarks import NUM_LANDMARKS, FaceMeshResults, array_to_landmarks, landmarks_to_array
+
+# No larger than flow_width, so flow runs on the frame itself
+WIDTH, HEIGHT = 320, 240
+
+
+def texture(seed=0):
+    noise = np.random.default_rng(seed).integers(0, 256, (HEIGHT + 40, WIDTH + 40), dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (0, 0), 2.0)
+
+
+def shifted(background, dx, dy):
+    # A 3-channel view of the texture moved by (dx, dy) pixels
+    x, y = 20 - dx, 20 - dy
+    return cv2.cvtColor(background[y:y + HEIGHT, x:x + WIDTH], cv2.COLOR_GRAY2BGR)
+
+
+def face_pixels(dx=0, dy=0):
+    # Landmarks on a grid over the middle of the frame, in pixels
+    grid = np.stack(np.meshgrid(np.linspace(110, 210, 22), np.linspace(70, 170, 22)), axis=-1).reshape(-1, 2)
+    points = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+    points[:, :2] = grid[:NUM_LANDMARKS] + (dx, dy)
+    points[:, 2] = np.linspace(-0.05, 0.05, NUM_LANDMARKS)
+    return points
+
+
+def normalized(points):
+    points = points.copy()
+    points[:, 0] /= WIDTH
+    points[:, 1] /= HEIGHT
+    return points
+
+
+class ScriptedMesh:
+    # Reports the landmarks for the current shift, so keyframes are exact
+    def __init__(self):
+        self.shift = (0, 0)
+        self.face = True
+        self.calls = 0
+
+    def process(self, image):
+        self.calls += 1
+        if not self.face:
+            return FaceMeshResults()
+        points = normalized(face_pixels(*self.shift))
+        return FaceMeshResults([array_to_landmarks(points, landmark_pb2.NormalizedLandmarkList())])
+
+
+@pytest.fixture
+def mesh():
+    return ScriptedMesh()
+
+
+@pytest.fixture
+def detector(mesh):
+    return KeyframeFaceMeshDetector(mesh, keyframe_interval=3, max_keyframe_age=60.0)
+
+
+def step(detector, mesh, background, dx, dy):
+    mesh.shift = (dx, dy)
+    return detector.process(shifted(background, dx, dy))
+
+
+def test_landmarks_follow_flow_between_keyframes(detector, mesh):
+    background = texture()
+    keyframes = []
+    for dx, dy in [(0, 0), (2, 1), (4, 2), (6, 3), (8, 4), (10, 5), (12, 6)]:
+        results = step(detector, mesh, background, dx, dy)
+        keyframes.append(detector.is_keyframe)
+
+        landmarks = landmarks_to_array(results.multi_face_landmarks[0])
+        expected = normalized(face_pixels(dx, dy))
+        # Flow moves x and y to within a fraction of a pixel; z stays at the keyframe's
+        np.testing.assert_allclose(landmarks[:, 0] * WIDTH, expected[:, 0] * WIDTH, atol=0.25)
+        np.testing.assert_allclose(landmarks[:, 1] * HEIGHT, expected[:, 1] * HEIGHT, atol=0.25)
+        np.testing.assert_array_equal(landmarks[:, 2], expected[:, 2])
+
+    assert keyframes == [True, False, False, True, False, False, True]
+    assert mesh.calls == 3
+    assert detector.stats()["propagated_frames"] == 4
+    assert detector.last_drift_px is not None and detector.mean_drift_px < 0.25
+
+
+def test_fast_motion_forces_keyframe(detector, mesh):
+    background = texture()
+    step(detector, mesh, background, 0, 0)
+    # 12 px against a 100 px face is beyond max_motion
+    step(detector, mesh, background, 12, 0)
+    assert detector.is_keyframe
+    assert mesh.calls == 2
+
+
+def test_lost_tracking_forces_keyframe(detector, mesh):
+    step(detector, mesh, texture(), 0, 0)
+    # Covered camera: most points cannot be tracked
+    detector.process(np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8))
+    assert detector.is_keyframe
+    assert mesh.calls == 2
+
+
+def test_no_face_is_not_propagated(detector, mesh):
+    background = texture()
+    mesh.face = False
+    assert not step(detector, mesh, background, 0, 0).multi_face_landmarks
+    assert not step(detector, mesh, background, 1, 0).multi_face_landmarks
+    assert mesh.calls == 2
+
+    mesh.face = True
+    step(detector, mesh, background, 2, 0)
+    step(detector, mesh, background, 3, 0)
+    assert not detector.is_keyframe
+    assert mesh.calls == 3
+
+
+def test_keyframe_age_limit(mesh):
+    detector = KeyframeFaceMeshDetector(mesh, keyframe_interval=100, max_keyframe_age=0.0)
+    background = texture()
+    step(detector, mesh, background, 0, 0)
+    step(detector, mesh, background, 1, 0)
+    assert detector.is_keyframe
+    assert mesh.calls == 2
@@ -0,0 +1,127 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from distance_estimator import DistanceEstimator
+from gaze_predictor import GazePredictor
+from head_controller import HeadController
+from landmark_recorder import HEADER_SIZE, RECORD_DTYPE, LandmarkRecorder, open_recording
+from landmarks import NUM_LANDMARKS
+from replay import ReplayEngine, evaluation_mask
+
+WIDTH, HEIGHT = 1280, 720
+
+
+class FixedBackend:
+    num_classes = 3
+
+    def forward(self, features):
+        logits = np.zeros((len(features), self.num_classes), dtype=np.float32)
+        logits[:, 2] = 1.0
+        return logits
+
+
+def stable_face(shift=0.0):
+    # Centred, eyes on the upper third and about 60 cm away
+    points = np.full((NUM_LANDMARKS, 3), 0.5, dtype=np.float32)
+    points[:, 0] += shift
+    points[1, 0] = 0.5 + shift
+    points[[159, 145, 386, 374], 1] = 1 / 3 + 0.001
+    points[33, 0], points[263, 0] = 0.5 - 0.118, 0.5 + 0.118
+    return points
+
+
+@pytest.fixture
+def recording(tmp_path):
+    # Stable faces, a face off to the side, a missing face and a frame without a target
+    frames = [
+        (stable_face(), 0, 1.0),
+        (stable_face(0.005), 1, 1.5),
+        (stable_face(0.3), 1, 2.0),
+        (None, 2, 2.5),
+        (stable_face(), None, 0.0),
+        (stable_face(), 2, 0.1),
+    ]
+    path = str(tmp_path / "session.etlm")
+    recorder = LandmarkRecorder(path)
+    for i, (landmarks, target, target_age) in enumerate(frames):
+        recorder.write(100.0 + i / 30, landmarks, WIDTH, HEIGHT, target, target_age)
+    recorder.close()
+    return path, frames
+
+
+def test_records_round_trip(recording):
+    path, frames = recording
+    records = open_recording(path)
+    assert len(records) == len(frames)
+    assert os.path.getsize(path) == HEADER_SIZE + len(frames) * RECORD_DTYPE.itemsize
+
+    for i, (landmarks, target, target_age) in enumerate(frames):
+        record = records[i]
+        assert record["timestamp"] == 100.0 + i / 30
+        assert record["target"] == (-1 if target is None else target)
+        assert record["target_age"] == np.float32(target_age)
+        assert (record["image_width"], record["image_height"]) == (WIDTH, HEIGHT)
+        assert record["has_face"] == (landmarks is not None)
+        expected = np.zeros((NUM_LANDMARKS, 3), np.float32) if landmarks is None else landmarks
+        np.testing.assert_array_equal(record["landmarks"], expected)
+
+
+def test_partial_record_is_dropped_on_append(recording):
+    path, frames = recording
+    with open(path, "ab") as f:
+        f.write(b"\1" * (RECORD_DTYPE.itemsize // 2))
+    assert len(open_recording(path)) == len(frames)
+
+    recorder = LandmarkRecorder(path)
+    recorder.write(200.0, stable_face(), WIDTH, HEIGHT, 0, 1.0)
+    recorder.close()
+
+    records = open_recording(path)
+    assert len(records) == len(frames) + 1
+    assert records[-1]["timestamp"] == 200.0
+    np.testing.assert_array_equal(records[-1]["landmarks"], stable_face())
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = str(tmp_path / "other.etlm")
+    with open(path, "wb") as f:
+        f.write(b"\0" * HEADER_SIZE)
+    with pytest.raises(ValueError):
+        open_recording(path)
+    with pytest.raises(ValueError):
+        LandmarkRecorder(path)
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 4096])
+def test_replay_matches_live_checks(recording, batch_size):
+    path, frames = recording
+    records = open_recording(path)
+    estimator = DistanceEstimator()
+    head_controller = HeadController(estimator)
+    engine = ReplayEngine(estimator, head_controller, batch_size=batch_size)
+
+    # Replay must reach the same verdicts as the per-frame checks made while recording
+    expected = []
+    for landmarks, _, _ in frames:
+        if landmarks is None:
+            expected.append(False)
+            continue
+        horizontal_ok, vertical_ok = head_controller.is_head_position_valid(landmarks, WIDTH, HEIGHT)
+        width = estimator.calculate_pixel_distance(landmarks[33], landmarks[263], WIDTH, HEIGHT)
+        distance_ok, _ = head_controller.is_distance_valid(width)
+        expected.append(bool(horizontal_ok and vertical_ok and distance_ok))
+    stable = engine.validate(records)
+    assert stable.tolist() == expected == [True, True, False, False, True, True]
+
+    predictions = engine.predict(GazePredictor(None, None, backend=FixedBackend()), records, stable)
+    assert predictions.tolist() == [2, 2, -1, -1, 2, 2]
+
+    # Frames without a target or shortly after the target moved are not scored
+    mask = evaluation_mask(records, stable, reaction_delay=0.5)
+    assert mask.tolist() == [True, True, False, False, False, False]
+
@@ -0,0 +1,89 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+landmark_pb2 = pytest.importorskip("mediapipe.framework.formats.landmark_pb2")
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from landmarks import (
+    NUM_LANDMARKS, _wire_records, array_to_landmarks, landmarks_to_array, remap_landmarks, write_landmarks,
+)
+
+
+def make_landmark_list(points, visibility=False):
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in points.tolist():
+        landmark = landmark_list.landmark.add(x=x, y=y, z=z)
+        if visibility:
+            landmark.visibility = 0.9
+    return landmark_list
+
+
+def attribute_loop(landmark_list):
+    return np.array([(lm.x, lm.y, lm.z) for lm in landmark_list.landmark], dtype=np.float32)
+
+
+@pytest.fixture
+def points():
+    return np.random.default_rng(0).uniform(-0.5, 1.5, (NUM_LANDMARKS, 3)).astype(np.float32)
+
+
+def test_fast_path_matches_attribute_loop(points):
+    landmark_list = make_landmark_list(points)
+    assert _wire_records(landmark_list) is not None
+    np.testing.assert_array_equal(landmarks_to_array(landmark_list), attribute_loop(landmark_list))
+    np.testing.assert_array_equal(landmarks_to_array(landmark_list), points)
+
+
+def test_other_layouts_fall_back(points):
+    # visibility adds a field to every record, so the wire layout no longer matches
+    landmark_list = make_landmark_list(points, visibility=True)
+    assert _wire_records(landmark_list) is None
+    np.testing.assert_array_equal(landmarks_to_array(landmark_list), attribute_loop(landmark_list))
+
+    # A landmark without z serializes shorter and shifts every record after it
+    landmark_list = make_landmark_list(points)
+    landmark_list.landmark[5].ClearField("z")
+    points[5, 2] = 0.0
+    assert _wire_records(landmark_list) is None
+    np.testing.assert_array_equal(landmarks_to_array(landmark_list), points)
+
+
+def test_record_count_is_checked(points):
+    class Mismatched:
+        # Serialized bytes that look valid but describe fewer landmarks than the list holds
+        def __init__(self, landmark_list):
+            self.landmark = list(landmark_list.landmark) + [landmark_list.landmark[0]]
+            self._bytes = landmark_list.SerializeToString()
+
+        def SerializeToString(self):
+            return self._bytes
+
+    mismatched = Mismatched(make_landmark_list(points))
+    assert _wire_records(mismatched) is None
+    assert landmarks_to_array(mismatched).shape == (NUM_LANDMARKS + 1, 3)
+
+
+def test_out_buffer_is_reused(points):
+    out = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+    assert landmarks_to_array(make_landmark_list(points), out) is out
+    np.testing.assert_array_equal(out, points)
+
+
+def test_writers_match_attribute_updates(points):
+    landmark_list = make_landmark_list(points)
+    remap_landmarks(landmark_list, 0.5, 0.1, 2.0, -0.2)
+    expected = points.copy()
+    expected[:, 0] = expected[:, 0] * np.float32(0.5) + np.float32(0.1)
+    expected[:, 1] = expected[:, 1] * np.float32(2.0) - np.float32(0.2)
+    np.testing.assert_allclose(attribute_loop(landmark_list), expected, rtol=1e-6, atol=1e-7)
+
+    moved = points[:, :2] + 0.25
+    write_landmarks(landmark_list, moved)
+    np.testing.assert_array_equal(attribute_loop(landmark_list)[:, :2], moved)
+
+    rebuilt = array_to_landmarks(points, landmark_pb2.NormalizedLandmarkList())
+    np.testing.assert_array_equal(attribute_loop(rebuilt), points)
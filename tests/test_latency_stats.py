@@ -0,0 +1,61 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from latency_stats import LatencyHistogram, LatencyStats, RingBuffer
+
+STAGES = ["detection_ms", "latency_ms"]
+
+
+def test_histogram_quantiles_within_bucket_error():
+    values = np.random.default_rng(0).lognormal(2.0, 0.7, 50000)
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.add(value)
+    for q, estimate in zip((0.5, 0.95, 0.99), histogram.quantiles([0.5, 0.95, 0.99])):
+        exact = np.quantile(values, q)
+        assert abs(estimate / exact - 1) < 0.03
+
+
+def test_histogram_merge_matches_single_histogram():
+    values = np.random.default_rng(1).lognormal(1.0, 1.0, 2000)
+    merged, first, second = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, value in enumerate(values):
+        merged.add(value)
+        (first if i % 2 else second).add(value)
+    first.merge(second)
+    assert first.counts.tolist() == merged.counts.tolist()
+    assert first.quantiles([0.5, 0.99]) == merged.quantiles([0.5, 0.99])
+    assert np.isclose(first.summary()["avg"], merged.summary()["avg"])
+
+
+def test_ring_buffer_keeps_last_rows_in_order():
+    buffer = RingBuffer(4, 2)
+    for i in range(10):
+        buffer.append([i, i * 10])
+    assert buffer.total == 10
+    assert buffer.values()[:, 0].tolist() == [6, 7, 8, 9]
+
+
+def test_recent_percentiles_follow_the_last_frames():
+    stats = LatencyStats(STAGES, recent_samples=100)
+    # A slow start that has dropped out of the recent window
+    for i in range(1000):
+        stats.record(float(i), {"detection_ms": 50.0 if i < 500 else 5.0, "latency_ms": 10.0})
+    assert stats.count == 1000
+    assert len(stats.recent.values()) == 100
+    assert stats.recent_percentiles("detection_ms") == [5.0, 5.0, 5.0]
+    # The session-wide histogram still sees the slow frames
+    assert stats.percentiles("detection_ms")[2] > 45
+
+
+def test_stages_that_did_not_run_are_left_out():
+    stats = LatencyStats(STAGES)
+    for i in range(10):
+        stats.record(float(i), {"latency_ms": 10.0})
+    assert stats.recent_percentiles("detection_ms") == [None, None, None]
+    assert "detection_ms" not in stats.summary()
+    assert stats.summary()["latency_ms"]["count"] == 10
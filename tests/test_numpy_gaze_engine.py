@@ -0,0 +1,86 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.append(SRC)
+
+from numpy_gaze_engine import NumpyGazeEngine, default_cache_path, source_signature
+
+MODEL = os.path.join(SRC, "models", "gc_1x3_loso.pth")
+SCALER = os.path.join(SRC, "scalers", "scaler_1x3_loso.pkl")
+
+
+@pytest.fixture
+def sources(tmp_path):
+    model, scaler = str(tmp_path / "gc.pth"), str(tmp_path / "scaler.pkl")
+    shutil.copy(MODEL, model)
+    shutil.copy(SCALER, scaler)
+    return model, scaler
+
+
+def test_signature_follows_content_not_mtime(sources):
+    model, scaler = sources
+    signature = source_signature(model, scaler)
+    os.utime(model, (0, 0))
+    assert source_signature(model, scaler) == signature
+
+    with open(scaler, "ab") as f:
+        f.write(b"\0")
+    assert source_signature(model, scaler) != signature
+    assert source_signature(model, scaler + ".missing") is None
+
+
+def test_export_matches_torch_and_is_reused(sources, capsys):
+    pytest.importorskip("torch")
+    from torch_gaze_backend import TorchGazeBackend
+
+    model, scaler = sources
+    engine = NumpyGazeEngine.from_checkpoint(model, scaler)
+    cache_path = default_cache_path(model, scaler)
+    assert os.path.exists(cache_path)
+
+    reference = TorchGazeBackend(model, scaler, 246)
+    features = np.random.default_rng(0).standard_normal((256, 246)).astype(np.float32)
+    features = features * reference.scaler.scale_ + getattr(reference.scaler, "center_", 0.0)
+    np.testing.assert_allclose(engine.forward(features), reference.forward(features), atol=1e-3)
+
+    # A touched checkpoint keeps the export
+    os.utime(model, (0, 0))
+    capsys.readouterr()
+    NumpyGazeEngine.from_checkpoint(model, scaler)
+    assert "re-exporting" not in capsys.readouterr().out
+
+
+def test_stale_export_without_torch_is_kept(sources, monkeypatch, capsys):
+    model, scaler = sources
+    cache_path = default_cache_path(model, scaler)
+    layers = [("linear", (np.eye(246, 3, dtype=np.float32), np.zeros(3, dtype=np.float32)))]
+    NumpyGazeEngine(layers).save(cache_path, "older checkpoint")
+
+    monkeypatch.setitem(sys.modules, "torch_gaze_backend", None)
+    engine = NumpyGazeEngine.from_checkpoint(model, scaler)
+    assert engine.num_classes == 3
+    out = capsys.readouterr().out
+    assert "stale" in out and "Cannot re-export without torch" in out
+
+
+def test_numpy_backend_imports_no_heavy_packages(sources):
+    pytest.importorskip("torch")
+    model, scaler = sources
+    NumpyGazeEngine.from_checkpoint(model, scaler)
+
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from gaze_predictor import GazePredictor;"
+        "predictor = GazePredictor(sys.argv[2], sys.argv[3], backend='numpy');"
+        "assert predictor.backend is not None;"
+        "print(sorted(m for m in ('torch', 'sklearn', 'mediapipe', 'joblib') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", script, SRC, model, scaler],
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
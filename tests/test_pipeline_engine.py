@@ -0,0 +1,149 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from frame_pipeline import FramePacket
+from landmark_recorder import LandmarkRecorder, open_recording
+from landmarks import NUM_LANDMARKS
+from pipeline_engine import NullSink, PipelineEngine, RecorderSink, Sink
+
+
+class ListPipeline:
+    # Hands out prepared packets; None entries are reads that produced nothing
+    def __init__(self, packets):
+        self.packets = list(packets)
+        self.started = False
+        self.stopped = False
+
+    @property
+    def running(self):
+        return bool(self.packets)
+
+    def start(self):
+        self.started = True
+        return self
+
+    def read(self):
+        return self.packets.pop(0)
+
+    def stop(self):
+        self.stopped = True
+
+
+class LoggingMode:
+    def __init__(self, log):
+        self.log = log
+
+    def start(self):
+        self.log.append("start")
+
+    def update(self, packet):
+        self.log.append(("update", packet.frame_id))
+
+    def after_frame(self, packet):
+        timed = packet.timings["ui_ms"] > 0 and packet.timings["latency_ms"] > 0
+        self.log.append(("after_frame", packet.frame_id, timed))
+
+    def recording_target(self, packet):
+        return packet.frame_id % 3, packet.frame_id * 0.25
+
+    def finish(self):
+        self.log.append("finish")
+
+
+class LoggingSink(Sink):
+    def __init__(self, log, name, stop_after=None):
+        self.log = log
+        self.name = name
+        self.stop_after = stop_after
+        self.emitted = 0
+
+    def emit(self, packet, mode):
+        self.emitted += 1
+        self.log.append((self.name, packet.frame_id))
+
+    def poll(self):
+        return self.stop_after is None or self.emitted < self.stop_after
+
+    def close(self):
+        self.log.append((self.name, "close"))
+
+
+def make_packets(count, gaps=()):
+    packets = []
+    for i in range(count):
+        if i in gaps:
+            packets.append(None)
+        image = np.zeros((48, 64, 3), dtype=np.uint8)
+        packet = FramePacket(i, image, 1000.0 + i, 0.0)
+        packet.landmark_array = np.full((NUM_LANDMARKS, 3), i / 10, dtype=np.float32) if i % 2 == 0 else None
+        packets.append(packet)
+    return packets
+
+
+def test_stages_run_in_order():
+    log = []
+    engine = PipelineEngine(ListPipeline(make_packets(2)), LoggingMode(log), [LoggingSink(log, "a"), LoggingSink(log, "b")])
+    engine.add_hook("packet", lambda packet: log.append(("packet_hook", packet.frame_id)))
+    engine.add_hook("frame", lambda packet: log.append(("frame_hook", packet.frame_id)))
+
+    assert engine.run() == 2
+    frame = [("update", 0), ("packet_hook", 0), ("a", 0), ("b", 0),
+             ("after_frame", 0, True), ("frame_hook", 0)]
+    assert log[0] == "start"
+    assert log[1:7] == frame
+    assert log[7:13] == [(step[0], 1) + step[2:] for step in frame]
+    assert log[13:] == ["finish", ("a", "close"), ("b", "close")]
+    assert engine.pipeline.started and engine.pipeline.stopped
+
+
+def test_frame_limits_skip_empty_reads():
+    log = []
+    pipeline = ListPipeline(make_packets(6, gaps=(1, 2)))
+    engine = PipelineEngine(pipeline, LoggingMode(log), [NullSink()])
+    assert engine.run(max_frames=3) == 3
+    assert [entry[1] for entry in log if entry[0] == "update"] == [0, 1, 2]
+    assert pipeline.stopped
+
+
+def test_sink_poll_ends_run():
+    log = []
+    sinks = [LoggingSink(log, "display", stop_after=2), LoggingSink(log, "other")]
+    engine = PipelineEngine(ListPipeline(make_packets(5)), LoggingMode(log), sinks)
+    assert engine.run() == 2
+    # Every sink still saw the last frame and is closed
+    assert ("other", 1) in log and ("other", 2) not in log
+    assert log[-2:] == [("display", "close"), ("other", "close")]
+
+
+def test_cleanup_after_sink_error():
+    class FailingSink(Sink):
+        def emit(self, packet, mode):
+            raise RuntimeError("display lost")
+
+    log = []
+    pipeline = ListPipeline(make_packets(3))
+    engine = PipelineEngine(pipeline, LoggingMode(log), [LoggingSink(log, "a"), FailingSink()])
+    with pytest.raises(RuntimeError):
+        engine.run()
+    assert pipeline.stopped
+    assert log[-2:] == ["finish", ("a", "close")]
+
+
+def test_recorder_sink_writes_every_packet(tmp_path):
+    path = str(tmp_path / "run.etlm")
+    packets = make_packets(4)
+    engine = PipelineEngine(ListPipeline(packets), LoggingMode([]), [RecorderSink(LandmarkRecorder(path)), NullSink()])
+    engine.run()
+
+    records = open_recording(path)
+    assert records["timestamp"].tolist() == [1000.0, 1001.0, 1002.0, 1003.0]
+    assert records["has_face"].tolist() == [1, 0, 1, 0]
+    assert records["target"].tolist() == [0, 1, 2, 0]
+    assert records["target_age"].tolist() == [0.0, 0.25, 0.5, 0.75]
+    assert (records["image_width"] == 64).all() and (records["image_height"] == 48).all()
+    np.testing.assert_array_equal(records["landmarks"][2], packets[2].landmark_array)
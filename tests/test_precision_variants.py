@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.append(SRC)
+
+from gaze_predictor import GazePredictor
+from precision_variants import compare, default_variant_path, forward_all, load_features
+from torch_gaze_backend import PRECISIONS, TorchGazeBackend, save_checkpoint
+
+MODEL = os.path.join(SRC, "models", "gc_1x3_loso.pth")
+SCALER = os.path.join(SRC, "scalers", "scaler_1x3_loso.pkl")
+INPUT_DIM = len(GazePredictor.FEATURE_INDEX)
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return TorchGazeBackend(MODEL, SCALER, INPUT_DIM, precision="float32")
+
+
+@pytest.fixture(scope="module")
+def features(reference):
+    features, targets = load_features(argparse.Namespace(recording=None, samples=2000), reference.scaler)
+    assert targets is None
+    return features
+
+
+# Largest logit error each reduced precision may add
+TOLERANCE = {"float16": 0.02, "bfloat16": 0.25, "int8": 1.0}
+
+
+@pytest.mark.parametrize("precision", PRECISIONS[1:])
+def test_variants_agree_with_float32(reference, features, precision):
+    backend = TorchGazeBackend(MODEL, SCALER, INPUT_DIM, precision=precision)
+    assert backend.precision == precision
+
+    logits = forward_all(backend, features, 256)
+    reference_logits = forward_all(reference, features, 256)
+    assert logits.dtype == np.float32 and logits.shape == reference_logits.shape
+    assert np.mean(logits.argmax(axis=1) == reference_logits.argmax(axis=1)) > 0.97
+    assert np.abs(logits - reference_logits).max() < TOLERANCE[precision]
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_converted_checkpoint_round_trip(tmp_path, reference, features, precision):
+    variant = TorchGazeBackend(MODEL, SCALER, INPUT_DIM, precision=precision)
+    path = default_variant_path(str(tmp_path / "gc.pth"), precision)
+    assert path.endswith(f"gc.{precision}.pth")
+    save_checkpoint(variant.model, path, variant.precision)
+    assert os.path.getsize(path) < os.path.getsize(MODEL)
+
+    # The saved precision is picked up without being asked for
+    loaded = TorchGazeBackend(path, SCALER, INPUT_DIM)
+    assert loaded.precision == precision
+    np.testing.assert_array_equal(forward_all(loaded, features, 256), forward_all(variant, features, 256))
+
+
+def test_compare_report(tmp_path):
+    output = str(tmp_path / "report.json")
+    args = argparse.Namespace(
+        model=MODEL, scaler=SCALER, precisions="float16", variant=None, recording=None, samples=500,
+        latency_samples=50, batch_size=128, reaction_delay=0.5, threads=None, output=output,
+    )
+    assert compare(args) == 0
+
+    with open(output) as f:
+        report = json.load(f)
+    assert report["samples"] == 500
+    [variant] = report["variants"]
+    assert variant["variant"] == "float16" and variant["precision"] == "float16"
+    assert variant["agreement_percent"] > 97
+    assert variant["latency_ms"]["p50"] <= variant["latency_ms"]["p99"]
+    assert variant["rows_per_s"] > 0
+    assert "accuracy_percent" not in variant
@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import results_writer
+from results_writer import SessionLog
+
+
+def test_log_and_summary(tmp_path):
+    log = SessionLog(str(tmp_path), flush_interval=0.01)
+    for i in range(10):
+        log.log_evaluation(1000.0 + i, i % 3, 0)
+        log.log_performance(1000.0 + i, {"detection_ms": 5.0, "latency_ms": 10.0})
+    summary_path = log.close()
+
+    with open(summary_path) as f:
+        summary = json.load(f)
+    assert summary["evaluation"]["summary"]["total_samples"] == 10
+    assert summary["efficiency"]["summary"]["detection_ms"]["count"] == 10
+    with open(log.log_path) as f:
+        assert sum(1 for _ in f) == 21
+    assert log.error is None
+
+
+def test_writer_error_stops_queueing(tmp_path):
+    log = SessionLog(str(tmp_path), flush_interval=0.01)
+    # Not JSON serializable, so the writer thread fails on it
+    log._put({"type": "performance", "timestamp": 1000.0, "ui_ms": np.float32(2.0)})
+    log._thread.join(timeout=5)
+    assert isinstance(log.error, TypeError)
+
+    for i in range(100):
+        log.log_evaluation(1001.0 + i, 1, 1)
+    assert log._queue.empty()
+
+    summary_path = log.close()
+    with open(summary_path) as f:
+        summary = json.load(f)
+    assert summary["evaluation"]["summary"]["total_samples"] == 100
+    assert "log_error" in summary
+
+
+def test_summary_write_error_is_reported(tmp_path, monkeypatch, capsys):
+    def fail(path, output):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(results_writer, "write_summary", fail)
+    log = SessionLog(str(tmp_path), flush_interval=0.01)
+    log.log_evaluation(1000.0, 0, 0)
+    assert log.close() is None
+    assert "Failed to save results: disk full" in capsys.readouterr().out
@@ -0,0 +1,181 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from results_writer import SessionLog
+from session_analytics import analyze, delay_sweep
+from session_store import INDEX_FILE, SessionStore, session_id_for
+
+
+def write_session(results_dir, prefix, samples, metadata, reaction_delay_s=0.5, frames=4):
+    # samples: (target, prediction, target_age)
+    log = SessionLog(results_dir, prefix=prefix, flush_interval=0.01, reaction_delay_s=reaction_delay_s,
+                     metadata=metadata)
+    for i, (target, prediction, target_age) in enumerate(samples):
+        log.log_evaluation(1000.0 + i, target, prediction, target_age)
+        if i % 2 == 0:
+            log.log_shadow(1000.0 + i, "candidate", target, (prediction + 1) % 3, target_age, 0.5)
+    for i in range(frames):
+        log.log_performance(1000.0 + i, {"detection_ms": 5.0 + i, "prediction_ms": 0.0, "latency_ms": 20.0})
+    log.close()
+    return log.log_path
+
+
+@pytest.fixture
+def session_log(tmp_path):
+    samples = [(0, 0, 0.1), (0, 0, 0.7), (1, 2, 0.9), (1, 1, 1.2), (2, 2, 0.6), (2, 0, 0.3)]
+    return write_session(str(tmp_path / "results"), "experiment", samples, {"user": "a", "lighting": "day"})
+
+
+def test_session_log_round_trip(tmp_path, session_log):
+    store = SessionStore(str(tmp_path / "sessions"))
+    entry = store.import_file(session_log)
+
+    assert entry["file"] == os.path.basename(session_log).replace(".jsonl", ".npz")
+    # Two samples are within the reaction delay; 3 of the other 4 are right
+    assert entry["samples"] == 4 and entry["accuracy_percent"] == 75.0
+    assert entry["frames"] == 4 and entry["reaction_delay_s"] == 0.5
+    assert entry["metadata"] == {"user": "a", "lighting": "day"}
+    assert entry["shadow_models"] == ["candidate"]
+
+    columns = store.load(store.select()[0])
+    assert columns["eval_target"].dtype == np.int8
+    assert columns["eval_prediction"].tolist() == [0, 0, 2, 1, 2, 0]
+    np.testing.assert_allclose(columns["eval_target_age"], [0.1, 0.7, 0.9, 1.2, 0.6, 0.3], rtol=1e-6)
+    assert columns["perf_detection_ms"].tolist() == [5.0, 6.0, 7.0, 8.0]
+    assert columns["perf_ui_ms"].tolist() == [0.0] * 4
+    assert columns["shadow_model"].tolist() == [0, 0, 0]
+    assert columns["shadow_prediction"].tolist() == [1, 0, 0]
+
+    # Single columns load on their own
+    assert set(store.load(store.select()[0], ["eval_target", "missing"])) == {"eval_target"}
+
+
+def test_index_is_persisted(tmp_path, session_log):
+    root = str(tmp_path / "sessions")
+    store = SessionStore(root)
+    store.import_file(session_log)
+
+    with open(os.path.join(root, INDEX_FILE)) as f:
+        assert json.load(f)["sessions"] == store.index
+    reopened = SessionStore(root)
+    assert reopened.index == store.index and len(reopened) == 1
+
+    # Already stored sessions are only re-imported on request
+    assert reopened.import_file(session_log) is None
+    assert reopened.import_file(session_log, replace=True) == store.index[store.select()[0]]
+    assert not [name for name in os.listdir(root) if ".tmp" in name]
+
+
+def test_truncated_log_is_imported(tmp_path, session_log):
+    with open(session_log, "a") as f:
+        f.write('{"type": "evaluation", "timestamp": 2000.0, "tar')
+    entry = SessionStore(str(tmp_path / "sessions")).import_file(session_log)
+    assert entry["samples"] == 4
+
+
+def test_legacy_results(tmp_path):
+    legacy_dir = tmp_path / "legacy"
+    legacy_dir.mkdir()
+    flat = {
+        "summary": {"start_time": "2024-01-01T10:00:00"},
+        "raw_data": [
+            {"timestamp": 1.0, "target": 0, "prediction": 0},
+            {"timestamp": 2.0, "target": 1, "prediction": 2},
+        ],
+    }
+    nested = {
+        "evaluation": {"summary": {}, "raw_data": [{"timestamp": 1.0, "target": 2, "prediction": 2}]},
+        "efficiency": {"summary": {}, "raw_data": [{"timestamp": 1.0, "detection_ms": 7.0, "ui_ms": 1.0}]},
+    }
+    paths = {}
+    for name, data in [("flat", flat), ("nested", nested), ("summary_only", {"log_file": "x.jsonl"}),
+                       ("broken", None)]:
+        paths[name] = str(legacy_dir / f"{name}.json")
+        with open(paths[name], "w") as f:
+            f.write("{" if data is None else json.dumps(data))
+
+    store = SessionStore(str(tmp_path / "sessions"))
+    with pytest.raises(ValueError, match="x.jsonl"):
+        store.import_file(paths["summary_only"])
+    assert store.import_files(sorted(paths.values())) == 2
+    assert sorted(store.index) == ["flat", "nested"]
+
+    # No target ages: every logged sample counts
+    flat_entry = store.index["flat"]
+    assert flat_entry["samples"] == 2 and flat_entry["accuracy_percent"] == 50.0
+    assert flat_entry["start_time"] == "2024-01-01T10:00:00" and flat_entry["source"] == "flat.json"
+    assert np.isnan(store.load("flat")["eval_target_age"]).all()
+
+    nested_columns = store.load("nested")
+    assert nested_columns["perf_detection_ms"].tolist() == [7.0]
+    assert nested_columns["perf_latency_ms"].tolist() == [0.0]
+    assert store.index["nested"]["frames"] == 1
+
+
+def test_select_and_load_many(tmp_path):
+    results_dir = str(tmp_path / "results")
+    store = SessionStore(str(tmp_path / "sessions"))
+    for prefix, user, samples in [("s1", "a", [(0, 0, 1.0)] * 2), ("s2", "b", [(1, 1, 1.0)] * 3),
+                                  ("s3", "a", [])]:
+        store.import_file(write_session(results_dir, prefix, samples, {"user": user}))
+
+    ids = store.select({"user": "a"})
+    assert len(ids) == 2 and all(store.index[i]["metadata"]["user"] == "a" for i in ids)
+    assert store.select({"user": "c"}) == []
+
+    merged = store.load_many(sorted(store.index), ["eval_target", "eval_target_age"])
+    assert merged["eval_target"].tolist() == [0, 0, 1, 1, 1]
+    assert merged["session"].tolist() == [0, 0, 1, 1, 1]
+    assert store.load_many([], ["eval_target"])["eval_target"].dtype == np.int8
+
+
+def test_analytics_matches_per_sample_counts(tmp_path):
+    rng = np.random.default_rng(0)
+    results_dir = str(tmp_path / "results")
+    store = SessionStore(str(tmp_path / "sessions"))
+    sessions = {}
+    for s, lighting in enumerate(["day", "night", "day"]):
+        samples = [(int(t), int(p), float(a)) for t, p, a in
+                   zip(rng.integers(0, 3, 40), rng.integers(0, 3, 40), rng.uniform(0, 2, 40))]
+        path = write_session(results_dir, f"s{s}", samples, {"lighting": lighting})
+        store.import_file(path)
+        sessions[session_id_for(path)] = (lighting, samples)
+
+    session_ids = sorted(store.index)
+    delays = np.array([0.0, 0.5, 1.0, 1.5])
+    report = analyze(store, session_ids, group_by="lighting", reaction_delay=0.5, delays=delays)
+    assert [group["group"] for group in report["groups"]] == ["day", "night"]
+
+    for group in report["groups"]:
+        rows = [sample for session_id in session_ids for sample in sessions[session_id][1]
+                if sessions[session_id][0] == group["group"]]
+        matrix = np.zeros((3, 3), dtype=int)
+        for target, prediction, age in rows:
+            if np.float32(age) > 0.5:
+                matrix[target, prediction] += 1
+        assert group["confusion_matrix"] == matrix.tolist()
+        assert group["accuracy_percent"] == round(np.trace(matrix) / matrix.sum() * 100, 2)
+
+        for point in group["reaction_delay_sweep"]:
+            kept = [(t, p) for t, p, age in rows if np.float32(age) > point["delay_s"]]
+            assert point["samples"] == len(kept)
+            assert point["accuracy_percent"] == round(np.mean([t == p for t, p in kept]) * 100, 2)
+
+        assert group["latency_ms"]["detection_ms"]["count"] == 4 * group["sessions"]
+        # Stages that never ran are left out
+        assert "prediction_ms" not in group["latency_ms"]
+
+
+def test_delay_sweep_skips_unknown_ages():
+    target_age = np.array([np.nan, 0.2, 0.6, 1.0, np.nan])
+    correct = np.array([1.0, 0.0, 1.0, 1.0, 0.0])
+    samples, accuracy = delay_sweep(target_age, correct, np.array([0.0, 0.5, 1.0]))
+    assert samples.tolist() == [3, 2, 0]
+    assert accuracy[:2].round(2).tolist() == [66.67, 100.0]
+    assert np.isnan(accuracy[2])
@@ -0,0 +1,116 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from gaze_predictor import GazePredictor
+from results_writer import SessionSummary
+from shadow_evaluator import ShadowEvaluator, candidate_name
+
+
+class FixedBackend:
+    num_classes = 3
+
+    def __init__(self, column, release=None):
+        self.column = column
+        self.release = release
+
+    def forward(self, features):
+        if self.release is not None:
+            self.release.wait(5)
+        logits = np.zeros((len(features), self.num_classes), dtype=np.float32)
+        logits[:, self.column] = 1.0
+        return logits
+
+
+class BrokenBackend:
+    num_classes = 3
+
+    def forward(self, features):
+        raise RuntimeError("bad checkpoint")
+
+
+def features(n=1):
+    return np.random.default_rng(0).random((n, len(GazePredictor.FEATURE_INDEX)), dtype=np.float32)
+
+
+def by_name(results):
+    return {name: (predictions.tolist(), context) for name, predictions, _, _, context in results}
+
+
+def test_candidates_score_the_same_rows():
+    shadow = ShadowEvaluator({
+        "left": GazePredictor(None, None, backend=FixedBackend(0)),
+        "right": GazePredictor(None, None, backend=FixedBackend(2)),
+    })
+    shadow.submit(features(2), (1000.0, 1, 0.8))
+    results = shadow.close()
+
+    assert by_name(results) == {"left": ([0, 0], (1000.0, 1, 0.8)), "right": ([2, 2], (1000.0, 1, 0.8))}
+    for _, _, probabilities, latency_ms, _ in results:
+        assert probabilities.shape == (2, 3) and latency_ms >= 0
+    assert shadow.stats() == {"left": {"submitted": 1, "skipped": 0}, "right": {"submitted": 1, "skipped": 0}}
+
+
+def test_busy_candidate_skips_frames():
+    release = threading.Event()
+    shadow = ShadowEvaluator({
+        "slow": GazePredictor(None, None, backend=FixedBackend(1, release)),
+        "fast": GazePredictor(None, None, backend=FixedBackend(0)),
+    })
+    try:
+        for frame in range(3):
+            shadow.submit(features(), frame)
+        assert shadow.stats()["slow"] == {"submitted": 1, "skipped": 2}
+    finally:
+        release.set()
+        results = shadow.close()
+
+    # Only the first frame reached the slow model
+    assert [context for name, _, _, _, context in results if name == "slow"] == [0]
+    assert shadow.stats()["fast"]["submitted"] + shadow.stats()["fast"]["skipped"] == 3
+
+
+def test_failing_candidate_is_released(capsys):
+    shadow = ShadowEvaluator({
+        "broken": GazePredictor(None, None, backend=BrokenBackend()),
+        "ok": GazePredictor(None, None, backend=FixedBackend(1)),
+    })
+    shadow.submit(features(), 0)
+
+    # A failure does not leave the candidate marked busy
+    deadline = time.monotonic() + 5
+    while shadow._busy and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert "Shadow model broken failed: bad checkpoint" in capsys.readouterr().out
+    shadow.submit(features(), 1)
+    results = shadow.close()
+    assert shadow.stats()["broken"] == {"submitted": 2, "skipped": 0}
+    assert all(name == "ok" for name, *_ in results)
+
+
+def test_summary_agreement_stats():
+    summary = SessionSummary(reaction_delay_s=0.5)
+    frames = [(0, 0, 0.2), (0, 0, 0.6), (1, 2, 0.9), (2, 2, 1.5), (1, 1, None)]
+    for target, prediction, target_age in frames:
+        summary.add_shadow("int8", target, prediction, target_age, 1.5)
+    summary.add_record({"type": "shadow", "model": "onnx", "target": 1, "prediction": 1, "target_age": 2.0,
+                        "latency_ms": 0.5})
+
+    shadow = summary.to_dict()["shadow"]
+    # The first frame is within the reaction delay; latency still counts it
+    assert shadow["int8"]["total_samples"] == 4
+    assert shadow["int8"]["accuracy_percent"] == 75.0
+    assert shadow["int8"]["latency_ms"]["count"] == 5
+    assert shadow["onnx"]["total_samples"] == 1 and shadow["onnx"]["accuracy_percent"] == 100.0
+
+
+def test_candidate_names_are_unique():
+    names = []
+    for path in ["models/gc.int8.pth", "other/gc.int8.pth", "gc.int8.onnx", "models/gc.pth"]:
+        names.append(candidate_name(path, names))
+    assert names == ["gc.int8", "gc.int8_2", "gc.int8_3", "gc"]
@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from startup import StartupOrchestrator
+
+
+@pytest.fixture
+def startup():
+    startup = StartupOrchestrator(max_workers=3)
+    yield startup
+    startup.shutdown()
+
+
+def test_initialisers_run_concurrently(startup):
+    # Each one only returns once all three are running at the same time
+    barrier = threading.Barrier(3, timeout=5)
+
+    def init(value):
+        barrier.wait()
+        return value
+
+    for name in ("detector", "predictor", "camera"):
+        startup.add(name, init, name.upper())
+    assert startup.wait_all() == {"detector": "DETECTOR", "predictor": "PREDICTOR", "camera": "CAMERA"}
+    assert startup.names == ["detector", "predictor", "camera"]
+
+
+def test_pending_and_polling(startup):
+    release = threading.Event()
+    startup.add("fast", lambda: 1)
+    startup.add("slow", release.wait, 5)
+
+    deadline = time.monotonic() + 5
+    while not startup.done("fast") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert startup.pending() == ["slow"]
+
+    polls = []
+
+    def poll():
+        polls.append(startup.pending())
+        if len(polls) == 3:
+            release.set()
+
+    assert startup.wait_all(poll=poll, interval=0.01) == {"fast": 1, "slow": True}
+    assert polls[0] == ["slow"] and len(polls) >= 3
+    assert startup.pending() == []
+
+
+def test_failures_are_raised_from_result(startup):
+    def broken():
+        raise FileNotFoundError("model.pth")
+
+    startup.add("ok", lambda: "ready")
+    startup.add("predictor", broken)
+    with pytest.raises(FileNotFoundError):
+        startup.result("predictor", timeout=5)
+    assert startup.result("ok", timeout=5) == "ready"
+    with pytest.raises(FileNotFoundError):
+        startup.wait_all()
+    # A failed initialiser is still timed
+    assert set(startup.timings) == {"ok", "predictor"}
+
+
+def test_timings_and_report(startup):
+    startup.add("camera", time.sleep, 0.05)
+    startup.add("gallery", lambda: None)
+    startup.wait_all()
+
+    camera = startup.timings["camera"]
+    assert camera["ms"] >= 45
+    assert camera["ready_after_ms"] >= camera["ms"]
+    report = startup.report().splitlines()
+    assert report[0] == "Startup timings:"
+    assert report[1].split()[0] == "camera" and report[2].split()[0] == "gallery"
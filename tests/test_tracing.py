@@ -0,0 +1,108 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import tracing
+
+
+@pytest.fixture
+def traced():
+    tracing.clear()
+    tracing.enable()
+    yield
+    tracing.disable()
+    tracing.clear()
+
+
+def events_named(trace_events, prefix):
+    return [event for event in trace_events if event["name"].startswith(prefix)]
+
+
+def test_disabled_spans_record_nothing():
+    tracing.disable()
+    tracing.clear()
+    assert tracing.span("test.off") is tracing.span("test.other")
+    with tracing.span("test.off"):
+        tracing.instant("test.off.marker")
+    assert events_named(tracing.chrome_trace_events(), "test.off") == []
+
+
+def test_chrome_trace_schema(traced, tmp_path):
+    def worker():
+        with tracing.span("test.worker", {"rows": 4}):
+            time.sleep(0.002)
+
+    with tracing.span("test.outer"):
+        with tracing.span("test.inner"):
+            time.sleep(0.002)
+        tracing.instant("test.dropped", {"frame": 7})
+    thread = threading.Thread(target=worker, name="test-worker")
+    thread.start()
+    thread.join()
+
+    path = str(tmp_path / "trace.json")
+    count = tracing.export_chrome_trace(path)
+    with open(path) as f:
+        trace = json.load(f)
+    assert trace["displayTimeUnit"] == "ms"
+    trace_events = trace["traceEvents"]
+    assert len(trace_events) == count
+
+    pid = os.getpid()
+    for event in trace_events:
+        assert event["pid"] == pid and isinstance(event["tid"], int) and event["ph"] in ("M", "X", "i")
+    names = {event["tid"]: event["args"]["name"] for event in trace_events if event["ph"] == "M"}
+
+    [outer] = events_named(trace_events, "test.outer")
+    [inner] = events_named(trace_events, "test.inner")
+    [worker_span] = events_named(trace_events, "test.worker")
+    # Complete events in microseconds; the inner span sits inside the outer one
+    assert outer["ph"] == inner["ph"] == "X"
+    assert inner["dur"] >= 2000
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert "args" not in outer
+
+    [dropped] = events_named(trace_events, "test.dropped")
+    assert dropped["ph"] == "i" and dropped["s"] == "t" and dropped["args"] == {"frame": 7}
+    assert outer["ts"] <= dropped["ts"] <= outer["ts"] + outer["dur"]
+
+    assert worker_span["args"] == {"rows": 4}
+    assert names[worker_span["tid"]] == "test-worker"
+    assert names[outer["tid"]] == threading.current_thread().name
+    assert worker_span["tid"] != outer["tid"]
+
+
+def test_span_closes_on_exception(traced):
+    with pytest.raises(ValueError):
+        with tracing.span("test.failing"):
+            raise ValueError
+    [event] = events_named(tracing.chrome_trace_events(), "test.failing")
+    assert event["ph"] == "X"
+
+
+def test_thread_buffers_are_bounded():
+    tracing.clear()
+    tracing.enable(max_events_per_thread=5)
+
+    def worker():
+        for i in range(10):
+            with tracing.span(f"test.bounded.{i}"):
+                pass
+
+    try:
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        # The oldest spans make room for new ones
+        kept = [event["name"] for event in events_named(tracing.chrome_trace_events(), "test.bounded")]
+        assert kept == [f"test.bounded.{i}" for i in range(5, 10)]
+    finally:
+        tracing.enable()
+        tracing.disable()
+        tracing.clear()
@@ -0,0 +1,120 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from user_interface import UserInterface
+
+WIDTH, HEIGHT = 320, 240
+
+
+@pytest.fixture
+def frame():
+    return np.random.default_rng(0).integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+
+def test_cached_frame_matches_render(frame):
+    ui = UserInterface()
+    for highlight, target in [(None, None), (0, 1), (2, 1), (1, None)]:
+        expected = ui._render_frame(frame, highlight, target)
+        first = ui.create_frame(frame, highlight, target)
+        np.testing.assert_array_equal(first, expected)
+
+        # The gray overlay covers the camera image, so any frame of the same size hits the cache
+        second = ui.create_frame(np.zeros_like(frame), highlight, target)
+        assert second is first
+        assert not second.flags.writeable
+
+
+def test_cache_is_keyed_by_size(frame):
+    ui = UserInterface()
+    small = ui.create_frame(frame[:120, :160], 0, 1)
+    assert small.shape == (120, 160, 3)
+    assert ui.create_frame(frame, 0, 1).shape == (HEIGHT, WIDTH, 3)
+
+    ui.clear_frame_cache()
+    again = ui.create_frame(frame[:120, :160], 0, 1)
+    assert again is not small
+    np.testing.assert_array_equal(again, small)
+
+
+def test_dirty_regions_are_restored(frame):
+    ui = UserInterface()
+    base = ui.create_frame(frame, 1, 2)
+
+    live = ui.create_frame(frame, 1, 2, dirty_regions=[(10, 20, 60, 50)])
+    assert live.flags.writeable
+    np.testing.assert_array_equal(live, base)
+    live[20:50, 10:60] = 7
+
+    # The previous frame's drawing is wiped before the next one is drawn
+    live = ui.create_frame(frame, 1, 2, dirty_regions=[(-30, HEIGHT - 10, 40, HEIGHT + 30)])
+    np.testing.assert_array_equal(live, base)
+    live[HEIGHT - 10:, :40] = 7
+
+    # Regions are clipped to the frame, and undeclared drawing is not cleaned up
+    live[0, WIDTH - 1] = 7
+    live = ui.create_frame(frame, 1, 2, dirty_regions=[])
+    np.testing.assert_array_equal(live[HEIGHT - 10:, :40], base[HEIGHT - 10:, :40])
+    assert (live[0, WIDTH - 1] == 7).all()
+
+
+def test_live_frame_follows_key_changes(frame):
+    ui = UserInterface()
+    live = ui.create_frame(frame, 0, 1, dirty_regions=[(0, 0, 10, 10)])
+    live[0, WIDTH - 1] = 7
+
+    # A new highlight starts again from a full copy of the new composite
+    live = ui.create_frame(frame, 2, 1, dirty_regions=[])
+    np.testing.assert_array_equal(live, ui._render_frame(frame, 2, 1))
+    assert not np.shares_memory(live, ui.create_frame(frame, 2, 1))
+
+
+def render_gallery(image, hover_state, progress):
+    # A fresh interface has no layers or output buffer to reuse
+    return UserInterface().create_gallery_interface(image, hover_state, progress).copy()
+
+
+def test_gallery_frames_match_uncached_render(frame):
+    ui = UserInterface()
+    other = frame[::-1].copy()
+    steps = [
+        (frame, None, 0.0), (frame, "next", 0.1), (frame, "next", 0.5), (frame, "next", 0.9),
+        (frame, "prev", 0.2), (frame, "prev", 0.0), (frame, None, 0.0),
+        (other, "next", 0.3), (frame, "next", 0.4), (other, "next", 0.6),
+    ]
+    for image, hover_state, progress in steps:
+        out = ui.create_gallery_interface(image, hover_state, progress)
+        np.testing.assert_array_equal(out, render_gallery(image, hover_state, progress))
+
+
+def test_gallery_progress_only_touches_ring(frame):
+    ui = UserInterface()
+    ui.create_gallery_interface(frame, "next", 0.0)
+    layer = ui._gallery_layer(frame, "next")
+
+    out = ui.create_gallery_interface(frame, "next", 0.5)
+    x0, y0, x1, y1 = ui._gallery_dirty
+    assert x1 == WIDTH and x1 - x0 <= 2 * 56 and y1 - y0 <= 2 * 56
+    changed = np.argwhere((out != layer).any(axis=2))
+    assert len(changed)
+    assert changed[:, 0].min() >= y0 and changed[:, 0].max() < y1
+    assert changed[:, 1].min() >= x0 and changed[:, 1].max() < x1
+
+    # Dropping the progress restores the ring's ROI from the layer
+    out = ui.create_gallery_interface(frame, "next", 0.0)
+    assert ui._gallery_dirty is None
+    np.testing.assert_array_equal(out, layer)
+
+
+def test_gallery_layers_are_bounded(frame):
+    ui = UserInterface()
+    images = [np.full_like(frame, i) for i in range(ui._gallery_layers_size + 2)]
+    for image in images:
+        ui.create_gallery_interface(image, None)
+    assert len(ui._gallery_layers) == ui._gallery_layers_size
+    assert ui._gallery_layers[(id(images[-1]), None)][0] is images[-1]
+    assert (id(images[0]), None) not in ui._gallery_layers